@@ -2,23 +2,47 @@ from flask import Flask, send_from_directory, redirect, request, jsonify
 import os
 import sys
 import importlib.util
+from asgiref.wsgi import WsgiToAsgi
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Créer l'app Flask principale
 app = Flask(__name__)
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
 
-# Ajouter le dossier wiki au path pour pouvoir importer l'app
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'wiki'))
-
-# Importer l'app du wiki summarizer
+# Importer l'app du wiki summarizer avec importlib, sous un nom distinct : le hub est lui-même
+# le module « app » (gunicorn app:app, uvicorn app:asgi_app), un import direct le retrouverait
 try:
-    from app import app as summarizer_app, summarizer
+    wiki_path = os.path.join(os.path.dirname(__file__), 'wiki', 'app.py')
+    spec = importlib.util.spec_from_file_location("wiki_summarizer_module", wiki_path)
+    wiki_module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = wiki_module
+    spec.loader.exec_module(wiki_module)
+    
+    summarizer_app = wiki_module.app
+    summarizer = wiki_module.summarizer
+    summarize_async = wiki_module.serve_summarize_async
+    install_request_metrics = wiki_module.install_request_metrics
+    
     print("✅ App Wikisummarizer importée avec succès")
-except ImportError as e:
+except Exception as e:
     print(f"❌ Erreur import Wikisummarizer: {e}")
     summarizer_app = None
     summarizer = None
+    summarize_async = None
+    install_request_metrics = None
+
+# Les proxys appellent les vues du summarizer sans passer par ses hooks : durées mesurées ici,
+# sous l'endpoint du summarizer
+if install_request_metrics:
+    install_request_metrics(app, endpoints={
+        'api_summarize': 'summarize',
+        'api_summarize_stream': 'summarize_stream',
+        'api_summarize_batch': 'summarize_batch',
+        'api_create_job': 'create_job',
+        'api_get_job': 'get_job',
+        'api_stats': 'get_stats',
+        'metrics': 'get_metrics'
+    })
 
 # Importer l'app de Mathia avec importlib pour éviter les conflits
 try:
@@ -30,16 +54,19 @@ try:
         
         mathia_app = mathia_module.app
         mathia = mathia_module.mathia
+        mathia_chat_async = mathia_module.chat_async
         
         print("✅ App Mathia importée avec succès")
     else:
         print(f"❌ Fichier Mathia non trouvé: {mathia_path}")
         mathia_app = None
         mathia = None
+        mathia_chat_async = None
 except Exception as e:
     print(f"❌ Erreur import Mathia: {e}")
     mathia_app = None
     mathia = None
+    mathia_chat_async = None
 
 @app.route('/')
 def hub():
@@ -209,6 +236,38 @@ def api_summarize():
     else:
         return jsonify({'success': False, 'error': 'Wikisummarizer non disponible'}), 500
 
+@app.route('/api/summarize/stream', methods=['GET', 'POST'])
+def api_summarize_stream():
+    """Proxy vers l'API de résumé en streaming (SSE)"""
+    if summarizer_app and summarizer:
+        return summarizer_app.view_functions['summarize_stream']()
+    else:
+        return jsonify({'success': False, 'error': 'Wikisummarizer non disponible'}), 500
+
+@app.route('/api/summarize/batch', methods=['POST'])
+def api_summarize_batch():
+    """Proxy vers l'API de résumé par lot"""
+    if summarizer_app and summarizer:
+        return summarizer_app.view_functions['summarize_batch']()
+    else:
+        return jsonify({'success': False, 'error': 'Wikisummarizer non disponible'}), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def api_create_job():
+    """Proxy vers la soumission de jobs du summarizer"""
+    if summarizer_app and summarizer:
+        return summarizer_app.view_functions['create_job']()
+    else:
+        return jsonify({'success': False, 'error': 'Wikisummarizer non disponible'}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_get_job(job_id):
+    """Proxy vers l'état d'un job du summarizer"""
+    if summarizer_app and summarizer:
+        return summarizer_app.view_functions['get_job'](job_id)
+    else:
+        return jsonify({'success': False, 'error': 'Wikisummarizer non disponible'}), 500
+
 @app.route('/api/stats', methods=['GET'])
 def api_stats():
     """Proxy vers les stats du summarizer"""
@@ -217,6 +276,14 @@ def api_stats():
     else:
         return jsonify({'error': 'Wikisummarizer non disponible'}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Proxy vers les métriques Prometheus du summarizer"""
+    if summarizer_app and summarizer:
+        return summarizer_app.view_functions['get_metrics']()
+    else:
+        return jsonify({'error': 'Wikisummarizer non disponible'}), 500
+
 # Routes API de Mathia - SIMPLIFIÉES POUR LA NOUVELLE VERSION
 @app.route('/api/calculate', methods=['POST'])
 def api_mathia_calculate():
@@ -281,6 +348,33 @@ def health_check():
     }
     return jsonify(status), 200
 
+# Point d'entrée ASGI (uvicorn app:asgi_app) : résumés et chat Mathia en asyncio natif,
+# les autres routes passent par le hub Flask
+wsgi_fallback = WsgiToAsgi(app)
+
+async def asgi_app(scope, receive, send):
+    """Application ASGI du hub"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if summarizer:
+                    await summarizer.close_async()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    if scope['type'] == 'http' and scope['method'] == 'POST':
+        if scope['path'] == '/api/summarize' and summarize_async:
+            await summarize_async(scope, receive, send)
+            return
+        if scope['path'] in ('/api/chat', '/api/calculate') and mathia_chat_async:
+            await mathia_chat_async(scope, receive, send)
+            return
+    
+    await wsgi_fallback(scope, receive, send)
+
 if __name__ == '__main__':
     print("🌐 FUSIA HUB - Démarrage")
     print("="*50)
@@ -7,6 +7,7 @@ import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import sympy as sp
 from sympy import *
 from mistralai import Mistral
@@ -18,6 +19,9 @@ from dataclasses import dataclass
 from typing import Dict, List, Optional, Any, Tuple
 import traceback
 import random
+import threading
+import asyncio
+from asgiref.wsgi import WsgiToAsgi
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -39,6 +43,70 @@ plt.rcParams.update({
     'ytick.color': 'white'
 })
 
+class MistralClientPool:
+    """Clients Mistral partagés par le processus, un par clé API"""
+    
+    def __init__(self):
+        self._clients: Dict[str, Mistral] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, api_key: str) -> Mistral:
+        """Retourne le client associé à la clé, créé une seule fois"""
+        client = self._clients.get(api_key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(api_key)
+                if client is None:
+                    client = Mistral(api_key=api_key)
+                    self._clients[api_key] = client
+        return client
+
+# Pool global des clients Mistral (connexions et sessions TLS réutilisées)
+mistral_clients = MistralClientPool()
+
+class CircuitBreaker:
+    """Disjoncteur fermé / ouvert / semi-ouvert autour des appels Mistral"""
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """Autorise un appel ; en semi-ouvert, un seul appel de test à la fois"""
+        with self._lock:
+            if self.state == self.OPEN and time.time() - self.opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit breaker opened for {self.recovery_timeout:.0f}s")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
 @dataclass
 class UserProfile:
     """Profil utilisateur avec gamification"""
@@ -87,6 +155,10 @@ class MathiaCore:
             os.environ.get('MISTRAL_KEY_3', 'cvkQHVcomFFEW47G044x2p4DTyk5BIc7')
         ]
         self.current_key = 0
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=int(os.environ.get('MISTRAL_BREAKER_THRESHOLD', 5)),
+            recovery_timeout=float(os.environ.get('MISTRAL_BREAKER_RECOVERY', 30.0))
+        )
         self.user_profile = UserProfile()
         self.conversation_history = []
         self.problem_bank = self._initialize_problems()
@@ -105,14 +177,14 @@ class MathiaCore:
         for i in range(len(self.api_keys)):
             try:
                 key_index = (self.current_key + i) % len(self.api_keys)
-                client = Mistral(api_key=self.api_keys[key_index])
+                client = mistral_clients.get(self.api_keys[key_index])
                 self.current_key = key_index
                 return client
             except Exception as e:
                 logger.warning(f"Key {key_index} failed: {e}")
                 continue
         
-        return Mistral(api_key=self.api_keys[0])
+        return mistral_clients.get(self.api_keys[0])
     
     def _initialize_problems(self):
         """Initialise une banque de problèmes"""
@@ -185,53 +257,69 @@ class MathiaCore:
         try:
             # Analyser la requête avec Mistral
             ai_response = self._get_ai_analysis(query)
-            
-            # Extraire les expressions mathématiques
-            expressions = self._extract_math_expressions(ai_response)
-            
-            # Générer une visualisation si pertinente
-            graph_data = None
-            if self._needs_visualization(query, expressions):
-                graph_data = self._generate_graph(expressions, query)
-                if graph_data:
-                    self.stats['graphs_generated'] += 1
-                    self._check_badge_progress()
-            
-            # Résoudre étape par étape si demandé
-            steps = []
-            if show_steps and expressions:
-                steps = self._solve_step_by_step(expressions[0])
-            
-            # Mise à jour des statistiques
-            self.stats['total_interactions'] += 1
-            processing_time = time.time() - start_time
-            
-            return {
-                'success': True,
-                'response': ai_response,
-                'expressions': expressions,
-                'solution_steps': steps,
-                'graph': graph_data,
-                'processing_time': processing_time,
-                'user_level': self.user_profile.level,
-                'user_xp': self.user_profile.xp,
-                'new_badges': self._check_badge_progress()
-            }
+            return self._build_query_result(query, ai_response, show_steps, start_time)
             
         except Exception as e:
             logger.error(f"Error processing query: {e}")
-            return {
-                'success': False,
-                'error': str(e),
-                'response': 'Désolé, une erreur est survenue. Pouvez-vous reformuler votre question ?'
-            }
+            return self._query_error(e)
     
-    def _get_ai_analysis(self, query: str) -> str:
-        """Obtient une analyse IA de la requête"""
+    async def process_mathematical_query_async(self, query: str, show_steps: bool = True) -> Dict:
+        """Version asyncio de process_mathematical_query : appel Mistral non bloquant,
+        calcul symbolique et graphique dans un thread pour ne pas bloquer la boucle"""
+        start_time = time.time()
+        
         try:
-            client = self.get_mistral_client()
+            ai_response = await self._get_ai_analysis_async(query)
+            return await asyncio.to_thread(self._build_query_result, query, ai_response, show_steps, start_time)
             
-            system_prompt = """Tu es Mathia, un assistant mathématique expert et bienveillant. 
+        except Exception as e:
+            logger.error(f"Error processing query: {e}")
+            return self._query_error(e)
+    
+    def _build_query_result(self, query: str, ai_response: str, show_steps: bool, start_time: float) -> Dict:
+        """Expressions, graphique et étapes de résolution à partir de l'analyse IA"""
+        # Extraire les expressions mathématiques
+        expressions = self._extract_math_expressions(ai_response)
+        
+        # Générer une visualisation si pertinente
+        graph_data = None
+        if self._needs_visualization(query, expressions):
+            graph_data = self._generate_graph(expressions, query)
+            if graph_data:
+                self.stats['graphs_generated'] += 1
+                self._check_badge_progress()
+        
+        # Résoudre étape par étape si demandé
+        steps = []
+        if show_steps and expressions:
+            steps = self._solve_step_by_step(expressions[0])
+        
+        # Mise à jour des statistiques
+        self.stats['total_interactions'] += 1
+        processing_time = time.time() - start_time
+        
+        return {
+            'success': True,
+            'response': ai_response,
+            'expressions': expressions,
+            'solution_steps': steps,
+            'graph': graph_data,
+            'processing_time': processing_time,
+            'user_level': self.user_profile.level,
+            'user_xp': self.user_profile.xp,
+            'new_badges': self._check_badge_progress()
+        }
+    
+    def _query_error(self, error: Exception) -> Dict:
+        return {
+            'success': False,
+            'error': str(error),
+            'response': 'Désolé, une erreur est survenue. Pouvez-vous reformuler votre question ?'
+        }
+    
+    def _build_analysis_messages(self, query: str) -> List[Dict[str, str]]:
+        """Messages envoyés à Mistral pour analyser une requête"""
+        system_prompt = """Tu es Mathia, un assistant mathématique expert et bienveillant. 
 
 RÈGLES IMPORTANTES:
 - Explications claires et pédagogiques
@@ -248,23 +336,63 @@ Format de réponse souhaité:
 
 N'utilise pas d'astérisques pour la mise en forme."""
 
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": query}
-            ]
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": query}
+        ]
+    
+    def _get_ai_analysis(self, query: str) -> str:
+        """Obtient une analyse IA de la requête"""
+        fallback = f"Je peux vous aider avec cette question mathématique: {query}"
+        
+        # Mistral en panne : réponse de repli immédiate plutôt qu'une attente bloquante
+        if not self.circuit_breaker.allow():
+            logger.warning("Circuit breaker open, skipping AI analysis")
+            return fallback
+        
+        try:
+            client = self.get_mistral_client()
             
             response = client.chat.complete(
                 model="mistral-large-latest",
-                messages=messages,
+                messages=self._build_analysis_messages(query),
                 temperature=0.3,
                 max_tokens=1500
             )
             
+            self.circuit_breaker.record_success()
             return response.choices[0].message.content.strip()
             
         except Exception as e:
             logger.error(f"AI analysis error: {e}")
-            return f"Je peux vous aider avec cette question mathématique: {query}"
+            self.circuit_breaker.record_failure()
+            return fallback
+    
+    async def _get_ai_analysis_async(self, query: str) -> str:
+        """Version asyncio de _get_ai_analysis"""
+        fallback = f"Je peux vous aider avec cette question mathématique: {query}"
+        
+        if not self.circuit_breaker.allow():
+            logger.warning("Circuit breaker open, skipping AI analysis")
+            return fallback
+        
+        try:
+            client = self.get_mistral_client()
+            
+            response = await client.chat.complete_async(
+                model="mistral-large-latest",
+                messages=self._build_analysis_messages(query),
+                temperature=0.3,
+                max_tokens=1500
+            )
+            
+            self.circuit_breaker.record_success()
+            return response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            logger.error(f"AI analysis error: {e}")
+            self.circuit_breaker.record_failure()
+            return fallback
     
     def _extract_math_expressions(self, text: str) -> List[str]:
         """Extrait les expressions mathématiques du texte"""
@@ -336,7 +464,10 @@ N'utilise pas d'astérisques pour la mise en forme."""
             return None
             
         try:
-            fig, ax = plt.subplots(figsize=(12, 8), facecolor='#0f0f23')
+            # Figure hors pyplot : son état global (figure courante) n'est pas sûr entre threads,
+            # or les requêtes async génèrent leurs graphiques en parallèle (asyncio.to_thread)
+            fig = Figure(figsize=(12, 8), facecolor='#0f0f23')
+            ax = fig.subplots()
             ax.set_facecolor('#1a1a3a')
             
             x = symbols('x')
@@ -425,15 +556,14 @@ N'utilise pas d'astérisques pour la mise en forme."""
             
             ax.tick_params(colors='white', labelsize=12)
             
-            plt.tight_layout()
+            fig.tight_layout()
             
             # Sauvegarde en base64
             buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', bbox_inches='tight', 
+            fig.savefig(buffer, format='png', bbox_inches='tight', 
                        facecolor='#0f0f23', edgecolor='none', dpi=100)
             buffer.seek(0)
             image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
             
             return image_base64
             
@@ -716,6 +846,58 @@ def health():
         'features': ['gamification', 'ai_analysis', 'step_solving', 'visualization']
     })
 
+# Point d'entrée ASGI (uvicorn app:asgi_app) : /api/chat et /api/calculate en asyncio natif,
+# les autres routes passent par l'application Flask
+wsgi_fallback = WsgiToAsgi(app)
+
+async def chat_async(scope, receive, send):
+    """Équivalent asyncio de /api/chat"""
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    
+    try:
+        data = json.loads(body) if body else {}
+        message = data.get('message', '').strip()
+        
+        if not message:
+            result = {'success': False, 'error': 'Message requis'}
+        else:
+            result = await mathia.process_mathematical_query_async(message, data.get('show_steps', True))
+    except Exception as e:
+        logger.error(f"Chat API error: {e}")
+        result = {'success': False, 'error': str(e)}
+    
+    payload = json.dumps(result, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'application/json; charset=utf-8'),
+            (b'content-length', str(len(payload)).encode())
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+async def asgi_app(scope, receive, send):
+    """Application ASGI : routes asyncio natives, repli sur Flask pour tout le reste"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    if scope['type'] == 'http' and scope['path'] in ('/api/chat', '/api/calculate') and scope['method'] == 'POST':
+        await chat_async(scope, receive, send)
+        return
+    await wsgi_fallback(scope, receive, send)
+
 # Template HTML principal avec design moderne et gamification
 MATHIA_TEMPLATE = '''<!DOCTYPE html>
 <html lang="fr">
@@ -1,16 +1,2113 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 import requests
+import httpx
+import asyncio
 import json
 from mistralai import Mistral
-import wikipedia
+from mistralai.models import HTTPValidationError
 import os
+import sys
+import argparse
+import atexit
 import re
 import time
 import hashlib
+import zlib
+import struct
+import math
+import random
+import threading
+import sqlite3
+import uuid
+import socket
+import ipaddress
+from urllib.parse import urlsplit
+import unicodedata
+import numpy as np
+from collections import OrderedDict, Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, as_completed as futures_as_completed
+from email.utils import parsedate_to_datetime
+from asgiref.wsgi import WsgiToAsgi
 
 app = Flask(__name__)
 
+class ValueCodec:
+    """Sérialisation compacte des valeurs en cache : JSON compressé par zlib avec un dictionnaire prédéfini.
+    
+    Le dictionnaire est appris sur nos propres résumés (fragments les plus fréquents) ; chaque valeur
+    porte l'identifiant du dictionnaire utilisé, les anciens restent décodables après un réapprentissage.
+    """
+    
+    # Amorce du dictionnaire : clés JSON et balises HTML présentes dans tous les résultats
+    SEED = (
+        '"success":true,"title":"summary":"<p></p>\\n<strong></strong><em></em><br>'
+        '"url":"https://fr.wikipedia.org/wiki/"https://en.wikipedia.org/wiki/"source":"wikipedia",'
+        '"method":"direct","processing_time":"length_mode":"moyen","language":"fr","mode":"general",'
+        '"tokens":{"prompt":"completion":"estimated_prompt":},"revid":"content":'
+    ).encode('utf-8')
+    
+    FRAGMENT_RE = re.compile(r'(?=(\S+\s+\S+\s+\S+))')
+    HEADER = struct.Struct('>I')
+    
+    def __init__(self, level=6, dict_size=32 * 1024, train_samples=200, loader=None, on_train=None):
+        self.level = level
+        self.dict_size = dict_size
+        self.train_samples = train_samples
+        # loader(dict_id) -> bytes : dictionnaire appris par un autre worker ; on_train(dict_id, data) : persistance
+        self.loader = loader
+        self.on_train = on_train
+        self._dicts = {}
+        self._samples = []
+        self._lock = threading.Lock()
+        self.dict_id = self.activate(self.SEED)
+        self.stats = {
+            'encoded': 0,
+            'decoded': 0,
+            'raw_bytes': 0,
+            'compressed_bytes': 0,
+            'trainings': 0
+        }
+    
+    def activate(self, data):
+        """Utilise ce dictionnaire pour les prochaines valeurs ; retourne son identifiant"""
+        dict_id = zlib.crc32(data)
+        self._dicts[dict_id] = data
+        self.dict_id = dict_id
+        return dict_id
+    
+    def encode(self, value):
+        raw = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        dict_id = self.dict_id
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 15, 9, zlib.Z_DEFAULT_STRATEGY, self._dicts[dict_id])
+        data = self.HEADER.pack(dict_id) + compressor.compress(raw) + compressor.flush()
+        self.stats['encoded'] += 1
+        self.stats['raw_bytes'] += len(raw)
+        self.stats['compressed_bytes'] += len(data)
+        return data
+    
+    def decode(self, data):
+        dict_id = self.HEADER.unpack_from(data)[0]
+        zdict = self._dicts.get(dict_id)
+        if zdict is None:
+            zdict = self.loader(dict_id) if self.loader else None
+            if zdict is None:
+                raise ValueError(f"Dictionnaire de compression inconnu: {dict_id}")
+            self._dicts[dict_id] = zdict
+        decompressor = zlib.decompressobj(15, zdict)
+        self.stats['decoded'] += 1
+        return json.loads(decompressor.decompress(data[self.HEADER.size:]) + decompressor.flush())
+    
+    def add_sample(self, value):
+        """Conserve un exemple ; le dictionnaire est appris une fois train_samples exemples réunis"""
+        if not self.train_samples:
+            return
+        with self._lock:
+            if not self.train_samples:
+                return
+            self._samples.append(json.dumps(value, ensure_ascii=False, separators=(',', ':')))
+            if len(self._samples) < self.train_samples:
+                return
+            # Un seul apprentissage par processus
+            samples, self._samples = self._samples, []
+            self.train_samples = 0
+        
+        data = self.train(samples)
+        dict_id = self.activate(data)
+        self.stats['trainings'] += 1
+        print(f"🗜️ Dictionnaire de compression appris ({len(data)} octets, {len(samples)} exemples)")
+        if self.on_train:
+            self.on_train(dict_id, data)
+    
+    def train(self, samples):
+        """Construit un dictionnaire zlib : amorce puis fragments (trois mots) présents dans
+        plusieurs exemples, les plus fréquents en fin (références les plus courtes)"""
+        counts = Counter()
+        for sample in samples:
+            counts.update(set(self.FRAGMENT_RE.findall(sample)))
+        
+        fragments = []
+        size = len(self.SEED)
+        for fragment, count in counts.most_common():
+            encoded = fragment.encode('utf-8')
+            if count < 2 or size + len(encoded) + 1 > self.dict_size:
+                break
+            fragments.append(encoded)
+            size += len(encoded) + 1
+        return self.SEED + b' '.join(reversed(fragments))
+    
+    def get_stats(self):
+        stats = dict(self.stats, dict_id=self.dict_id, dict_bytes=len(self._dicts[self.dict_id]), level=self.level)
+        if self.stats['raw_bytes']:
+            stats['ratio'] = round(self.stats['compressed_bytes'] / self.stats['raw_bytes'], 3)
+        return stats
+
+class SummaryCache:
+    """Cache LRU borné (nombre d'entrées + taille en octets) avec TTL par entrée.
+    
+    Avec un codec, les valeurs sont conservées compressées et décodées à chaque lecture.
+    """
+    
+    def __init__(self, max_entries=1000, max_bytes=50 * 1024 * 1024, ttl=24 * 3600, codec=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.codec = codec
+        
+        # clé -> (valeur, taille en octets, date d'expiration)
+        self._entries = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'stale_hits': 0
+        }
+    
+    def _estimate_size(self, key, value):
+        """Estime l'empreinte mémoire d'une entrée à partir de sa forme sérialisée"""
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            payload = str(value)
+        return len(key) + len(payload.encode('utf-8'))
+    
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._size_bytes -= size
+    
+    def get(self, key):
+        """Retourne la valeur en cache ou None (entrée absente ou expirée)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            
+            value, _, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                # Entrée périmée conservée (jusqu'à éviction LRU) pour un éventuel service dégradé
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+        return self.codec.decode(value) if self.codec else value
+    
+    def get_stale(self, key, max_stale=None):
+        """Retourne la valeur même expirée (service dégradé), ou None si absente.
+        
+        Avec max_stale, une entrée expirée depuis plus de max_stale secondes n'est pas retournée.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if max_stale is not None and entry[2] is not None and entry[2] + max_stale <= time.time():
+                return None
+            self._entries.move_to_end(key)
+            self.stats['stale_hits'] += 1
+        return self.codec.decode(entry[0]) if self.codec else entry[0]
+    
+    def set(self, key, value, ttl=None):
+        """Ajoute une entrée puis évince les moins récemment utilisées si besoin"""
+        if self.codec:
+            value = self.codec.encode(value)
+            size = len(key) + len(value)
+        else:
+            size = self._estimate_size(key, value)
+        if size > self.max_bytes:
+            # Entrée plus grosse que le cache entier : inutile de tout vider pour elle
+            return
+        
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            
+            self._entries[key] = (value, size, expires_at)
+            self._size_bytes += size
+            
+            while len(self._entries) > self.max_entries or self._size_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.stats['evictions'] += 1
+    
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+    
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry[2] is None or entry[2] > time.time())
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+    
+    def get_stats(self):
+        """Statistiques du cache pour /api/stats"""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'entries': len(self._entries),
+                'size_bytes': self._size_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'compressed': bool(self.codec),
+                'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0
+            }
+
+class DiskSummaryCache:
+    """Cache persistant SQLite (mode WAL) partagé entre les workers gunicorn"""
+    
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=20000, stale_grace=0, codec=None):
+        self.path = path
+        self.codec = codec
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Durée pendant laquelle une entrée expirée est conservée (servie pendant son rafraîchissement)
+        self.stale_grace = stale_grace
+        self._local = threading.local()
+        self._writes = 0
+        
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'errors': 0
+        }
+        
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_created ON summaries (created_at)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS dictionaries (
+                id INTEGER PRIMARY KEY,
+                data BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+    
+    def _connect(self):
+        """Une connexion par thread (les connexions sqlite3 ne sont pas partageables)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+    
+    def get(self, key):
+        """Retourne la valeur persistée ou None"""
+        try:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Erreur lecture cache disque: {e}")
+            self.stats['errors'] += 1
+            return None
+        
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            self.stats['misses'] += 1
+            return None
+        
+        self.stats['hits'] += 1
+        return self._decode(row[0])
+    
+    def get_stale(self, key, max_stale=None):
+        """Retourne la valeur persistée même expirée (service dégradé), ou None.
+        
+        Avec max_stale, une entrée expirée depuis plus de max_stale secondes n'est pas retournée.
+        """
+        try:
+            row = self._connect().execute("SELECT value, expires_at FROM summaries WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Erreur lecture cache disque: {e}")
+            self.stats['errors'] += 1
+            return None
+        if row is None or (max_stale is not None and row[1] is not None and row[1] + max_stale <= time.time()):
+            return None
+        return self._decode(row[0])
+    
+    def set(self, key, value, ttl=None):
+        """Persiste une entrée (écrase la précédente)"""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, self._encode(value), now, now + ttl if ttl else None)
+            )
+            conn.commit()
+            self.stats['writes'] += 1
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self.prune()
+        except sqlite3.Error as e:
+            print(f"⚠️ Erreur écriture cache disque: {e}")
+            self.stats['errors'] += 1
+    
+    def _encode(self, value):
+        return self.codec.encode(value) if self.codec else json.dumps(value, ensure_ascii=False)
+    
+    def _decode(self, stored):
+        """Valeur compressée (BLOB) ou JSON texte (entrées écrites sans codec) ; None si illisible"""
+        if not isinstance(stored, bytes):
+            return json.loads(stored)
+        if not self.codec:
+            return None
+        try:
+            return self.codec.decode(stored)
+        except (ValueError, zlib.error) as e:
+            print(f"⚠️ Entrée du cache disque illisible: {e}")
+            self.stats['errors'] += 1
+            return None
+    
+    def acquire_lease(self, name, owner, duration):
+        """Réserve une tâche partagée entre workers (ex. préchauffage) pour duration secondes ;
+        faux si un autre worker la détient encore"""
+        now = time.time()
+        try:
+            conn = self._connect()
+            cursor = conn.execute("""
+                INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE leases.expires_at <= ? OR leases.owner = excluded.owner
+            """, (name, owner, now + duration, now))
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Erreur réservation {name}: {e}")
+            self.stats['errors'] += 1
+            return False
+        return cursor.rowcount == 1
+    
+    def load_dictionary(self, dict_id):
+        """Dictionnaire de compression appris par un worker (None si inconnu)"""
+        try:
+            row = self._connect().execute("SELECT data FROM dictionaries WHERE id = ?", (dict_id,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Erreur lecture dictionnaire: {e}")
+            return None
+        return bytes(row[0]) if row else None
+    
+    def latest_dictionary(self):
+        """Dernier dictionnaire appris, partagé par les workers qui démarrent"""
+        try:
+            row = self._connect().execute("SELECT data FROM dictionaries ORDER BY created_at DESC LIMIT 1").fetchone()
+        except sqlite3.Error:
+            return None
+        return bytes(row[0]) if row else None
+    
+    def save_dictionary(self, dict_id, data):
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR IGNORE INTO dictionaries (id, data, created_at) VALUES (?, ?, ?)",
+                (dict_id, data, time.time())
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Erreur écriture dictionnaire: {e}")
+    
+    def prune(self):
+        """Supprime les entrées expirées puis les plus anciennes au-delà de max_entries"""
+        conn = self._connect()
+        conn.execute("DELETE FROM summaries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time() - self.stale_grace,))
+        conn.execute("""
+            DELETE FROM summaries WHERE key IN (
+                SELECT key FROM summaries ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+        conn.commit()
+    
+    def get_stats(self):
+        """Statistiques du cache disque pour /api/stats"""
+        stats = dict(self.stats, path=self.path)
+        try:
+            stats['entries'] = self._connect().execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        except sqlite3.Error:
+            pass
+        return stats
+
+class SingleFlight:
+    """Déduplique les calculs concurrents : un seul appel par clé, les autres attendent son résultat"""
+    
+    class _Call:
+        def __init__(self):
+            self.event = threading.Event()
+            self.result = None
+            self.error = None
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {
+            'leaders': 0,
+            'coalesced': 0
+        }
+    
+    def claim(self, key):
+        """Inscrit un appelant : (appel, True) s'il doit calculer, (appel en cours, False) s'il doit attendre"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.stats['coalesced'] += 1
+                return call, False
+            call = self._Call()
+            self._calls[key] = call
+            self.stats['leaders'] += 1
+            return call, True
+    
+    def wait(self, call):
+        """Attend le résultat du leader (ou lève son erreur)"""
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+    
+    def complete(self, key, call, result=None, error=None):
+        """Publie le résultat du leader aux appelants en attente et libère la clé"""
+        call.result = result
+        call.error = error
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.event.set()
+    
+    def do(self, key, func, *args, **kwargs):
+        """Exécute func une seule fois pour toutes les requêtes simultanées sur la même clé"""
+        call, leader = self.claim(key)
+        if not leader:
+            return self.wait(call)
+        
+        result, error = None, None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.complete(key, call, result, error)
+    
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._calls))
+
+class AsyncSingleFlight:
+    """Équivalent asyncio de SingleFlight : une seule tâche par clé dans la boucle d'événements"""
+    
+    def __init__(self):
+        self._tasks = {}
+        self.stats = {
+            'leaders': 0,
+            'coalesced': 0
+        }
+    
+    async def do(self, key, func, *args, **kwargs):
+        """Attend la tâche en cours pour cette clé ou en lance une nouvelle"""
+        task = self._tasks.get(key)
+        if task is None:
+            self.stats['leaders'] += 1
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.stats['coalesced'] += 1
+        
+        # shield : un client qui se déconnecte n'annule pas le calcul attendu par les autres
+        return await asyncio.shield(task)
+    
+    def get_stats(self):
+        return dict(self.stats, in_flight=len(self._tasks))
+
+class JobQueue:
+    """File de jobs locale (pool de threads, sans broker) avec persistance SQLite optionnelle.
+    
+    Avec SQLite, les jobs sont visibles depuis tous les workers ; un seul worker exécute
+    chaque job (réservation atomique). Les jobs en attente et ceux dont le worker est mort
+    (processus disparu, ou réservation plus vieille que lease secondes) sont repris.
+    """
+    
+    def __init__(self, handler, workers=2, db_path=None, ttl=3600, lease=600, callback_hosts=()):
+        self.handler = handler
+        # Hôtes de callback autorisés (« exemple.com » ou « *.exemple.com ») ; sans liste,
+        # toute adresse publique est acceptée mais jamais le réseau interne
+        self.callback_hosts = tuple(host.lower() for host in callback_hosts)
+        self.ttl = ttl
+        self.lease = lease
+        self.db_path = db_path
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._events = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0
+        }
+        
+        if self.db_path:
+            conn = self._connect()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    callback_url TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    owner TEXT
+                )
+            """)
+            try:
+                # Base créée avant l'ajout de la colonne owner
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            except sqlite3.OperationalError:
+                pass
+            conn.commit()
+            self._recover()
+    
+    @property
+    def owner(self):
+        """Identité du processus qui exécute un job (calculée à l'appel : les workers sont forkés)"""
+        return f"{socket.gethostname()}:{os.getpid()}"
+    
+    @staticmethod
+    def _owner_alive(owner):
+        """Vrai / faux si le processus propriétaire est sur cette machine, None s'il est inconnu"""
+        host, _, pid = (owner or '').rpartition(':')
+        if host != socket.gethostname() or not pid.isdigit():
+            return None
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+    
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+    
+    def _persist(self, job):
+        if not self.db_path:
+            return
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO jobs (id, status, payload, result, callback_url, created_at, updated_at, owner) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job['id'], job['status'], json.dumps(job['payload'], ensure_ascii=False),
+             json.dumps(job['result'], ensure_ascii=False) if job['result'] is not None else None,
+             job['callback_url'], job['created_at'], job['updated_at'], job.get('owner'))
+        )
+        conn.commit()
+    
+    def _load(self, job_id):
+        """Lit un job créé par un autre worker depuis SQLite"""
+        if not self.db_path:
+            return None
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'status': row['status'],
+            'payload': json.loads(row['payload']),
+            'result': json.loads(row['result']) if row['result'] else None,
+            'callback_url': row['callback_url'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+            'owner': row['owner']
+        }
+    
+    def _claim(self, job_id):
+        """Réserve un job en attente ; faux si un autre worker l'a déjà pris"""
+        if not self.db_path:
+            return True
+        conn = self._connect()
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'running', owner = ?, updated_at = ? WHERE id = ? AND status = 'pending'",
+            (self.owner, time.time(), job_id)
+        )
+        conn.commit()
+        return cursor.rowcount == 1
+    
+    def _recover(self):
+        """Remet en attente les jobs dont le worker est mort, puis reprend les jobs en attente"""
+        conn = self._connect()
+        now = time.time()
+        orphans = 0
+        for row in conn.execute("SELECT id, owner, updated_at FROM jobs WHERE status = 'running'").fetchall():
+            alive = self._owner_alive(row['owner'])
+            if alive is False or (alive is None and row['updated_at'] < now - self.lease):
+                cursor = conn.execute(
+                    "UPDATE jobs SET status = 'pending', updated_at = ? WHERE id = ? AND status = 'running' AND updated_at = ?",
+                    (now, row['id'], row['updated_at'])
+                )
+                orphans += cursor.rowcount
+        conn.commit()
+        if orphans:
+            print(f"♻️ {orphans} job(s) orphelin(s) remis en attente")
+        
+        recovered = 0
+        for row in conn.execute("SELECT id FROM jobs WHERE status = 'pending'").fetchall():
+            with self._lock:
+                # Job soumis par ce worker : déjà confié au pool
+                if row['id'] in self._jobs:
+                    continue
+            job = self._load(row['id'])
+            if job is None:
+                continue
+            with self._lock:
+                self._jobs[job['id']] = job
+                self._events[job['id']] = threading.Event()
+            self.executor.submit(self._run, job['id'])
+            recovered += 1
+        if recovered:
+            print(f"♻️ {recovered} job(s) en attente repris")
+    
+    def _purge(self):
+        """Oublie les jobs terminés depuis plus de ttl secondes"""
+        limit = time.time() - self.ttl
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job['status'] in ('done', 'failed') and job['updated_at'] < limit]:
+                del self._jobs[job_id]
+                self._events.pop(job_id, None)
+        if self.db_path:
+            conn = self._connect()
+            conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (limit,))
+            conn.commit()
+            self._recover()
+    
+    def check_callback_url(self, url):
+        """Motif du refus d'une URL de callback, ou None si elle est acceptable.
+        
+        Le serveur POSTe le résultat sur cette URL : sans liste d'hôtes autorisés, les adresses
+        de bouclage, privées, lien-local (métadonnées cloud) ou réservées sont refusées après
+        résolution DNS, pour ne pas servir de relais vers le réseau interne.
+        """
+        try:
+            parts = urlsplit(url)
+            port = parts.port or (443 if parts.scheme == 'https' else 80)
+        except ValueError:
+            return 'callback_url invalide'
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            return 'callback_url doit être une URL http(s)'
+        if parts.username or parts.password:
+            return 'callback_url ne doit pas contenir d\'identifiants'
+        
+        host = parts.hostname.lower().rstrip('.')
+        if self.callback_hosts:
+            allowed = any(
+                host == pattern or (pattern.startswith('*.') and host.endswith(pattern[1:]))
+                for pattern in self.callback_hosts
+            )
+            return None if allowed else f"Hôte de callback non autorisé: {host}"
+        
+        try:
+            addresses = {info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)}
+        except (socket.gaierror, UnicodeError):
+            return f"Hôte de callback introuvable: {host}"
+        for address in addresses:
+            ip = ipaddress.ip_address(address.split('%')[0])
+            if getattr(ip, 'ipv4_mapped', None):
+                ip = ip.ipv4_mapped
+            if not ip.is_global or ip.is_multicast:
+                return f"Adresse de callback interdite: {host}"
+        return None
+    
+    def submit(self, payload, callback_url=None):
+        """Enregistre un job et le confie au pool ; retourne immédiatement son identifiant"""
+        now = time.time()
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': 'pending',
+            'payload': payload,
+            'result': None,
+            'callback_url': callback_url,
+            'created_at': now,
+            'updated_at': now
+        }
+        with self._lock:
+            self._jobs[job['id']] = job
+            self._events[job['id']] = threading.Event()
+            self.stats['submitted'] += 1
+        self._persist(job)
+        self.executor.submit(self._run, job['id'])
+        
+        if self.stats['submitted'] % 100 == 0:
+            self._purge()
+        return job['id']
+    
+    def _run(self, job_id):
+        job = self._jobs[job_id]
+        if not self._claim(job_id):
+            # Réservé par un autre worker : la copie locale resterait « pending » pour toujours,
+            # l'état fait foi dans SQLite
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                event = self._events.pop(job_id, None)
+            if event is not None:
+                event.set()
+            return
+        job['status'] = 'running'
+        job['owner'] = self.owner
+        job['updated_at'] = time.time()
+        
+        try:
+            result = self.handler(**job['payload'])
+            job['status'] = 'done' if result.get('success') else 'failed'
+        except Exception as e:
+            result = {'success': False, 'error': f'Erreur lors du traitement: {str(e)}'}
+            job['status'] = 'failed'
+        
+        job['result'] = result
+        job['updated_at'] = time.time()
+        self.stats['completed' if job['status'] == 'done' else 'failed'] += 1
+        try:
+            self._persist(job)
+        except sqlite3.Error as e:
+            print(f"⚠️ Erreur écriture job {job_id}: {e}")
+        self._events[job_id].set()
+        
+        if job['callback_url']:
+            # Nouvelle vérification à l'envoi (la résolution DNS a pu changer), sans suivre de redirection
+            refusal = self.check_callback_url(job['callback_url'])
+            if refusal:
+                print(f"⚠️ Callback du job {job_id} ignoré: {refusal}")
+                return
+            try:
+                requests.post(job['callback_url'], json=self.to_dict(job), timeout=5, allow_redirects=False)
+            except requests.RequestException as e:
+                print(f"⚠️ Callback du job {job_id} en échec: {e}")
+    
+    def get(self, job_id, wait=0):
+        """Retourne l'état d'un job ; avec wait > 0, attend sa fin (long-polling) au plus wait secondes"""
+        deadline = time.time() + wait
+        event = self._events.get(job_id)
+        if event is not None:
+            event.wait(timeout=wait)
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return self.to_dict(job)
+        
+        # Job d'un autre worker (ou réservé par un autre worker) : interroger SQLite
+        # jusqu'à la fin ou l'expiration du délai
+        job = self._load(job_id)
+        while job is not None and job['status'] in ('pending', 'running') and time.time() < deadline:
+            time.sleep(0.5)
+            job = self._load(job_id)
+        return self.to_dict(job) if job else None
+    
+    def to_dict(self, job):
+        return {
+            'job_id': job['id'],
+            'status': job['status'],
+            'created_at': job['created_at'],
+            'updated_at': job['updated_at'],
+            'result': job['result']
+        }
+    
+    def get_stats(self):
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job['status'] in ('pending', 'running'))
+            return dict(self.stats, active=active, persistent=bool(self.db_path))
+
+class ThemePopularity:
+    """Compteur des thèmes demandés (par longueur, langue, mode et moteur).
+    
+    Les comptes sont agrégés en mémoire puis ajoutés périodiquement à une table SQLite,
+    partagée entre les workers et conservée d'un déploiement à l'autre. Les combinaisons
+    non demandées depuis retention secondes sont oubliées, et la table garde au plus max_rows lignes.
+    """
+    
+    def __init__(self, db_path=None, flush_interval=30.0, retention=30 * 24 * 3600, max_rows=100000):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.retention = retention
+        self.max_rows = max_rows
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_flush = time.time()
+        self.stats = {
+            'recorded': 0,
+            'flushes': 0,
+            'pruned': 0,
+            'errors': 0
+        }
+        
+        if self.db_path:
+            try:
+                conn = self._connect()
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS theme_requests (
+                        theme TEXT NOT NULL,
+                        length_mode TEXT NOT NULL,
+                        language TEXT NOT NULL,
+                        mode TEXT NOT NULL,
+                        engine TEXT NOT NULL,
+                        count INTEGER NOT NULL,
+                        last_seen REAL NOT NULL,
+                        PRIMARY KEY (theme, length_mode, language, mode, engine)
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS theme_requests_last_seen ON theme_requests (last_seen)")
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Statistiques de popularité non persistées ({db_path}): {e}")
+                self.db_path = None
+        atexit.register(self.flush)
+    
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+    
+    def record(self, theme, length_mode, language, mode, engine='mistral'):
+        """Compte une demande (thème normalisé comme dans les clés de cache)"""
+        key = (' '.join(theme.lower().split()), length_mode, language, mode, engine)
+        with self._lock:
+            count, _ = self._pending.get(key, (0, 0))
+            self._pending[key] = (count + 1, time.time())
+            self.stats['recorded'] += 1
+            due = time.time() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+    
+    def flush(self):
+        """Ajoute les comptes en attente à la table SQLite, puis oublie les combinaisons trop anciennes"""
+        if not self.db_path:
+            # Sans base, les comptes restent en mémoire : seules les entrées trop anciennes sont retirées
+            with self._lock:
+                self._last_flush = time.time()
+                expired = [key for key, (_, last_seen) in self._pending.items() if last_seen < time.time() - self.retention]
+                for key in expired:
+                    del self._pending[key]
+                self.stats['pruned'] += len(expired)
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.time()
+        if not pending:
+            return
+        try:
+            conn = self._connect()
+            conn.executemany("""
+                INSERT INTO theme_requests (theme, length_mode, language, mode, engine, count, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (theme, length_mode, language, mode, engine)
+                DO UPDATE SET count = count + excluded.count, last_seen = MAX(last_seen, excluded.last_seen)
+            """, [key + value for key, value in pending.items()])
+            pruned = conn.execute("DELETE FROM theme_requests WHERE last_seen < ?", (time.time() - self.retention,)).rowcount
+            pruned += conn.execute("""
+                DELETE FROM theme_requests WHERE rowid IN (
+                    SELECT rowid FROM theme_requests ORDER BY last_seen DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_rows,)).rowcount
+            conn.commit()
+            self.stats['flushes'] += 1
+            self.stats['pruned'] += pruned
+        except sqlite3.Error as e:
+            print(f"⚠️ Erreur écriture popularité: {e}")
+            self.stats['errors'] += 1
+    
+    def top(self, limit=50, window=7 * 24 * 3600):
+        """Combinaisons les plus demandées sur la fenêtre (en secondes), de la plus à la moins fréquente"""
+        since = time.time() - window if window else 0
+        if self.db_path:
+            # Comptes en attente écrits d'abord : le classement est fait par SQLite
+            self.flush()
+            try:
+                rows = self._connect().execute(
+                    "SELECT theme, length_mode, language, mode, engine, count FROM theme_requests "
+                    "WHERE last_seen >= ? ORDER BY count DESC LIMIT ?",
+                    (since, limit)
+                ).fetchall()
+            except sqlite3.Error as e:
+                print(f"⚠️ Erreur lecture popularité: {e}")
+                self.stats['errors'] += 1
+                rows = []
+            ranked = [(tuple(row[:5]), row[5]) for row in rows]
+        else:
+            with self._lock:
+                counts = {key: count for key, (count, last_seen) in self._pending.items() if last_seen >= since}
+            ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [
+            {'theme': key[0], 'length_mode': key[1], 'language': key[2], 'mode': key[3], 'engine': key[4], 'count': count}
+            for key, count in ranked
+        ]
+    
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, pending=len(self._pending), persistent=bool(self.db_path))
+
+class CacheWarmer:
+    """Préchauffage du cache des résumés (après un déploiement, les caches mémoire sont vides).
+    
+    Les combinaisons déjà en cache (mémoire ou disque) sont sautées sans consommer le budget ;
+    les autres sont calculées avec une concurrence bornée et un débit maximal par minute.
+    """
+    
+    def __init__(self, summarizer, concurrency=2, rate_per_minute=30.0):
+        self.summarizer = summarizer
+        self.concurrency = max(1, concurrency)
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0
+        self._next_slot = 0
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self.stats = {
+            'runs': 0,
+            'warmed': 0,
+            'already_cached': 0,
+            'skipped': 0,
+            'failed': 0
+        }
+    
+    @staticmethod
+    def load_themes(path):
+        """Lit une liste de thèmes (un par ligne, lignes vides et commentaires # ignorés)"""
+        with open(path, encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+    
+    @staticmethod
+    def plan(themes, lengths=('moyen',), languages=('en',), modes=('general',), engines=('mistral',)):
+        """Combinaisons à précalculer pour une liste de thèmes (produit des combinaisons configurées)"""
+        return [
+            {'theme': theme, 'length_mode': length_mode, 'language': language, 'mode': mode, 'engine': engine}
+            for theme in themes
+            for language in languages
+            for length_mode in lengths
+            for mode in modes
+            for engine in engines
+        ]
+    
+    def _wait_for_slot(self):
+        """Espace le démarrage des calculs pour respecter le débit maximal"""
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+    
+    def _warm_one(self, item):
+        params = (item['theme'], item['length_mode'], item['language'], item['mode'], item.get('engine', 'mistral'))
+        cache_key, _ = self.summarizer.resolve_cache_key(*params)
+        if self.summarizer.get_cached_result(cache_key) is not None:
+            return 'already_cached'
+        
+        # LLM en panne : ne pas ajouter de charge, ni mettre en cache des résumés de secours
+        if self.summarizer.circuit_breaker.is_open():
+            return 'skipped'
+        
+        self._wait_for_slot()
+        result = self.summarizer.process_theme(*params, track=False)
+        if not result.get('success') or result.get('stale') or self.summarizer.is_fallback_result(result):
+            return 'failed'
+        return 'warmed'
+    
+    def warm(self, items):
+        """Précalcule les combinaisons données ; retourne un rapport du passage"""
+        start_time = time.time()
+        self._running.set()
+        self.stats['runs'] += 1
+        report = {'planned': len(items), 'warmed': 0, 'already_cached': 0, 'skipped': 0, 'failed': 0}
+        print(f"🔥 PRÉCHAUFFAGE: {len(items)} combinaisons (concurrence {self.concurrency})")
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='warm') as executor:
+                futures = {executor.submit(self._warm_one, item): item for item in items}
+                for future in futures_as_completed(futures):
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        print(f"⚠️ Préchauffage en échec pour '{futures[future]['theme']}': {e}")
+                        outcome = 'failed'
+                    report[outcome] += 1
+                    self.stats[outcome] += 1
+        finally:
+            self._running.clear()
+        
+        report['duration'] = round(time.time() - start_time, 2)
+        print(f"🔥 Préchauffage terminé: {report['warmed']} calculés, {report['already_cached']} déjà en cache, "
+              f"{report['skipped']} reportés, {report['failed']} en échec ({report['duration']}s)")
+        return report
+    
+    def start_background(self, items):
+        """Lance le préchauffage dans un thread démon (le service répond pendant ce temps)"""
+        thread = threading.Thread(target=self.warm, args=(items,), name='cache-warmer', daemon=True)
+        thread.start()
+        return thread
+    
+    def get_stats(self):
+        return dict(self.stats, running=self._running.is_set())
+
+class WikipediaPageError(Exception):
+    """Aucune page Wikipedia ne correspond au titre demandé"""
+    pass
+
+class WikipediaDisambiguationError(Exception):
+    """Le titre demandé correspond à une page d'homonymie"""
+    
+    def __init__(self, title, options):
+        super().__init__(f"'{title}' est une page d'homonymie")
+        self.title = title
+        self.options = options
+
+class WikipediaClient:
+    """Client MediaWiki dédié à une langue (session HTTP et endpoint propres, sans état global)"""
+    
+    USER_AGENT = 'WikipediaSummarizerPro/1.0 (https://github.com/mthisluck-lgtm/wiki-summarizer)'
+    
+    def __init__(self, language, pool_size=10, connect_timeout=3.05, read_timeout=10):
+        self.language = language
+        self.api_url = f"https://{language}.wikipedia.org/w/api.php"
+        self.timeout = (connect_timeout, read_timeout)
+        
+        # Session keep-alive avec un pool de connexions réutilisées entre les requêtes
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': self.USER_AGENT,
+            'Accept-Encoding': 'gzip'
+        })
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=1
+        )
+        self.session.mount('https://', adapter)
+    
+    def _query(self, **params):
+        """Appel GET à l'API MediaWiki (format JSON v2)"""
+        params.update({'action': 'query', 'format': 'json', 'formatversion': 2})
+        response = self.session.get(self.api_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    def search(self, query, results=3):
+        """Retourne les titres des meilleurs résultats de recherche"""
+        data = self._query(list='search', srsearch=query, srlimit=results, srprop='')
+        return [item['title'] for item in data.get('query', {}).get('search', [])]
+    
+    @staticmethod
+    def page_params(title):
+        """Paramètres de la requête page : redirections, URL, homonymie et texte brut en un seul appel"""
+        return {
+            'titles': title,
+            'redirects': 1,
+            'prop': 'info|pageprops|extracts',
+            'inprop': 'url',
+            'ppprop': 'disambiguation',
+            'explaintext': 1,
+            'exsectionformat': 'wiki',
+            'exlimit': 1
+        }
+    
+    @staticmethod
+    def parse_page(data, title):
+        """Extrait la page de la réponse API (WikipediaPageError si elle n'existe pas)"""
+        pages = data.get('query', {}).get('pages', [])
+        if not pages or pages[0].get('missing') or pages[0].get('invalid'):
+            raise WikipediaPageError(f"Page introuvable: '{title}'")
+        return pages[0]
+    
+    @staticmethod
+    def is_disambiguation(page):
+        return 'disambiguation' in page.get('pageprops', {})
+    
+    @staticmethod
+    def links_params(page):
+        return {'pageids': page['pageid'], 'prop': 'links', 'plnamespace': 0, 'pllimit': 'max'}
+    
+    @staticmethod
+    def parse_links(data):
+        link_pages = data.get('query', {}).get('pages', [])
+        return [link['title'] for link in (link_pages[0].get('links', []) if link_pages else [])]
+    
+    @staticmethod
+    def to_article(page):
+        return {
+            'title': page['title'],
+            'content': page.get('extract', ''),
+            'url': page['fullurl'],
+            'revid': page.get('lastrevid')
+        }
+    
+    @staticmethod
+    def revision_params(title):
+        return {'titles': title, 'redirects': 1, 'prop': 'info'}
+    
+    @staticmethod
+    def parse_revision(data):
+        """Identifiant de la dernière révision (None si la page n'existe plus)"""
+        pages = data.get('query', {}).get('pages', [])
+        if not pages or pages[0].get('missing') or pages[0].get('invalid'):
+            return None
+        return pages[0].get('lastrevid')
+    
+    def page(self, title):
+        """Résout un titre et retourne titre, contenu et URL canonique en un seul appel API"""
+        page = self.parse_page(self._query(**self.page_params(title)), title)
+        if self.is_disambiguation(page):
+            options = self.parse_links(self._query(**self.links_params(page)))
+            raise WikipediaDisambiguationError(page['title'], options)
+        return self.to_article(page)
+    
+    def revision(self, title):
+        """Dernière révision d'une page, sans télécharger son texte"""
+        return self.parse_revision(self._query(**self.revision_params(title)))
+
+class AsyncWikipediaClient:
+    """Équivalent asyncio de WikipediaClient (httpx.AsyncClient, à utiliser dans une seule boucle d'événements)"""
+    
+    def __init__(self, language, pool_size=100, connect_timeout=3.05, read_timeout=10):
+        self.language = language
+        self.api_url = f"https://{language}.wikipedia.org/w/api.php"
+        self.client = httpx.AsyncClient(
+            headers={
+                'User-Agent': WikipediaClient.USER_AGENT,
+                'Accept-Encoding': 'gzip'
+            },
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=httpx.AsyncHTTPTransport(retries=1)
+        )
+    
+    async def _query(self, **params):
+        params.update({'action': 'query', 'format': 'json', 'formatversion': 2})
+        response = await self.client.get(self.api_url, params=params)
+        response.raise_for_status()
+        return response.json()
+    
+    async def search(self, query, results=3):
+        data = await self._query(list='search', srsearch=query, srlimit=results, srprop='')
+        return [item['title'] for item in data.get('query', {}).get('search', [])]
+    
+    async def page(self, title):
+        page = WikipediaClient.parse_page(await self._query(**WikipediaClient.page_params(title)), title)
+        if WikipediaClient.is_disambiguation(page):
+            options = WikipediaClient.parse_links(await self._query(**WikipediaClient.links_params(page)))
+            raise WikipediaDisambiguationError(page['title'], options)
+        return WikipediaClient.to_article(page)
+    
+    async def aclose(self):
+        await self.client.aclose()
+
+class RetryPolicy:
+    """Politique de retry : backoff exponentiel avec jitter, Retry-After, délai par tentative et budget global"""
+    
+    RETRYABLE_STATUS = {401, 403, 408, 409, 425, 429}
+    
+    # Seules les erreurs de transport (connexion, délai, flux coupé) sont des erreurs réseau ;
+    # toute autre exception sans code HTTP est un bug local, inutile à retenter
+    NETWORK_ERRORS = (httpx.TransportError, ConnectionError, TimeoutError)
+    
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0, attempt_timeout=20.0, total_budget=30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.total_budget = total_budget
+    
+    @staticmethod
+    def get_status_code(exc):
+        """Code HTTP d'une erreur Mistral (None pour une erreur réseau ou une exception hors SDK)"""
+        if isinstance(exc, HTTPValidationError):
+            # Erreur de validation du SDK : levée sur une réponse 422, sans attribut status_code
+            return 422
+        status = getattr(exc, 'status_code', None)
+        return status if isinstance(status, int) and status > 0 else None
+    
+    @staticmethod
+    def get_retry_after(exc):
+        """Délai Retry-After (en secondes) renvoyé par l'API, s'il existe"""
+        response = getattr(exc, 'raw_response', None)
+        value = response.headers.get('Retry-After') if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    
+    def is_network_error(self, exc):
+        return isinstance(exc, self.NETWORK_ERRORS)
+    
+    def is_retryable(self, exc):
+        """Erreurs réseau, quotas et erreurs serveur méritent une nouvelle tentative ;
+        une requête invalide (4xx) ou un bug local non"""
+        status = self.get_status_code(exc)
+        if status is None:
+            return self.is_network_error(exc)
+        return status in self.RETRYABLE_STATUS or status >= 500
+    
+    def get_delay(self, attempt):
+        """Délai avant la tentative suivante (backoff exponentiel, full jitter)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+class LLMUnavailableError(Exception):
+    """Aucun modèle Mistral n'a répondu : l'appelant doit se rabattre sur un résumé local"""
+    pass
+
+class CircuitOpenError(LLMUnavailableError):
+    """Le disjoncteur Mistral est ouvert : l'appel est refusé immédiatement"""
+    pass
+
+class KeysThrottledError(LLMUnavailableError):
+    """Toutes les clés sont limitées localement (quota ou cooldown) au-delà du budget de la requête.
+    
+    Ce n'est pas une panne de Mistral : ni l'échelle de modèles ni le disjoncteur ne la comptent.
+    """
+    pass
+
+class MistralStream:
+    """Flux de complétion Mistral dont l'issue n'est connue qu'une fois lu.
+    
+    Un flux ouvert peut encore échouer en cours de route : le succès ou l'échec de la
+    tentative est rapporté (report(status, exc)) quand la lecture se termine, échoue
+    ('failure') ou est abandonnée par le client ('abandoned').
+    """
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self._report = None
+    
+    def bind(self, report):
+        self._report = report
+    
+    def _finish(self, status, exc=None):
+        report, self._report = self._report, None
+        if report is not None:
+            report(status, exc)
+    
+    def __iter__(self):
+        completed = False
+        try:
+            for event in self.stream:
+                yield event
+            completed = True
+        except Exception as e:
+            self._finish('failure', e)
+            raise
+        finally:
+            self._finish('success' if completed else 'abandoned')
+
+class CircuitBreaker:
+    """Disjoncteur fermé / ouvert / semi-ouvert autour des appels LLM"""
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0, half_open_max_calls=1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.stats = {
+            'opened': 0,
+            'rejected': 0
+        }
+    
+    def _update_state(self, now):
+        if self.state == self.OPEN and now - self.opened_at >= self.recovery_timeout:
+            self.state = self.HALF_OPEN
+            self.half_open_calls = 0
+    
+    def _open(self, now):
+        self.state = self.OPEN
+        self.opened_at = now
+        self.stats['opened'] += 1
+        print(f"🔌 Disjoncteur Mistral ouvert pour {self.recovery_timeout:.0f}s")
+    
+    def is_open(self):
+        """Vrai si les appels sont actuellement refusés"""
+        with self._lock:
+            self._update_state(time.time())
+            return self.state == self.OPEN
+    
+    def allow(self):
+        """Autorise un appel (en semi-ouvert, seulement quelques appels de test)"""
+        with self._lock:
+            self._update_state(time.time())
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and self.half_open_calls < self.half_open_max_calls:
+                self.half_open_calls += 1
+                return True
+            self.stats['rejected'] += 1
+            return False
+    
+    def release(self):
+        """Rend l'appel de test d'un état semi-ouvert qui n'a finalement pas été tenté"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self.half_open_calls > 0:
+                self.half_open_calls -= 1
+    
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                print("🔌 Disjoncteur Mistral refermé")
+            self.state = self.CLOSED
+            self.failures = 0
+    
+    def record_failure(self):
+        with self._lock:
+            now = time.time()
+            if self.state == self.HALF_OPEN:
+                self._open(now)
+                return
+            self.failures += 1
+            if self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self._open(now)
+    
+    def get_stats(self):
+        with self._lock:
+            self._update_state(time.time())
+            return dict(self.stats, state=self.state, failures=self.failures)
+
+class ModelLadder:
+    """Échelle de modèles (du plus capable au plus rapide) pilotée par la latence et les erreurs observées"""
+    
+    EXTRACTIVE = 'extractive'
+    
+    def __init__(self, models, slow_threshold=12.0, error_threshold=0.5, recovery_time=60.0):
+        self.models = models
+        # Le dernier LLM n'est jamais déclassé (le résumé extractif n'est qu'un secours)
+        self.llm_models = [model for model in models if model != self.EXTRACTIVE]
+        self.slow_threshold = slow_threshold
+        self.error_threshold = error_threshold
+        self.recovery_time = recovery_time
+        self._lock = threading.Lock()
+        self.state = {model: {
+            'latency': None,
+            'error_rate': 0.0,
+            'degraded_until': 0.0,
+            'successes': 0,
+            'failures': 0
+        } for model in self.llm_models}
+    
+    def _degrade(self, model, reason):
+        state = self.state[model]
+        if state['degraded_until'] <= time.time():
+            print(f"📉 Modèle {model} déclassé pour {self.recovery_time:.0f}s ({reason})")
+        state['degraded_until'] = time.time() + self.recovery_time
+    
+    def get_models(self):
+        """Modèles à essayer dans l'ordre, en sautant ceux déclassés (le dernier LLM reste toujours)"""
+        with self._lock:
+            now = time.time()
+            selected = [
+                model for model in self.llm_models
+                if self.state[model]['degraded_until'] <= now or model == self.llm_models[-1]
+            ]
+            if self.EXTRACTIVE in self.models:
+                selected.append(self.EXTRACTIVE)
+            return selected
+    
+    def record_success(self, model, latency):
+        with self._lock:
+            state = self.state[model]
+            state['successes'] += 1
+            state['error_rate'] *= 0.8
+            state['latency'] = latency if state['latency'] is None else state['latency'] * 0.7 + latency * 0.3
+            if state['latency'] > self.slow_threshold and model != self.llm_models[-1]:
+                self._degrade(model, f"latence {state['latency']:.1f}s")
+    
+    def record_failure(self, model, exc):
+        """Déclasse le modèle s'il est surchargé ou si son taux d'erreur devient trop élevé"""
+        with self._lock:
+            state = self.state[model]
+            state['failures'] += 1
+            state['error_rate'] = state['error_rate'] * 0.8 + 0.2
+            status = RetryPolicy.get_status_code(exc)
+            if status in (429, 503) or 'capacity exceeded' in str(exc):
+                self._degrade(model, f"surcharge ({status})")
+            elif state['error_rate'] >= self.error_threshold:
+                self._degrade(model, f"taux d'erreur {state['error_rate']:.0%}")
+    
+    def get_stats(self):
+        with self._lock:
+            now = time.time()
+            return {model: {
+                'latency': round(state['latency'], 2) if state['latency'] is not None else None,
+                'error_rate': round(state['error_rate'], 3),
+                'degraded': state['degraded_until'] > now,
+                'successes': state['successes'],
+                'failures': state['failures']
+            } for model, state in self.state.items()}
+
+class KeyScheduler:
+    """Choisit la clé API la plus saine : quota token bucket, taux d'erreur et cooldown par clé.
+    
+    requests_per_minute=0 désactive le quota local (seuls les 429 de Mistral mettent une clé en pause).
+    """
+    
+    def __init__(self, api_keys, requests_per_minute=0, burst=5, cooldown=5.0, max_cooldown=300.0):
+        self.api_keys = api_keys
+        self.refill_rate = requests_per_minute / 60.0
+        self.burst = burst
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        
+        now = time.time()
+        self.keys = [{
+            'tokens': float(burst),
+            'last_refill': now,
+            'cooldown_until': 0.0,
+            'error_rate': 0.0,
+            'consecutive_failures': 0,
+            'successes': 0,
+            'failures': 0,
+            'rate_limited': 0,
+            'last_used': 0.0,
+            'last_error': None
+        } for _ in api_keys]
+    
+    def _refill(self, state, now):
+        if not self.refill_rate:
+            return
+        elapsed = now - state['last_refill']
+        state['tokens'] = min(self.burst, state['tokens'] + elapsed * self.refill_rate)
+        state['last_refill'] = now
+    
+    def acquire(self):
+        """Réserve une clé ; retourne (index, attente en secondes avant de pouvoir l'utiliser)"""
+        with self._lock:
+            now = time.time()
+            for state in self.keys:
+                self._refill(state, now)
+            
+            available = [
+                i for i, state in enumerate(self.keys)
+                if state['cooldown_until'] <= now and (not self.refill_rate or state['tokens'] >= 1)
+            ]
+            if available:
+                index = min(available, key=lambda i: (
+                    round(self.keys[i]['error_rate'], 2),
+                    -self.keys[i]['tokens'],
+                    self.keys[i]['last_used']
+                ))
+                wait_time = 0.0
+            else:
+                # Toutes les clés sont épuisées : prendre celle qui redevient disponible le plus tôt
+                def ready_at(i):
+                    state = self.keys[i]
+                    refill_wait = max(0.0, 1 - state['tokens']) / self.refill_rate if self.refill_rate else 0.0
+                    return max(state['cooldown_until'], now + refill_wait)
+                index = min(range(len(self.keys)), key=ready_at)
+                wait_time = ready_at(index) - now
+            
+            state = self.keys[index]
+            if self.refill_rate:
+                state['tokens'] -= 1
+            state['last_used'] = now
+            return index, wait_time
+    
+    def release(self, index):
+        """Rend le jeton d'une clé réservée puis abandonnée (attente au-delà du budget de l'appelant)"""
+        with self._lock:
+            if self.refill_rate:
+                state = self.keys[index]
+                state['tokens'] = min(self.burst, state['tokens'] + 1)
+    
+    def report_success(self, index):
+        with self._lock:
+            state = self.keys[index]
+            state['successes'] += 1
+            state['consecutive_failures'] = 0
+            state['error_rate'] *= 0.8
+    
+    def report_failure(self, index, status=None, retry_after=None):
+        """Met à jour la santé de la clé et la met en cooldown si elle est limitée ou invalide"""
+        with self._lock:
+            state = self.keys[index]
+            state['failures'] += 1
+            state['consecutive_failures'] += 1
+            state['error_rate'] = state['error_rate'] * 0.8 + 0.2
+            state['last_error'] = status or 'network'
+            
+            if status == 429:
+                state['rate_limited'] += 1
+                backoff = self.cooldown * (2 ** (state['consecutive_failures'] - 1))
+                delay = retry_after if retry_after is not None else backoff
+            elif status in (401, 403):
+                delay = self.max_cooldown
+            elif state['consecutive_failures'] >= 3:
+                delay = self.cooldown * state['consecutive_failures']
+            else:
+                delay = 0.0
+            
+            if delay:
+                state['cooldown_until'] = max(state['cooldown_until'], time.time() + min(delay, self.max_cooldown))
+                state['tokens'] = min(state['tokens'], 0.0)
+    
+    def get_stats(self):
+        """État de chaque clé (masquée) pour /api/stats"""
+        with self._lock:
+            now = time.time()
+            return [{
+                'key': f"…{key[-4:]}",
+                'tokens': round(state['tokens'], 2),
+                'cooldown_remaining': round(max(0.0, state['cooldown_until'] - now), 1),
+                'error_rate': round(state['error_rate'], 3),
+                'successes': state['successes'],
+                'failures': state['failures'],
+                'rate_limited': state['rate_limited'],
+                'last_error': state['last_error']
+            } for key, state in zip(self.api_keys, self.keys)]
+
+class MistralClientPool:
+    """Clients Mistral partagés par tout le processus : un client (et son pool HTTP) par clé API"""
+    
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+    
+    def get(self, api_key):
+        """Retourne le client associé à la clé, créé une seule fois"""
+        client = self._clients.get(api_key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(api_key)
+                if client is None:
+                    client = Mistral(api_key=api_key)
+                    self._clients[api_key] = client
+        return client
+    
+    def __len__(self):
+        return len(self._clients)
+
+# Pool global des clients Mistral (réutilise connexions et sessions TLS entre les appels)
+mistral_clients = MistralClientPool()
+
+class MetricsRegistry:
+    """Compteurs et histogrammes de latence par étape, exposés au format texte Prometheus.
+    
+    Le registre est propre à chaque processus (un worker gunicorn par scrape).
+    """
+    
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+    
+    HELP = {
+        'wiki_summarizer_stage_seconds': "Durée de chaque étape du traitement d'un thème",
+        'wiki_summarizer_cache_lookups_total': 'Consultations du cache des résumés par niveau',
+        'wiki_summarizer_wikipedia_seconds': "Durée des appels Wikipedia par méthode de recherche",
+        'wiki_summarizer_mistral_seconds': 'Durée des appels Mistral par clé et par modèle',
+        'wiki_summarizer_mistral_requests_total': 'Appels Mistral par clé, modèle et issue',
+        'wiki_summarizer_tokens_total': 'Tokens consommés (prompt et réponse)',
+        'wiki_summarizer_http_request_seconds': 'Durée des requêtes HTTP par route (en-têtes envoyés)',
+        'wiki_summarizer_cache_entries': 'Entrées par cache',
+        'wiki_summarizer_cache_bytes': 'Taille des caches en octets',
+        'wiki_summarizer_circuit_open': 'Disjoncteur Mistral ouvert (1) ou fermé (0)'
+    }
+    
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._gauge_collectors = []
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+    
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+    
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # compteurs par seuil, puis somme et nombre d'observations
+                histogram = self._histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[index] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+    
+    @contextmanager
+    def timer(self, name, **labels):
+        """Mesure la durée d'un bloc ; le dictionnaire d'étiquettes produit peut être complété dans le bloc"""
+        start = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+    
+    def register_gauges(self, collector):
+        """collector() retourne des (nom, étiquettes, valeur) lus au moment du scrape"""
+        self._gauge_collectors.append(collector)
+    
+    @staticmethod
+    def _format_labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (
+            f'{key}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+            for key, value in pairs
+        )
+        return '{' + ','.join(escaped) + '}'
+    
+    def _header(self, lines, name, kind, seen):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {self.HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+    
+    def render(self):
+        """Exposition au format texte Prometheus (version 0.0.4)"""
+        lines = []
+        seen = set()
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(values)) for key, values in self._histograms.items())
+        
+        for (name, labels), value in counters:
+            self._header(lines, name, 'counter', seen)
+            lines.append(f"{name}{self._format_labels(labels)} {value}")
+        
+        for (name, labels), values in histograms:
+            self._header(lines, name, 'histogram', seen)
+            for bound, count in zip(self.buckets, values):
+                lines.append(f"{name}_bucket{self._format_labels(labels, [('le', repr(float(bound)))])} {count}")
+            lines.append(f"{name}_bucket{self._format_labels(labels, [('le', '+Inf')])} {values[-1]}")
+            lines.append(f"{name}_sum{self._format_labels(labels)} {round(values[-2], 6)}")
+            lines.append(f"{name}_count{self._format_labels(labels)} {values[-1]}")
+        
+        gauges = []
+        for collector in self._gauge_collectors:
+            try:
+                gauges.extend(collector())
+            except Exception as e:
+                print(f"⚠️ Erreur collecte des métriques: {e}")
+        
+        # Les échantillons d'une même métrique doivent être contigus
+        for name, labels, value in sorted(gauges, key=lambda sample: sample[0]):
+            self._header(lines, name, 'gauge', seen)
+            lines.append(f"{name}{self._format_labels(self._key(name, labels)[1])} {value}")
+        
+        return '\n'.join(lines) + '\n'
+
+# Registre global des métriques (partagé par les résumés sync/async et les routes)
+metrics = MetricsRegistry()
+
+class TokenCounter:
+    """Estimation locale du nombre de tokens (approximation d'un tokenizer BPE, sans dépendance),
+    recalibrée en continu sur l'usage réel renvoyé par Mistral"""
+    
+    PIECE_RE = re.compile(r'\d+|\w+|[^\w\s]')
+    
+    def __init__(self, chars_per_token=4.0, message_overhead=4):
+        self.chars_per_token = chars_per_token
+        self.message_overhead = message_overhead
+        self.correction = 1.0
+        self.samples = 0
+        self._lock = threading.Lock()
+    
+    def raw_count(self, text):
+        """Estimation brute, sans correction"""
+        count = 0
+        for piece in self.PIECE_RE.findall(text):
+            if piece[0].isdigit():
+                # Les nombres sont découpés chiffre par chiffre
+                count += len(piece)
+            elif len(piece) == 1:
+                count += 1
+            else:
+                # Un caractère accentué (plusieurs octets) pèse plus lourd qu'une lettre ASCII
+                weight = len(piece) + sum(1 for char in piece if ord(char) > 127)
+                count += max(1, math.ceil(weight / self.chars_per_token))
+        return count
+    
+    def raw_count_messages(self, messages):
+        return sum(self.raw_count(message['content']) + self.message_overhead for message in messages)
+    
+    def count(self, text):
+        """Nombre de tokens estimé pour un texte"""
+        return int(round(self.raw_count(text) * self.correction))
+    
+    def count_messages(self, messages):
+        """Nombre de tokens estimé pour une liste de messages de chat"""
+        return int(round(self.raw_count_messages(messages) * self.correction))
+    
+    def calibrate(self, raw_estimate, actual):
+        """Rapproche la correction du rapport réel / estimé observé sur un appel"""
+        if raw_estimate <= 0 or not actual:
+            return
+        ratio = min(max(actual / raw_estimate, 0.5), 2.0)
+        with self._lock:
+            self.correction += 0.1 * (ratio - self.correction)
+            self.samples += 1
+    
+    def get_stats(self):
+        return {
+            'correction': round(self.correction, 3),
+            'samples': self.samples
+        }
+
+class ContentSelector:
+    """Sélection du contenu envoyé au LLM : découpe l'article en sections, les note selon le mode
+    de résumé et garde les meilleures dans un budget, au lieu de tronquer le début de l'article"""
+    
+    # Titres de sections annexes, sans contenu à résumer
+    SKIPPED_SECTIONS = {
+        'references', 'notes', 'see also', 'external links', 'further reading', 'bibliography', 'sources',
+        'références', 'notes et références', 'voir aussi', 'liens externes', 'bibliographie', 'articles connexes',
+        'referencias', 'notas', 'véase también', 'enlaces externos', 'bibliografía'
+    }
+    
+    # Racines de mots (en/fr/es) signalant une section pertinente pour chaque mode
+    MODE_KEYWORDS = {
+        'historique': [
+            'histor', 'histoire', 'guerre', 'war', 'guerra', 'révolution', 'revolution', 'revolución', 'règne',
+            'reign', 'reinado', 'empire', 'imperio', 'siècle', 'century', 'siglo', 'bataille', 'battle', 'batalla',
+            'origine', 'origin', 'origen', 'chronolog', 'cronolog', 'dynast', 'dinast', 'époque', 'period', 'período',
+            'campagne', 'campaign', 'campaña', 'militaire', 'military', 'militar', 'conquête', 'conquest', 'conquista'
+        ],
+        'scientifique': [
+            'scien', 'cienc', 'théor', 'theor', 'teor', 'propriét', 'propert', 'propied', 'structur', 'estructur',
+            'découvert', 'discover', 'descubr', 'recherche', 'research', 'investigac', 'physi', 'físic', 'chimi',
+            'chem', 'quím', 'biolog', 'mathémat', 'mathemat', 'matemát', 'formul', 'fórmul', 'méthod', 'method',
+            'método', 'expérien', 'experiment', 'mécanism', 'mechanism', 'mecanism'
+        ],
+        'biographique': [
+            'biograph', 'biograf', 'vie', 'life', 'vida', 'jeunesse', 'early', 'juventud', 'naissance', 'birth',
+            'nacimiento', 'famille', 'family', 'familia', 'carrière', 'career', 'carrera', 'mort', 'death', 'muerte',
+            'formation', 'education', 'educación', 'personnel', 'personal', 'héritage', 'legacy', 'legado', 'œuvre'
+        ],
+        'scolaire': [
+            'définition', 'definition', 'definición', 'présentation', 'overview', 'introduc', 'généralités',
+            'principe', 'principle', 'principio', 'caractéristique', 'characteristic', 'característica',
+            'exemple', 'example', 'ejemplo', 'fonctionnement', 'description', 'descripción'
+        ],
+        'culture': [
+            'cultur', 'art', 'littérat', 'literat', 'music', 'musique', 'música', 'cinéma', 'film', 'cine',
+            'société', 'society', 'sociedad', 'influence', 'influencia', 'postérité', 'legacy', 'héritage',
+            'legado', 'popular', 'populaire', 'représentation', 'religio', 'tradition', 'tradición'
+        ],
+        'faits': [
+            'données', 'data', 'datos', 'chiffre', 'figure', 'cifra', 'statisti', 'estadíst', 'géograph',
+            'geograph', 'geograf', 'population', 'población', 'économ', 'econom', 'caractéristique',
+            'characteristic', 'característica'
+        ]
+    }
+    
+    # Une racine ne compte qu'en début de mot (« art » ne doit pas correspondre à « départ »)
+    MODE_PATTERNS = {
+        mode: re.compile(r'\b(?:' + '|'.join(sorted(map(re.escape, stems), key=len, reverse=True)) + ')')
+        for mode, stems in MODE_KEYWORDS.items()
+    }
+    
+    # Modes pour lesquels la densité de nombres (dates, chiffres) rend une section plus utile
+    NUMERIC_MODES = {'historique', 'biographique', 'faits'}
+    
+    HEADING_RE = re.compile(r'^(={2,6})\s*(.*?)\s*\1$')
+    
+    def split_sections(self, content):
+        """Découpe un extrait texte (exsectionformat=wiki) en sections, sans les sections annexes.
+        
+        Retourne une liste de dicts heading / level / text ; l'introduction a un titre vide.
+        """
+        sections = [{'heading': '', 'level': 1, 'text': []}]
+        parents = {}
+        skip_level = None
+        for line in content.split('\n'):
+            match = self.HEADING_RE.match(line.strip())
+            if match:
+                level = len(match.group(1))
+                heading = match.group(2)
+                # Les sous-sections d'une section annexe sont ignorées avec elle
+                if skip_level is not None and level > skip_level:
+                    continue
+                skip_level = level if heading.lower() in self.SKIPPED_SECTIONS else None
+                if skip_level is None:
+                    # Une sous-section garde le titre de sa section parente (contexte et mots-clés)
+                    parents[level] = heading
+                    path = [parents[parent] for parent in range(2, level) if parent in parents] + [heading]
+                    for deeper in [lvl for lvl in parents if lvl > level]:
+                        del parents[deeper]
+                    sections.append({'heading': ' / '.join(path), 'level': level, 'text': []})
+                continue
+            if skip_level is None and line.strip():
+                sections[-1]['text'].append(line.strip())
+        
+        for section in sections:
+            section['text'] = '\n'.join(section['text'])
+        return [section for section in sections if section['text']]
+    
+    def score(self, section, position, mode):
+        """Pertinence d'une section pour un mode : mots-clés du titre et du texte, nombres, position"""
+        # Légère préférence pour le début de l'article, seul critère en mode général
+        score = 1.0 / (1 + 0.2 * position)
+        pattern = self.MODE_PATTERNS.get(mode)
+        if not pattern:
+            return score
+        
+        heading = section['heading'].lower()
+        text = section['text'].lower()
+        kilo_chars = max(len(text), 200) / 1000
+        score += 4.0 * len(set(pattern.findall(heading)))
+        score += len(pattern.findall(text)) / kilo_chars * 0.5
+        if mode in self.NUMERIC_MODES:
+            score += len(re.findall(r'\b\d{3,4}\b', text)) / kilo_chars * 0.3
+        return score
+    
+    def trim(self, text, max_chars):
+        """Coupe un texte à max_chars sur une fin de phrase si possible"""
+        if len(text) <= max_chars:
+            return text
+        cut = text[:max_chars]
+        boundary = max(cut.rfind('. '), cut.rfind('.\n'))
+        if boundary > max_chars // 2:
+            return cut[:boundary + 1]
+        return cut.rsplit(' ', 1)[0] + '…'
+    
+    def chunk(self, content, max_chars=6000):
+        """Découpe l'article (sans sections annexes) en morceaux d'au plus max_chars,
+        aux frontières de paragraphes ; le titre de section est répété en tête de morceau"""
+        chunks = []
+        current = []
+        size = 0
+        current_heading = None
+        for section in self.split_sections(content):
+            heading = section['heading']
+            for paragraph in section['text'].split('\n'):
+                paragraph = self.trim(paragraph, max_chars // 2)
+                header = f"== {heading} ==\n" if heading and heading != current_heading else ''
+                if current and size + len(header) + len(paragraph) > max_chars:
+                    chunks.append('\n'.join(current))
+                    current = []
+                    size = 0
+                    header = f"== {heading} ==\n" if heading else ''
+                current.append(header + paragraph)
+                size += len(header) + len(paragraph) + 1
+                current_heading = heading
+        if current:
+            chunks.append('\n'.join(current))
+        return chunks
+    
+    def select(self, content, mode='general', max_chars=6000):
+        """Introduction + meilleures sections pour le mode, dans l'ordre de l'article, au plus max_chars"""
+        sections = self.split_sections(content)
+        if not sections:
+            return ''
+        
+        # Aucune section ne monopolise le budget : on préfère plusieurs angles à un seul long passage
+        lead_budget = max_chars // 3
+        section_budget = max(800, max_chars // 4)
+        
+        chosen = {}
+        remaining = max_chars
+        if sections[0]['heading'] == '':
+            chosen[0] = self.trim(sections[0]['text'], lead_budget)
+            remaining -= len(chosen[0]) + 2
+        
+        ranked = sorted(
+            (index for index in range(len(sections)) if index not in chosen),
+            key=lambda index: self.score(sections[index], index, mode),
+            reverse=True
+        )
+        for index in ranked:
+            section = sections[index]
+            # Titre "== … ==" et séparateur entre sections
+            overhead = len(section['heading']) + 9
+            if remaining - overhead < 200:
+                break
+            chosen[index] = self.trim(section['text'], min(section_budget, remaining - overhead))
+            remaining -= len(chosen[index]) + overhead
+        
+        parts = []
+        for index in sorted(chosen):
+            heading = sections[index]['heading']
+            parts.append(f"== {heading} ==\n{chosen[index]}" if heading else chosen[index])
+        return '\n\n'.join(parts)
+
+class ExtractiveSummarizer:
+    """Résumé extractif local, sans LLM : phrases notées par TextRank sur des vecteurs TF-IDF
+    (similarités calculées avec NumPy), puis retenues sans redondance dans l'ordre de l'article"""
+    
+    STOPWORDS = {
+        'the', 'and', 'for', 'are', 'was', 'were', 'with', 'that', 'this', 'from', 'has', 'have', 'had', 'its',
+        'his', 'her', 'their', 'which', 'who', 'but', 'not', 'also', 'been', 'into', 'than', 'other', 'after',
+        'les', 'des', 'une', 'est', 'dans', 'par', 'pour', 'sur', 'qui', 'que', 'avec', 'son', 'ses', 'sont',
+        'aux', 'plus', 'elle', 'leur', 'leurs', 'mais', 'comme', 'été', 'ont', 'cette', 'entre', 'après',
+        'los', 'las', 'del', 'con', 'por', 'para', 'una', 'que', 'sus', 'como', 'más', 'fue', 'entre', 'sobre'
+    }
+    SENTENCE_RE = re.compile(r'(?<=[.!?])\s+(?=[A-ZÀ-ÖØ-Þ0-9«"(])')
+    WORD_RE = re.compile(r'[^\W\d_]{3,}')
+    
+    def __init__(self, selector, max_sentences=300, damping=0.85, redundancy=0.6):
+        self.selector = selector
+        self.max_sentences = max_sentences
+        self.damping = damping
+        self.redundancy = redundancy
+    
+    def split_sentences(self, content, min_words=4):
+        """Phrases de l'article (hors sections annexes), avec l'indice de leur section"""
+        sentences = []
+        for section_index, section in enumerate(self.selector.split_sections(content)):
+            for paragraph in section['text'].split('\n'):
+                for sentence in self.SENTENCE_RE.split(paragraph):
+                    sentence = sentence.strip()
+                    if sentence and len(sentence.split()) >= min_words:
+                        sentences.append((section_index, sentence))
+                        if len(sentences) >= self.max_sentences:
+                            return sentences
+        return sentences
+    
+    def tfidf(self, texts):
+        """Matrice TF-IDF (tf logarithmique) normalisée L2, une ligne par phrase"""
+        vocabulary = {}
+        rows = []
+        columns = []
+        for row, text in enumerate(texts):
+            for word in self.WORD_RE.findall(text.lower()):
+                if word not in self.STOPWORDS:
+                    rows.append(row)
+                    columns.append(vocabulary.setdefault(word, len(vocabulary)))
+        
+        matrix = np.zeros((len(texts), max(len(vocabulary), 1)), dtype=np.float32)
+        np.add.at(matrix, (rows, columns), 1.0)
+        document_frequency = np.count_nonzero(matrix, axis=0)
+        matrix = np.log1p(matrix) * (np.log((1 + len(texts)) / (1 + document_frequency)) + 1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return matrix / norms
+    
+    def textrank(self, similarity):
+        """PageRank sur le graphe de similarité des phrases (itération de puissance)"""
+        count = len(similarity)
+        weights = similarity.copy()
+        np.fill_diagonal(weights, 0)
+        out_degree = weights.sum(axis=1, keepdims=True)
+        out_degree[out_degree == 0] = 1
+        transition = (weights / out_degree).T
+        
+        scores = np.full(count, 1.0 / count, dtype=np.float32)
+        for _ in range(50):
+            updated = (1 - self.damping) / count + self.damping * (transition @ scores)
+            converged = np.abs(updated - scores).sum() < 1e-6
+            scores = updated
+            if converged:
+                break
+        return scores
+    
+    def summarize(self, content, target_words=250, mode='general'):
+        """Meilleures phrases jusqu'à target_words, regroupées en paragraphes par section"""
+        # Article très court : on garde aussi les fragments (titres de listes, phrases brèves)
+        sentences = self.split_sentences(content) or self.split_sentences(content, min_words=1)
+        if not sentences:
+            return ''
+        
+        texts = [text for _, text in sentences]
+        vectors = self.tfidf(texts)
+        similarity = vectors @ vectors.T
+        scores = self.textrank(similarity)
+        
+        # L'introduction résume souvent l'article ; les mots-clés du mode orientent la sélection
+        sections = np.array([section_index for section_index, _ in sentences])
+        scores = scores * np.where(sections == 0, 1.5, 1.0)
+        pattern = ContentSelector.MODE_PATTERNS.get(mode)
+        if pattern:
+            hits = np.array([min(len(set(pattern.findall(text.lower()))), 3) for text in texts])
+            scores = scores * (1 + 0.3 * hits)
+        
+        chosen = []
+        word_count = 0
+        for index in np.argsort(-scores):
+            # Une phrase trop proche d'une phrase déjà retenue n'apporte rien
+            if chosen and similarity[index, chosen].max() > self.redundancy:
+                continue
+            chosen.append(int(index))
+            word_count += len(texts[index].split())
+            if word_count >= target_words:
+                break
+        
+        paragraphs = []
+        current_section = None
+        for index in sorted(chosen):
+            section_index, text = sentences[index]
+            if section_index != current_section:
+                paragraphs.append([])
+                current_section = section_index
+            paragraphs[-1].append(text)
+        return '\n\n'.join(' '.join(paragraph) for paragraph in paragraphs)
+
 class WikipediaMistralSummarizer:
+    
+    # Moteurs de résumé : LLM Mistral (défaut) ou extractif local, sans appel réseau au LLM
+    ENGINES = ('mistral', 'extractive')
+    
+    # Valeurs reconnues par get_word_count_for_length, get_language_instruction et get_mode_instruction
+    LENGTH_MODES = ('court', 'moyen', 'long')
+    LANGUAGES = ('en', 'fr', 'es')
+    MODES = ('general', 'historique', 'scientifique', 'biographique', 'scolaire', 'culture', 'faits')
+    MAX_TRACKED_THEME_CHARS = 200
+    
     def __init__(self):
         """
         Initialise le résumeur avec clés API depuis variables d'environnement
@@ -22,148 +2119,793 @@ class WikipediaMistralSummarizer:
             os.environ.get('MISTRAL_KEY_3', 'cvkQHVcomFFEW47G044x2p4DTyk5BIc7')
         ]
         
-        self.current_key_index = 0
-        
-        # Cache des résumés (en mémoire)
-        self.cache = {}
+        # Échelle de modèles : grand modèle, puis modèle plus rapide, puis résumé extractif local
+        self.model_ladder = ModelLadder(
+            [model.strip() for model in os.environ.get(
+                'MISTRAL_MODEL_LADDER', 'mistral-large-latest,mistral-small-latest,extractive'
+            ).split(',') if model.strip()],
+            slow_threshold=float(os.environ.get('MISTRAL_SLOW_THRESHOLD', 12.0)),
+            recovery_time=float(os.environ.get('MISTRAL_MODEL_RECOVERY', 60.0))
+        )
+        
+        # Disjoncteur : échec immédiat quand Mistral est en panne
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=int(os.environ.get('MISTRAL_BREAKER_THRESHOLD', 5)),
+            recovery_timeout=float(os.environ.get('MISTRAL_BREAKER_RECOVERY', 30.0))
+        )
+        
+        # Ordonnanceur des clés (quotas, erreurs et cooldowns par clé)
+        self.key_scheduler = KeyScheduler(
+            self.api_keys,
+            requests_per_minute=float(os.environ.get('MISTRAL_KEY_RPM', 0)),
+            burst=float(os.environ.get('MISTRAL_KEY_BURST', 5)),
+            cooldown=float(os.environ.get('MISTRAL_KEY_COOLDOWN', 5.0))
+        )
+        
+        # Politique de retry des appels Mistral
+        self.retry_policy = RetryPolicy(
+            max_attempts=int(os.environ.get('MISTRAL_MAX_ATTEMPTS', len(self.api_keys))),
+            base_delay=float(os.environ.get('MISTRAL_BACKOFF_BASE', 0.5)),
+            max_delay=float(os.environ.get('MISTRAL_BACKOFF_MAX', 8.0)),
+            attempt_timeout=float(os.environ.get('MISTRAL_ATTEMPT_TIMEOUT', 20.0)),
+            total_budget=float(os.environ.get('MISTRAL_RETRY_BUDGET', 30.0))
+        )
+        
+        # Compression des valeurs en cache (zlib, dictionnaire appris sur nos propres résumés) ;
+        # CACHE_COMPRESSION_LEVEL=0 conserve les objets tels quels
+        compression_level = int(os.environ.get('CACHE_COMPRESSION_LEVEL', 6))
+        self.codec = ValueCodec(
+            level=compression_level,
+            dict_size=int(os.environ.get('CACHE_DICT_SIZE', 32 * 1024)),
+            train_samples=int(os.environ.get('CACHE_DICT_TRAIN_SAMPLES', 200))
+        ) if compression_level > 0 else None
+        
+        # Cache des résumés (en mémoire, borné en taille et en durée de vie)
+        self.cache = SummaryCache(
+            max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', 1000)),
+            max_bytes=int(os.environ.get('CACHE_MAX_BYTES', 50 * 1024 * 1024)),
+            ttl=int(os.environ.get('CACHE_TTL', 24 * 3600)),
+            codec=self.codec
+        )
+        
+        # Pool partagé des traitements par lot (borne la concurrence, tous lots confondus)
+        self.batch_executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get('BATCH_CONCURRENCY', 4)),
+            thread_name_prefix='batch'
+        )
+        
+        # File de jobs asynchrones (soumission immédiate, traitement par un pool local), persistée
+        # par défaut à côté du cache disque : un job soumis à un worker gunicorn est visible des autres
+        # (JOBS_DB vide : jobs en mémoire, à réserver à un seul worker)
+        jobs_db_path = os.environ.get(
+            'JOBS_DB',
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs.db')
+        )
+        job_settings = dict(
+            workers=int(os.environ.get('JOB_WORKERS', 2)),
+            ttl=int(os.environ.get('JOB_TTL', 3600)),
+            lease=int(os.environ.get('JOB_LEASE', 600)),
+            callback_hosts=[host.strip() for host in os.environ.get('JOB_CALLBACK_HOSTS', '').split(',') if host.strip()]
+        )
+        try:
+            self.jobs = JobQueue(self.run_job, db_path=jobs_db_path or None, **job_settings)
+        except sqlite3.Error as e:
+            print(f"⚠️ File de jobs non persistée ({jobs_db_path}): {e}")
+            self.jobs = JobQueue(self.run_job, **job_settings)
+        
+        # Déduplication des calculs simultanés sur une même clé de cache
+        self.inflight = SingleFlight()
+        self.async_inflight = AsyncSingleFlight()
+        
+        # Cache des articles Wikipedia (indépendant de la longueur et du mode du résumé)
+        self.article_cache = SummaryCache(
+            max_entries=int(os.environ.get('ARTICLE_CACHE_MAX_ENTRIES', 300)),
+            max_bytes=int(os.environ.get('ARTICLE_CACHE_MAX_BYTES', 20 * 1024 * 1024)),
+            ttl=int(os.environ.get('ARTICLE_CACHE_TTL', 6 * 3600)),
+            codec=self.codec
+        )
+        
+        # Stale-while-revalidate : une entrée expirée depuis moins de STALE_WHILE_REVALIDATE secondes
+        # est servie immédiatement puis rafraîchie en arrière-plan (0 désactive)
+        self.stale_while_revalidate = int(os.environ.get('STALE_WHILE_REVALIDATE', 7 * 24 * 3600))
+        # Rafraîchissement : si la révision Wikipedia n'a pas changé, le résumé est simplement prolongé
+        self.revalidate_by_revision = os.environ.get('REVALIDATE_BY_REVISION', '1') == '1'
+        self.revalidation_executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get('REVALIDATION_CONCURRENCY', 2)),
+            thread_name_prefix='revalidate'
+        )
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+        
+        # Cache persistant partagé entre workers (désactivé si SUMMARY_CACHE_DB est vide)
+        self.disk_cache = None
+        disk_cache_path = os.environ.get(
+            'SUMMARY_CACHE_DB',
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'summary_cache.db')
+        )
+        if disk_cache_path:
+            try:
+                self.disk_cache = DiskSummaryCache(
+                    disk_cache_path,
+                    ttl=int(os.environ.get('DISK_CACHE_TTL', 7 * 24 * 3600)),
+                    max_entries=int(os.environ.get('DISK_CACHE_MAX_ENTRIES', 20000)),
+                    stale_grace=self.stale_while_revalidate,
+                    codec=self.codec
+                )
+                print(f"✅ Cache disque: {disk_cache_path}")
+            except sqlite3.Error as e:
+                print(f"⚠️ Cache disque indisponible ({disk_cache_path}): {e}")
+        
+        # Dictionnaire de compression partagé : celui d'un autre worker est repris au démarrage
+        if self.codec and self.disk_cache:
+            self.codec.loader = self.disk_cache.load_dictionary
+            self.codec.on_train = self.disk_cache.save_dictionary
+            shared_dictionary = self.disk_cache.latest_dictionary()
+            if shared_dictionary:
+                self.codec.activate(shared_dictionary)
+                self.codec.train_samples = 0
+        
+        # Sélection des sections envoyées au LLM et taille maximale d'un article conservé
+        self.content_selector = ContentSelector()
+        self.extractive_engine = ExtractiveSummarizer(
+            self.content_selector,
+            max_sentences=int(os.environ.get('EXTRACTIVE_MAX_SENTENCES', 300))
+        )
+        self.article_max_chars = int(os.environ.get('ARTICLE_MAX_CHARS', 60000))
+        
+        # Budgets en tokens par longueur de résumé : contenu du prompt et réponse (max_tokens)
+        self.token_counter = TokenCounter(chars_per_token=float(os.environ.get('TOKEN_CHARS_PER_TOKEN', 4.0)))
+        self.prompt_token_budgets = self.parse_length_budgets(
+            os.environ.get('PROMPT_TOKEN_BUDGETS', 'court:1000,moyen:1500,long:2500')
+        )
+        self.completion_token_limits = self.parse_length_budgets(
+            os.environ.get('COMPLETION_TOKEN_LIMITS', 'court:400,moyen:600,long:900')
+        )
+        
+        # Résumé hiérarchique (map-reduce) des articles longs : morceaux résumés en parallèle
+        # puis fusionnés ; MAP_REDUCE_MIN_CHARS=0 désactive le mode
+        self.map_reduce_min_chars = int(os.environ.get('MAP_REDUCE_MIN_CHARS', 20000))
+        self.map_reduce_max_chunks = int(os.environ.get('MAP_REDUCE_MAX_CHUNKS', 10))
+        self.chunk_chars = int(os.environ.get('CHUNK_CHARS', 6000))
+        self.chunk_summary_tokens = int(os.environ.get('CHUNK_SUMMARY_TOKENS', 300))
+        self.reduce_token_budget = int(os.environ.get('REDUCE_TOKEN_BUDGET', 3000))
+        self.map_concurrency = int(os.environ.get('MAP_CONCURRENCY', 4))
+        self.map_executor = ThreadPoolExecutor(max_workers=self.map_concurrency, thread_name_prefix='map')
+        
+        # Notes par morceau, indépendantes de la longueur, du mode et de la langue du résumé final
+        self.chunk_cache = SummaryCache(
+            max_entries=int(os.environ.get('CHUNK_CACHE_MAX_ENTRIES', 2000)),
+            max_bytes=int(os.environ.get('CHUNK_CACHE_MAX_BYTES', 10 * 1024 * 1024)),
+            ttl=int(os.environ.get('CHUNK_CACHE_TTL', 24 * 3600)),
+            codec=self.codec
+        )
+        
+        # Index de résolution : variantes d'un thème (casse, accents, redirections, recherche)
+        # vers le titre canonique de l'article, pour partager les entrées du cache de résultats
+        self.resolution_index = SummaryCache(
+            max_entries=int(os.environ.get('RESOLUTION_INDEX_MAX_ENTRIES', 20000)),
+            max_bytes=int(os.environ.get('RESOLUTION_INDEX_MAX_BYTES', 5 * 1024 * 1024)),
+            ttl=int(os.environ.get('RESOLUTION_INDEX_TTL', 7 * 24 * 3600))
+        )
+        
+        # Thèmes les plus demandés (persistés avec le cache disque) et préchauffage du cache
+        self.popularity = ThemePopularity(
+            os.environ.get('THEME_STATS_DB', disk_cache_path) or None,
+            flush_interval=float(os.environ.get('THEME_STATS_FLUSH_INTERVAL', 30)),
+            retention=float(os.environ.get('THEME_STATS_RETENTION', 30 * 24 * 3600)),
+            max_rows=int(os.environ.get('THEME_STATS_MAX_ROWS', 100000))
+        )
+        self.warmer = CacheWarmer(
+            self,
+            concurrency=int(os.environ.get('WARM_CONCURRENCY', 2)),
+            rate_per_minute=float(os.environ.get('WARM_RATE_PER_MINUTE', 30))
+        )
         
         # Statistiques
         self.stats = {
             'requests': 0,
             'cache_hits': 0,
             'wikipedia_success': 0,
-            'mistral_only': 0
-        }
-        
-        # Configuration Wikipedia par défaut
-        self.current_language = 'en'
-        self.setup_wikipedia_language('en')
+            'mistral_only': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'map_reduce': 0,
+            'chunk_cache_hits': 0,
+            'resolution_hits': 0,
+            'stale_served': 0,
+            'revalidations': 0,
+            'revalidated_unchanged': 0,
+            'revalidation_errors': 0
+        }
+        
+        # Clients Wikipedia par langue (créés à la demande, réutilisés ensuite)
+        self.wikipedia_clients = {}
+        self._wikipedia_clients_lock = threading.Lock()
+        
+        # Pool de threads pour résoudre les candidats Wikipedia en parallèle
+        self.wikipedia_executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get('WIKIPEDIA_SEARCH_WORKERS', 8)),
+            thread_name_prefix='wikipedia'
+        )
+        
+        # Clients Wikipedia asyncio (chemin ASGI), liés à la boucle d'événements du serveur
+        self.async_wikipedia_clients = {}
+    
+    @staticmethod
+    def parse_length_budgets(spec):
+        """Lit une configuration "court:1000,moyen:1500,long:2500" """
+        budgets = {}
+        for item in spec.split(','):
+            length_mode, _, value = item.partition(':')
+            if value.strip():
+                budgets[length_mode.strip()] = int(value)
+        return budgets
+    
+    def get_length_budget(self, budgets, length_mode):
+        return budgets.get(length_mode) or budgets.get('moyen') or max(budgets.values())
     
     def setup_wikipedia_language(self, lang_code):
-        """Configure Wikipedia pour une langue donnée"""
+        """Retourne le client Wikipedia d'une langue, créé au premier appel"""
+        with metrics.timer('wiki_summarizer_stage_seconds', stage='language_setup'):
+            client = self.wikipedia_clients.get(lang_code)
+            if client is None:
+                with self._wikipedia_clients_lock:
+                    client = self.wikipedia_clients.get(lang_code)
+                    if client is None:
+                        client = WikipediaClient(
+                            lang_code,
+                            pool_size=int(os.environ.get('WIKIPEDIA_POOL_SIZE', 10)),
+                            connect_timeout=float(os.environ.get('WIKIPEDIA_CONNECT_TIMEOUT', 3.05)),
+                            read_timeout=float(os.environ.get('WIKIPEDIA_READ_TIMEOUT', 10))
+                        )
+                        self.wikipedia_clients[lang_code] = client
+                        print(f"✅ Client Wikipedia créé pour: {lang_code}")
+            return client
+    
+    def setup_wikipedia_language_async(self, lang_code):
+        """Retourne le client Wikipedia asyncio d'une langue, créé au premier appel"""
+        with metrics.timer('wiki_summarizer_stage_seconds', stage='language_setup'):
+            client = self.async_wikipedia_clients.get(lang_code)
+            if client is None:
+                client = AsyncWikipediaClient(
+                    lang_code,
+                    pool_size=int(os.environ.get('WIKIPEDIA_ASYNC_POOL_SIZE', 100)),
+                    connect_timeout=float(os.environ.get('WIKIPEDIA_CONNECT_TIMEOUT', 3.05)),
+                    read_timeout=float(os.environ.get('WIKIPEDIA_READ_TIMEOUT', 10))
+                )
+                self.async_wikipedia_clients[lang_code] = client
+                print(f"✅ Client Wikipedia asyncio créé pour: {lang_code}")
+            return client
+    
+    async def close_async(self):
+        """Ferme les clients asyncio (arrêt du serveur ASGI)"""
+        for client in self.async_wikipedia_clients.values():
+            await client.aclose()
+        self.async_wikipedia_clients.clear()
+    
+    def retry_with_different_keys(self, func, *args, **kwargs):
+        """Appelle Mistral via l'échelle de modèles, avec rotation des clés et politique de retry.
+        
+        func reçoit le client (client=...), le modèle (model=...) et le délai de la tentative en ms (timeout_ms=...).
+        """
+        if not self.circuit_breaker.allow():
+            raise CircuitOpenError("Service Mistral indisponible (disjoncteur ouvert)")
+        
+        deadline = time.time() + self.retry_policy.total_budget
+        try:
+            result = self.retry_with_alternative_model(func, self.model_ladder.get_models(), deadline, *args, **kwargs)
+        except KeysThrottledError:
+            # Limitation locale : Mistral n'a pas été sollicité, rien à compter
+            self.circuit_breaker.release()
+            raise
+        except Exception as e:
+            self._record_breaker_failure(e)
+            raise
+        if not isinstance(result, MistralStream):
+            self.circuit_breaker.record_success()
+        return result
+    
+    async def retry_with_different_keys_async(self, func, *args, **kwargs):
+        """Version asyncio de retry_with_different_keys (func est une coroutine)"""
+        if not self.circuit_breaker.allow():
+            raise CircuitOpenError("Service Mistral indisponible (disjoncteur ouvert)")
+        
+        deadline = time.time() + self.retry_policy.total_budget
         try:
-            wikipedia.set_lang(lang_code)
-            wikipedia.set_rate_limiting(True)
-            self.current_language = lang_code
-            print(f"✅ Wikipedia configuré pour: {lang_code}")
+            result = await self.retry_with_alternative_model_async(func, self.model_ladder.get_models(), deadline, *args, **kwargs)
+        except KeysThrottledError:
+            # Limitation locale : Mistral n'a pas été sollicité, rien à compter
+            self.circuit_breaker.release()
+            raise
         except Exception as e:
-            print(f"⚠️ Erreur config Wikipedia ({lang_code}): {e}")
-            # Fallback vers l'anglais
+            self._record_breaker_failure(e)
+            raise
+        if not isinstance(result, MistralStream):
+            self.circuit_breaker.record_success()
+        return result
+    
+    def _record_breaker_failure(self, exc):
+        """Une requête invalide (4xx non retryable) prouve que le service répond : pas une panne.
+        Un bug local ne dit rien de Mistral : l'éventuel appel de test est simplement rendu."""
+        cause = getattr(exc, '__cause__', None) or exc
+        if self.retry_policy.is_retryable(cause):
+            self.circuit_breaker.record_failure()
+        elif self.retry_policy.get_status_code(cause) is not None:
+            self.circuit_breaker.record_success()
+        else:
+            self.circuit_breaker.release()
+    
+    def retry_with_alternative_model(self, func, models, deadline, *args, **kwargs):
+        """Descend l'échelle de modèles (ex. large → small → extractif) jusqu'à obtenir une réponse"""
+        llm_models = [model for model in models if model != ModelLadder.EXTRACTIVE]
+        last_exception = None
+        
+        for position, model in enumerate(llm_models):
+            model_deadline = self._model_deadline(position, len(llm_models), deadline, model)
+            if model_deadline is None:
+                break
+            
             try:
-                wikipedia.set_lang('en')
-                self.current_language = 'en'
-            except:
-                pass
+                return self._retry_with_keys(func, model, model_deadline, *args, **kwargs)
+            except KeysThrottledError:
+                # Les clés sont communes à tous les modèles : inutile de descendre l'échelle
+                if last_exception is not None:
+                    break
+                raise
+            except Exception as e:
+                last_exception = e
+                if not self.retry_policy.is_retryable(e):
+                    # Requête invalide ou bug local : le modèle n'y est pour rien
+                    break
+                self.model_ladder.record_failure(model, e)
+        
+        raise self._ladder_exhausted(models, last_exception) from last_exception
     
-    def get_mistral_client(self):
-        """Obtient un client Mistral avec rotation des clés"""
-        key = self.api_keys[self.current_key_index % len(self.api_keys)]
-        self.current_key_index += 1
-        return Mistral(api_key=key)
+    async def retry_with_alternative_model_async(self, func, models, deadline, *args, **kwargs):
+        """Version asyncio de retry_with_alternative_model"""
+        llm_models = [model for model in models if model != ModelLadder.EXTRACTIVE]
+        last_exception = None
+        
+        for position, model in enumerate(llm_models):
+            model_deadline = self._model_deadline(position, len(llm_models), deadline, model)
+            if model_deadline is None:
+                break
+            
+            try:
+                return await self._retry_with_keys_async(func, model, model_deadline, *args, **kwargs)
+            except KeysThrottledError:
+                # Les clés sont communes à tous les modèles : inutile de descendre l'échelle
+                if last_exception is not None:
+                    break
+                raise
+            except Exception as e:
+                last_exception = e
+                if not self.retry_policy.is_retryable(e):
+                    # Requête invalide ou bug local : le modèle n'y est pour rien
+                    break
+                self.model_ladder.record_failure(model, e)
+        
+        raise self._ladder_exhausted(models, last_exception) from last_exception
     
-    def retry_with_different_keys(self, func, *args, **kwargs):
-        """Retry une fonction avec toutes les clés API disponibles"""
+    def _model_deadline(self, position, count, deadline, model):
+        """Échéance d'un échelon : un modèle ne consomme pas tout le budget s'il reste des modèles derrière lui"""
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+        if position > 0:
+            print(f"⚠️ Tentative avec modèle alternatif: {model}")
+        is_last = position == count - 1
+        return time.time() + remaining * (1.0 if is_last else 0.6)
+    
+    def _ladder_exhausted(self, models, last_exception):
+        """Erreur à lever quand tous les modèles LLM ont échoué"""
+        if ModelLadder.EXTRACTIVE in models:
+            return LLMUnavailableError(f"Aucun modèle Mistral disponible. Dernière erreur: {str(last_exception)}")
+        return Exception(f"Toutes les clés API ont échoué. Service temporairement indisponible. Dernière erreur: {str(last_exception)}")
+    
+    def _retry_with_keys(self, func, model, deadline, *args, **kwargs):
+        """Essaie un modèle donné en changeant de clé API entre les tentatives"""
         last_exception = None
         
-        for attempt in range(len(self.api_keys)):
+        for attempt in range(self.retry_policy.max_attempts):
+            acquired = self._acquire_key(deadline)
+            if acquired is None:
+                break
+            key_index, wait_time = acquired
+            if wait_time > 0:
+                time.sleep(wait_time)
+            
             try:
-                print(f"Tentative {attempt + 1} avec clé API")
-                result = func(*args, **kwargs)
+                print(f"Tentative {attempt + 1} avec clé API {key_index + 1} ({model})")
+                start_time = time.time()
+                result = func(*args, **self._attempt_kwargs(key_index, model, deadline), **kwargs)
+                self._report_attempt_result(result, key_index, model, start_time)
                 return result
             except Exception as e:
-                print(f"Erreur avec clé {attempt + 1}: {str(e)}")
                 last_exception = e
-                self.current_key_index += 1
-                # Attendre entre les tentatives pour éviter rate limiting
-                if attempt < len(self.api_keys) - 1:
-                    time.sleep(2)
-                continue
-        
-        # Si toutes les clés ont échoué, utiliser un modèle moins cher
-        print("⚠️ Tentative avec modèle alternatif...")
-        try:
-            return self.retry_with_alternative_model(func, *args, **kwargs)
-        except:
-            raise Exception(f"Toutes les clés API ont échoué. Service temporairement indisponible. Dernière erreur: {str(last_exception)}")
+                delay = self._report_attempt_failure(key_index, attempt, e, deadline, model, start_time)
+                if delay is None:
+                    break
+                time.sleep(delay)
+        
+        if last_exception is None:
+            raise KeysThrottledError(f"Toutes les clés sont limitées, budget de la requête épuisé ({model})")
+        raise last_exception
     
-    def retry_with_alternative_model(self, func, *args, **kwargs):
-        """Retry avec un modèle Mistral moins cher"""
-        for attempt in range(len(self.api_keys)):
+    async def _retry_with_keys_async(self, func, model, deadline, *args, **kwargs):
+        """Version asyncio de _retry_with_keys : les attentes ne bloquent pas la boucle d'événements"""
+        last_exception = None
+        
+        for attempt in range(self.retry_policy.max_attempts):
+            acquired = self._acquire_key(deadline)
+            if acquired is None:
+                break
+            key_index, wait_time = acquired
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+            
             try:
-                # Utiliser mistral-small au lieu de mistral-large
-                if hasattr(self, '_use_small_model'):
-                    result = func(*args, **kwargs)
-                    return result
-            except:
-                self.current_key_index += 1
-                continue
-        raise Exception("Tous les modèles ont échoué")
+                print(f"Tentative {attempt + 1} avec clé API {key_index + 1} ({model})")
+                start_time = time.time()
+                result = await func(*args, **self._attempt_kwargs(key_index, model, deadline), **kwargs)
+                self._report_attempt_result(result, key_index, model, start_time)
+                return result
+            except Exception as e:
+                last_exception = e
+                delay = self._report_attempt_failure(key_index, attempt, e, deadline, model, start_time)
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+        
+        if last_exception is None:
+            raise KeysThrottledError(f"Toutes les clés sont limitées, budget de la requête épuisé ({model})")
+        raise last_exception
     
-    def get_cache_key(self, theme, length_mode, language, mode):
-        """Génère une clé de cache unique incluant la langue et le mode"""
-        return hashlib.md5(f"{theme.lower().strip()}_{length_mode}_{language}_{mode}".encode()).hexdigest()
+    def _acquire_key(self, deadline):
+        """Clé la plus saine et attente nécessaire ; None si toutes les clés sont en cooldown au-delà du budget"""
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+        key_index, wait_time = self.key_scheduler.acquire()
+        if wait_time >= remaining:
+            print(f"⏱️ Toutes les clés sont limitées (disponibles dans {wait_time:.1f}s)")
+            self.key_scheduler.release(key_index)
+            return None
+        return key_index, wait_time
     
-    def smart_wikipedia_search(self, theme):
-        """Recherche intelligente sur Wikipedia"""
-        print(f"🔍 Recherche Wikipedia pour: '{theme}' (langue: {self.current_language})")
+    def _attempt_kwargs(self, key_index, model, deadline):
+        """Arguments passés à func pour une tentative : client de la clé, modèle et délai restant"""
+        remaining = max(deadline - time.time(), 0.001)
+        return {
+            'client': mistral_clients.get(self.api_keys[key_index]),
+            'model': model,
+            'timeout_ms': int(min(self.retry_policy.attempt_timeout, remaining) * 1000)
+        }
+    
+    def _report_attempt_result(self, result, key_index, model, start_time):
+        """Un flux n'est jugé qu'une fois lu ; toute autre réponse compte tout de suite comme un succès"""
+        if isinstance(result, MistralStream):
+            result.bind(lambda status, exc: self._report_stream_outcome(key_index, model, start_time, status, exc))
+        else:
+            self._report_attempt_success(key_index, model, start_time)
+    
+    def _report_stream_outcome(self, key_index, model, start_time, status, exc=None):
+        """Issue d'un flux Mistral : clé, échelle de modèles et disjoncteur mis à jour à la fin de la lecture"""
+        if status == 'success':
+            self._report_attempt_success(key_index, model, start_time)
+            self.circuit_breaker.record_success()
+        elif status == 'failure':
+            print(f"❌ Flux Mistral interrompu ({model}): {str(exc)}")
+            self._report_attempt_failure(key_index, 0, exc, time.time(), model, start_time)
+            if self.retry_policy.is_retryable(exc):
+                self.model_ladder.record_failure(model, exc)
+            self._record_breaker_failure(exc)
+        else:
+            # Client parti avant la fin : ni succès ni panne, l'éventuel appel de test est rendu
+            self.circuit_breaker.release()
+    
+    def _report_attempt_success(self, key_index, model, start_time):
+        elapsed = time.time() - start_time
+        self.key_scheduler.report_success(key_index)
+        self.model_ladder.record_success(model, elapsed)
+        self._record_attempt_metrics(key_index, model, elapsed, 'success')
+    
+    def _record_attempt_metrics(self, key_index, model, elapsed, outcome):
+        metrics.observe('wiki_summarizer_mistral_seconds', elapsed, key=key_index + 1, model=model, outcome=outcome)
+        metrics.inc('wiki_summarizer_mistral_requests_total', key=key_index + 1, model=model, outcome=outcome)
+    
+    def _report_attempt_failure(self, key_index, attempt, exc, deadline, model=None, start_time=None):
+        """Met à jour la santé de la clé ; retourne le backoff avant la tentative suivante, ou None pour abandonner"""
+        policy = self.retry_policy
+        print(f"Erreur avec clé {key_index + 1}: {str(exc)}")
+        if model is not None:
+            status = policy.get_status_code(exc)
+            self._record_attempt_metrics(key_index, model, time.time() - start_time, f"http_{status}" if status else 'error')
+        
+        # Saturation du modèle (et non quota de la clé) : inutile d'essayer les autres clés
+        model_overloaded = 'capacity exceeded' in str(exc)
+        if model_overloaded or policy.is_retryable(exc):
+            # Une requête invalide ou un bug local ne dit rien de la santé de la clé
+            self.key_scheduler.report_failure(
+                key_index,
+                status=None if model_overloaded else policy.get_status_code(exc),
+                retry_after=policy.get_retry_after(exc)
+            )
+        if model_overloaded or not policy.is_retryable(exc) or attempt == policy.max_attempts - 1:
+            return None
+        
+        # Petit backoff avec jitter avant de passer à la clé suivante
+        delay = policy.get_delay(attempt)
+        if time.time() + delay >= deadline:
+            return None
+        return delay
+    
+    def get_cache_key(self, theme, length_mode, language, mode, engine='mistral'):
+        """Génère une clé de cache unique incluant la langue, le mode et le moteur"""
+        # Moteur par défaut absent de la clé : les entrées déjà en cache restent valides
+        suffix = f"_{engine}" if engine != 'mistral' else ''
+        return hashlib.md5(f"{' '.join(theme.lower().split())}_{length_mode}_{language}_{mode}{suffix}".encode()).hexdigest()
+    
+    def get_wikipedia_language(self, language):
+        """Langue Wikipedia à interroger (le client est choisi par appel, sans état global)"""
+        return {'en': 'en', 'fr': 'fr', 'es': 'es'}.get(language, 'en')
+    
+    # Seuls les guillemets, apostrophes, tirets et soulignés sont assimilés à des espaces :
+    # « C », « C++ » et « C# », ou « .NET » et « NET », désignent des articles distincts
+    THEME_SEPARATORS_RE = re.compile(r"[\"'`´‘’‚“”„«»‹›_\-‐‑‒–—]+")
+    
+    @staticmethod
+    def normalize_theme(theme, fold_accents=False):
+        """Forme normalisée d'un thème : casse, espaces, guillemets et tirets ; accents retirés si fold_accents"""
+        text = unicodedata.normalize('NFC', theme).casefold()
+        if fold_accents:
+            text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+        return ' '.join(WikipediaMistralSummarizer.THEME_SEPARATORS_RE.sub(' ', text).split())
+    
+    def resolve_theme(self, theme, lang_code):
+        """Titre canonique déjà associé à ce thème, ou None.
         
+        La forme exacte prime ; la forme sans accents n'est utilisée que si elle ne désigne qu'un article
+        (« pâte » et « pâté » ne doivent pas partager un résumé).
+        """
+        title = self.get_tiered(self.resolution_index, f"theme:{lang_code}:{self.normalize_theme(theme)}")
+        if not title:
+            title = self.get_tiered(self.resolution_index, f"theme~:{lang_code}:{self.normalize_theme(theme, fold_accents=True)}")
+        return title or None
+    
+    def record_resolution(self, theme, lang_code, title):
+        """Associe le thème demandé et le titre résolu (redirection, homonymie, suggestion) à l'article"""
+        ttl = self.resolution_index.ttl
+        for variant in {theme, title}:
+            self.set_tiered(self.resolution_index, f"theme:{lang_code}:{self.normalize_theme(variant)}", title, ttl=ttl)
+            
+            # Forme sans accents : marquée ambiguë ('') si elle mène déjà à un autre article
+            folded_key = f"theme~:{lang_code}:{self.normalize_theme(variant, fold_accents=True)}"
+            known = self.get_tiered(self.resolution_index, folded_key)
+            if known is None or known == title:
+                self.set_tiered(self.resolution_index, folded_key, title, ttl=ttl)
+            elif known:
+                self.set_tiered(self.resolution_index, folded_key, '', ttl=ttl)
+    
+    def resolve_cache_key(self, theme, length_mode, language, mode, engine='mistral'):
+        """Clé de cache d'une requête : celle de l'article canonique si le thème est déjà résolu"""
+        title = self.resolve_theme(theme, self.get_wikipedia_language(language))
+        return self.get_cache_key(title or theme, length_mode, language, mode, engine), title
+    
+    def get_tiered(self, memory_cache, key):
+        """Lit une valeur en mémoire puis dans le cache disque (promue en mémoire si trouvée)"""
+        value = memory_cache.get(key)
+        if value is None and self.disk_cache:
+            value = self.disk_cache.get(key)
+            if value is not None:
+                memory_cache.set(key, value)
+        return value
+    
+    def set_tiered(self, memory_cache, key, value, ttl=None):
+        """Écrit une valeur en mémoire et dans le cache disque partagé entre workers"""
+        memory_cache.set(key, value, ttl=ttl)
+        if self.disk_cache:
+            self.disk_cache.set(key, value, ttl=ttl)
+    
+    def smart_wikipedia_search(self, theme, language='en'):
+        """Recherche intelligente sur Wikipedia : recherche directe, désambiguïsation et
+        suggestions résolues en parallèle, le premier résultat valide l'emporte"""
+        print(f"🔍 Recherche Wikipedia pour: '{theme}' (langue: {language})")
+        
+        client = self.setup_wikipedia_language(language)
         theme_clean = theme.strip()
         
-        try:
-            print("Tentative de recherche directe...")
-            page = wikipedia.page(theme_clean, auto_suggest=False)
-            print(f"✅ Trouvé directement: {page.title}")
-            return {
-                'title': page.title,
-                'content': page.content[:8000],  # Limiter pour Render
-                'url': page.url,
-                'method': 'direct'
-            }
-        except wikipedia.exceptions.DisambiguationError as e:
-            try:
-                page = wikipedia.page(e.options[0])
-                print(f"✅ Trouvé via désambiguïsation: {page.title}")
-                return {
-                    'title': page.title,
-                    'content': page.content[:8000],
-                    'url': page.url,
-                    'method': 'disambiguation'
-                }
-            except:
-                pass
-        except:
-            pass
+        cancelled = threading.Event()
+        futures = {}
         
-        try:
-            print("Recherche avec suggestions...")
-            suggestions = wikipedia.search(theme_clean, results=3)
-            print(f"Suggestions trouvées: {suggestions}")
+        def submit(priority, method, func, *args):
+            def run():
+                # Inutile de lancer l'appel si un autre candidat a déjà gagné
+                if cancelled.is_set():
+                    return None
+                with metrics.timer('wiki_summarizer_wikipedia_seconds', method=method.split(' ')[0], outcome='error') as labels:
+                    try:
+                        value = func(*args)
+                    except WikipediaDisambiguationError:
+                        labels['outcome'] = 'disambiguation'
+                        raise
+                    except WikipediaPageError:
+                        labels['outcome'] = 'missing'
+                        raise
+                    labels['outcome'] = 'found'
+                    return value
+            future = self.wikipedia_executor.submit(run)
+            futures[future] = (priority, method)
+            return future
+        
+        pending = {
+            submit(0, 'direct', client.page, theme_clean),
+            submit(1, 'search', client.search, theme_clean, 3)
+        }
+        
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
             
-            if suggestions:
-                for suggestion in suggestions:
+            # À arrivée simultanée, la recherche directe prime sur les suggestions
+            for future in sorted(done, key=lambda f: futures[f][0]):
+                priority, method = futures[future]
+                try:
+                    value = future.result()
+                except WikipediaDisambiguationError as e:
+                    if method == 'direct' and e.options:
+                        pending.add(submit(1, 'disambiguation', client.page, e.options[0]))
+                    continue
+                except Exception:
+                    continue
+                
+                if value is None:
+                    continue
+                
+                if method == 'search':
+                    print(f"Suggestions trouvées: {value}")
+                    for rank, suggestion in enumerate(value):
+                        if suggestion != theme_clean:
+                            pending.add(submit(2 + rank, f'suggestion ({suggestion})', client.page, suggestion))
+                    continue
+                
+                cancelled.set()
+                for other in pending:
+                    other.cancel()
+                
+                return self.found_article(value, method)
+        
+        print(f"❌ Aucune page Wikipedia trouvée pour: '{theme}'")
+        return None
+    
+    async def smart_wikipedia_search_async(self, theme, language='en'):
+        """Version asyncio de smart_wikipedia_search : les candidats sont des tâches concurrentes,
+        annulées dès qu'un résultat valide l'emporte"""
+        print(f"🔍 Recherche Wikipedia (async) pour: '{theme}' (langue: {language})")
+        
+        client = self.setup_wikipedia_language_async(language)
+        theme_clean = theme.strip()
+        tasks = {}
+        
+        async def timed(method, coroutine):
+            with metrics.timer('wiki_summarizer_wikipedia_seconds', method=method.split(' ')[0], outcome='error') as labels:
+                try:
+                    value = await coroutine
+                except asyncio.CancelledError:
+                    labels['outcome'] = 'cancelled'
+                    raise
+                except WikipediaDisambiguationError:
+                    labels['outcome'] = 'disambiguation'
+                    raise
+                except WikipediaPageError:
+                    labels['outcome'] = 'missing'
+                    raise
+                labels['outcome'] = 'found'
+                return value
+        
+        def submit(priority, method, coroutine):
+            task = asyncio.ensure_future(timed(method, coroutine))
+            tasks[task] = (priority, method)
+            return task
+        
+        pending = {
+            submit(0, 'direct', client.page(theme_clean)),
+            submit(1, 'search', client.search(theme_clean, 3))
+        }
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in sorted(done, key=lambda t: tasks[t][0]):
+                    priority, method = tasks[task]
                     try:
-                        page = wikipedia.page(suggestion)
-                        print(f"✅ Trouvé via suggestion: {page.title}")
-                        return {
-                            'title': page.title,
-                            'content': page.content[:8000],
-                            'url': page.url,
-                            'method': f'suggestion ({suggestion})'
-                        }
-                    except:
+                        value = task.result()
+                    except WikipediaDisambiguationError as e:
+                        if method == 'direct' and e.options:
+                            pending.add(submit(1, 'disambiguation', client.page(e.options[0])))
                         continue
-        except:
-            pass
+                    except Exception:
+                        continue
+                    
+                    if method == 'search':
+                        print(f"Suggestions trouvées: {value}")
+                        for rank, suggestion in enumerate(value):
+                            if suggestion != theme_clean:
+                                pending.add(submit(2 + rank, f'suggestion ({suggestion})', client.page(suggestion)))
+                        continue
+                    
+                    return self.found_article(value, method)
+        finally:
+            for task in pending:
+                task.cancel()
         
         print(f"❌ Aucune page Wikipedia trouvée pour: '{theme}'")
         return None
     
+    def found_article(self, page, method):
+        """Article retenu par la recherche, avec la méthode qui l'a trouvé"""
+        print(f"✅ Trouvé ({method}): {page['title']}")
+        return {
+            'title': page['title'],
+            'content': page['content'][:self.article_max_chars],
+            'url': page['url'],
+            'revid': page.get('revid'),
+            'method': method
+        }
+    
+    def get_article_cache_key(self, title, language):
+        """Clé du cache d'articles : langue + titre normalisé"""
+        return f"{language}:{' '.join(title.lower().split())}"
+    
+    def fetch_wikipedia_article(self, theme, language):
+        """Récupère l'article Wikipedia via le cache d'articles ou une recherche"""
+        article_key = self.get_article_cache_key(theme, language)
+        article = self.article_cache.get(article_key)
+        if article is not None:
+            print(f"📚 Article trouvé en cache: {article['title']}")
+            return article
+        
+        article = self.smart_wikipedia_search(theme, language)
+        if article:
+            self.cache_article(article_key, article, language)
+        
+        return article
+    
+    async def fetch_wikipedia_article_async(self, theme, language):
+        """Version asyncio de fetch_wikipedia_article"""
+        article_key = self.get_article_cache_key(theme, language)
+        article = self.article_cache.get(article_key)
+        if article is not None:
+            print(f"📚 Article trouvé en cache: {article['title']}")
+            return article
+        
+        article = await self.smart_wikipedia_search_async(theme, language)
+        if article:
+            self.cache_article(article_key, article, language)
+        
+        return article
+    
+    def cache_article(self, article_key, article, language):
+        """Met l'article en cache sous le thème demandé et sous son titre résolu"""
+        self.article_cache.set(article_key, article)
+        title_key = self.get_article_cache_key(article['title'], language)
+        if title_key != article_key:
+            self.article_cache.set(title_key, article)
+    
+    def extractive_summary(self, content, length_mode='moyen', mode='general'):
+        """Résumé sans LLM (moteur extractif local) à la longueur visée"""
+        target_words = {'court': 150, 'moyen': 250, 'long': 400}.get(length_mode, 250)
+        return self.extractive_engine.summarize(content, target_words, mode)
+    
     def markdown_to_html(self, text):
         """Convertit le Markdown simple en HTML"""
         if not text:
             return ""
         
-        text = text.strip()
+        with metrics.timer('wiki_summarizer_stage_seconds', stage='html_format'):
+            return self._markdown_to_html(text.strip())
+    
+    def _markdown_to_html(self, text):
         text = re.sub(r'\*\*([^*]+?)\*\*', r'<strong>\1</strong>', text)
         text = re.sub(r'(?<!\*)\*([^*]+?)\*(?!\*)', r'<em>\1</em>', text)
         
@@ -232,23 +2974,19 @@ class WikipediaMistralSummarizer:
         lang_instructions = instructions.get(language, instructions['en'])
         return lang_instructions.get(mode, lang_instructions['general'])
     
-    def summarize_with_mistral(self, title, content, length_mode='moyen', language='en', mode='general'):
-        """Utilise Mistral AI pour résumer le contenu Wikipedia avec mode spécifique"""
-        def _summarize():
-            client = self.get_mistral_client()
-            
-            max_chars = 6000  # Réduit pour Render
-            if len(content) > max_chars:
-                content_truncated = content[:max_chars] + "..."
-            else:
-                content_truncated = content
-            
-            word_count = self.get_word_count_for_length(length_mode)
-            language_instruction = self.get_language_instruction(language)
-            mode_instruction = self.get_mode_instruction(mode, language)
-            
-            # Construction du prompt avec instructions spécifiques au mode
-            base_prompt = f"""You are an expert summarizer. Here is the content of a Wikipedia page about "{title}".
+    def build_summary_messages(self, title, content, length_mode='moyen', language='en', mode='general', budget_tokens=None):
+        """Construit le prompt de résumé d'une page Wikipedia avec instructions spécifiques au mode"""
+        # Introduction + sections les plus pertinentes pour le mode, dans le budget de tokens
+        content_truncated = self.fit_content(
+            content, mode, budget_tokens or self.get_length_budget(self.prompt_token_budgets, length_mode)
+        )
+        
+        word_count = self.get_word_count_for_length(length_mode)
+        language_instruction = self.get_language_instruction(language)
+        mode_instruction = self.get_mode_instruction(mode, language)
+        
+        # Construction du prompt avec instructions spécifiques au mode
+        base_prompt = f"""You are an expert summarizer. Here is the content of a Wikipedia page about "{title}".
 
 Wikipedia Content:
 {content_truncated}
@@ -261,51 +2999,60 @@ Instructions: Create a clear, informative and well-structured summary of this Wi
 - Write in plain text, without markdown formatting
 - {language_instruction}"""
 
-            if mode_instruction:
-                base_prompt += f"""
+        if mode_instruction:
+            base_prompt += f"""
+
+Special focus for this summary:
+{mode_instruction}"""
+
+        base_prompt += "\n\nSummary:"
+        
+        # Format correct pour Mistral AI v1.0.0
+        return [{"role": "user", "content": base_prompt}]
+    
+    def fit_content(self, content, mode, budget_tokens):
+        """Sélectionne les sections du mode et ajuste leur taille au budget de tokens"""
+        # Rapport caractères / tokens mesuré sur l'article lui-même (langue, accents, chiffres)
+        sample = content[:4000]
+        sample_tokens = self.token_counter.count(sample)
+        chars_per_token = len(sample) / sample_tokens if sample_tokens else self.token_counter.chars_per_token
+        max_chars = int(budget_tokens * chars_per_token)
+        
+        selected = self.content_selector.select(content, mode, max_chars)
+        for _ in range(3):
+            tokens = self.token_counter.count(selected)
+            if tokens <= budget_tokens:
+                break
+            max_chars = int(max_chars * budget_tokens / tokens * 0.95)
+            selected = self.content_selector.select(content, mode, max_chars)
+        return selected
+    
+    def build_chunk_messages(self, title, chunk, index, count):
+        """Prompt de l'étape map : notes factuelles d'un morceau d'article, réutilisables pour tous les modes"""
+        prompt = f"""You are preparing notes for a summary of the Wikipedia article "{title}". Here is part {index + 1} of {count}:
+
+{chunk}
 
-Special focus for this summary:
-{mode_instruction}"""
+Instructions: Extract the key information of this part as concise factual notes.
+- Keep names, dates, numbers and places
+- Keep the language of the text
+- One fact per line, plain text, no markdown
 
-            base_prompt += "\n\nSummary:"
-            
-            # Format correct pour Mistral AI v1.0.0
-            messages = [{"role": "user", "content": base_prompt}]
-            
-            # Essayer d'abord avec le modèle standard, puis avec le modèle plus petit
-            try:
-                response = client.chat.complete(
-                    model="mistral-large-latest",
-                    messages=messages,
-                    temperature=0.2,
-                    max_tokens=600
-                )
-            except Exception as e:
-                if "429" in str(e) or "capacity exceeded" in str(e):
-                    print("⚠️ Rate limit atteint, utilisation du modèle small...")
-                    response = client.chat.complete(
-                        model="mistral-small-latest",
-                        messages=messages,
-                        temperature=0.2,
-                        max_tokens=600
-                    )
-                else:
-                    raise e
-            
-            return response.choices[0].message.content.strip()
-        
-        return self.retry_with_different_keys(_summarize)
+Notes:"""
+        return [{"role": "user", "content": prompt}]
     
-    def answer_with_mistral_only(self, theme, length_mode='moyen', language='en', mode='general'):
-        """Utilise Mistral AI pour répondre directement sur un thème sans Wikipedia avec mode spécifique"""
-        def _answer():
-            client = self.get_mistral_client()
-            
-            word_count = self.get_word_count_for_length(length_mode)
-            language_instruction = self.get_language_instruction(language)
-            mode_instruction = self.get_mode_instruction(mode, language)
-            
-            base_prompt = f"""You are an expert assistant who must provide complete information on a subject.
+    def build_reduce_messages(self, title, notes, length_mode='moyen', language='en', mode='general'):
+        """Prompt de l'étape reduce : résumé final à partir des notes de chaque morceau"""
+        combined = '\n\n'.join(f"== Part {index + 1} ==\n{part}" for index, part in enumerate(notes))
+        return self.build_summary_messages(title, combined, length_mode, language, mode, budget_tokens=self.reduce_token_budget)
+    
+    def build_answer_messages(self, theme, length_mode='moyen', language='en', mode='general'):
+        """Construit le prompt d'explication directe d'un thème (sans Wikipedia)"""
+        word_count = self.get_word_count_for_length(length_mode)
+        language_instruction = self.get_language_instruction(language)
+        mode_instruction = self.get_mode_instruction(mode, language)
+        
+        base_prompt = f"""You are an expert assistant who must provide complete information on a subject.
 
 Requested topic: "{theme}"
 
@@ -318,42 +3065,226 @@ Instructions: Provide a complete and informative explanation of this topic.
 - Write in plain text, without markdown formatting
 - {language_instruction}"""
 
-            if mode_instruction:
-                base_prompt += f"""
+        if mode_instruction:
+            base_prompt += f"""
 
 Special focus for this explanation:
 {mode_instruction}"""
 
-            base_prompt += "\n\nResponse:"
-            
-            messages = [{"role": "user", "content": base_prompt}]
+        base_prompt += "\n\nResponse:"
+        
+        return [{"role": "user", "content": base_prompt}]
+    
+    def summarize_with_mistral(self, title, content, length_mode='moyen', language='en', mode='general', usage=None):
+        """Utilise Mistral AI pour résumer le contenu Wikipedia avec mode spécifique.
+        
+        usage (dict optionnel) reçoit les tokens du prompt et de la réponse.
+        """
+        messages = self.prepare_summary_messages(title, content, length_mode, language, mode, usage)
+        return self.complete_with_mistral(messages, 0.2, self.get_length_budget(self.completion_token_limits, length_mode), usage)
+    
+    def plan_map_reduce(self, content):
+        """Morceaux à résumer si l'article est assez long pour le mode hiérarchique, sinon None"""
+        if not self.map_reduce_min_chars or len(content) < self.map_reduce_min_chars:
+            return None
+        chunks = self.content_selector.chunk(content, self.chunk_chars)
+        if len(chunks) < 2 or sum(len(chunk) for chunk in chunks) < self.map_reduce_min_chars:
+            return None
+        return chunks[:self.map_reduce_max_chunks]
+    
+    def prepare_summary_messages(self, title, content, length_mode='moyen', language='en', mode='general', usage=None):
+        """Messages du résumé final : prompt direct, ou étape reduce après le résumé
+        parallèle des morceaux (map) pour un article long"""
+        chunks = self.plan_map_reduce(content)
+        if not chunks:
+            with metrics.timer('wiki_summarizer_stage_seconds', stage='prompt_build'):
+                return self.build_summary_messages(title, content, length_mode, language, mode)
+        
+        print(f"🧩 Article long: résumé hiérarchique en {len(chunks)} morceaux")
+        chunk_usages = [{} for _ in chunks]
+        with metrics.timer('wiki_summarizer_stage_seconds', stage='map'):
+            futures = [
+                self.map_executor.submit(self.summarize_chunk, title, language, chunk, index, len(chunks), chunk_usages[index])
+                for index, chunk in enumerate(chunks)
+            ]
+            notes = [future.result() for future in futures]
+        
+        self.merge_usage(usage, chunk_usages)
+        self.stats['map_reduce'] += 1
+        with metrics.timer('wiki_summarizer_stage_seconds', stage='prompt_build'):
+            return self.build_reduce_messages(title, notes, length_mode, language, mode)
+    
+    def summarize_chunk(self, title, language, chunk, index, count, usage=None):
+        """Étape map : notes d'un morceau, en cache par contenu (partagées entre modes et longueurs)"""
+        key = self.get_chunk_cache_key(title, language, chunk)
+        notes = self.get_tiered(self.chunk_cache, key)
+        if notes is not None:
+            self.stats['chunk_cache_hits'] += 1
+            return notes
+        
+        messages = self.build_chunk_messages(title, chunk, index, count)
+        notes = self.complete_with_mistral(messages, 0.1, self.chunk_summary_tokens, usage)
+        self.set_tiered(self.chunk_cache, key, notes)
+        return notes
+    
+    def get_chunk_cache_key(self, title, language, chunk):
+        return 'chunk:' + hashlib.md5(f"{language}:{title}:{chunk}".encode()).hexdigest()
+    
+    def merge_usage(self, usage, parts):
+        """Ajoute les tokens de plusieurs appels à usage"""
+        if usage is None:
+            return
+        for part in parts:
+            for key, value in part.items():
+                usage[key] = usage.get(key, 0) + value
+    
+    def answer_with_mistral_only(self, theme, length_mode='moyen', language='en', mode='general', usage=None):
+        """Utilise Mistral AI pour répondre directement sur un thème sans Wikipedia avec mode spécifique"""
+        with metrics.timer('wiki_summarizer_stage_seconds', stage='prompt_build'):
+            messages = self.build_answer_messages(theme, length_mode, language, mode)
+        return self.complete_with_mistral(messages, 0.3, self.get_length_budget(self.completion_token_limits, length_mode), usage)
+    
+    def complete_with_mistral(self, messages, temperature, max_tokens, usage=None):
+        """Complétion Mistral (clés, échelle de modèles, disjoncteur) avec comptage des tokens"""
+        raw_prompt_tokens = self.token_counter.raw_count_messages(messages)
+        
+        def _complete(client, model, timeout_ms):
+            response = client.chat.complete(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout_ms=timeout_ms
+            )
+            self.record_usage(raw_prompt_tokens, response.usage, usage)
+            return response.choices[0].message.content.strip()
+        
+        return self.retry_with_different_keys(_complete)
+    
+    async def summarize_with_mistral_async(self, title, content, length_mode='moyen', language='en', mode='general', usage=None):
+        """Version asyncio de summarize_with_mistral"""
+        messages = await self.prepare_summary_messages_async(title, content, length_mode, language, mode, usage)
+        return await self.complete_with_mistral_async(messages, 0.2, self.get_length_budget(self.completion_token_limits, length_mode), usage)
+    
+    async def prepare_summary_messages_async(self, title, content, length_mode='moyen', language='en', mode='general', usage=None):
+        """Version asyncio de prepare_summary_messages (morceaux résumés en tâches concurrentes,
+        découpage et sélection du contenu dans un thread)"""
+        chunks = await asyncio.to_thread(self.plan_map_reduce, content)
+        if not chunks:
+            with metrics.timer('wiki_summarizer_stage_seconds', stage='prompt_build'):
+                return await asyncio.to_thread(self.build_summary_messages, title, content, length_mode, language, mode)
+        
+        print(f"🧩 Article long: résumé hiérarchique en {len(chunks)} morceaux")
+        chunk_usages = [{} for _ in chunks]
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+        
+        async def summarize_chunk(index, chunk):
+            async with semaphore:
+                return await self.summarize_chunk_async(title, language, chunk, index, len(chunks), chunk_usages[index])
+        
+        with metrics.timer('wiki_summarizer_stage_seconds', stage='map'):
+            notes = await asyncio.gather(*(summarize_chunk(index, chunk) for index, chunk in enumerate(chunks)))
+        
+        self.merge_usage(usage, chunk_usages)
+        self.stats['map_reduce'] += 1
+        with metrics.timer('wiki_summarizer_stage_seconds', stage='prompt_build'):
+            return await asyncio.to_thread(self.build_reduce_messages, title, notes, length_mode, language, mode)
+    
+    async def summarize_chunk_async(self, title, language, chunk, index, count, usage=None):
+        """Version asyncio de summarize_chunk"""
+        key = self.get_chunk_cache_key(title, language, chunk)
+        notes = await asyncio.to_thread(self.get_tiered, self.chunk_cache, key)
+        if notes is not None:
+            self.stats['chunk_cache_hits'] += 1
+            return notes
+        
+        messages = self.build_chunk_messages(title, chunk, index, count)
+        notes = await self.complete_with_mistral_async(messages, 0.1, self.chunk_summary_tokens, usage)
+        await asyncio.to_thread(self.set_tiered, self.chunk_cache, key, notes)
+        return notes
+    
+    async def answer_with_mistral_only_async(self, theme, length_mode='moyen', language='en', mode='general', usage=None):
+        """Version asyncio de answer_with_mistral_only"""
+        with metrics.timer('wiki_summarizer_stage_seconds', stage='prompt_build'):
+            messages = self.build_answer_messages(theme, length_mode, language, mode)
+        return await self.complete_with_mistral_async(messages, 0.3, self.get_length_budget(self.completion_token_limits, length_mode), usage)
+    
+    async def complete_with_mistral_async(self, messages, temperature, max_tokens, usage=None):
+        """Version asyncio de complete_with_mistral"""
+        raw_prompt_tokens = self.token_counter.raw_count_messages(messages)
+        
+        async def _complete(client, model, timeout_ms):
+            response = await client.chat.complete_async(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout_ms=timeout_ms
+            )
+            self.record_usage(raw_prompt_tokens, response.usage, usage)
+            return response.choices[0].message.content.strip()
+        
+        return await self.retry_with_different_keys_async(_complete)
+    
+    def record_usage(self, raw_prompt_tokens, response_usage, usage=None):
+        """Comptabilise les tokens réels d'un appel et recalibre l'estimateur.
+        
+        usage (dict optionnel) cumule prompt / completion / estimated_prompt pour la requête.
+        """
+        estimated = int(round(raw_prompt_tokens * self.token_counter.correction))
+        if response_usage is None:
+            return
+        self.stats['prompt_tokens'] += response_usage.prompt_tokens
+        self.stats['completion_tokens'] += response_usage.completion_tokens
+        metrics.inc('wiki_summarizer_tokens_total', response_usage.prompt_tokens, kind='prompt')
+        metrics.inc('wiki_summarizer_tokens_total', response_usage.completion_tokens, kind='completion')
+        self.token_counter.calibrate(raw_prompt_tokens, response_usage.prompt_tokens)
+        if usage is not None:
+            self.merge_usage(usage, [{
+                'prompt': response_usage.prompt_tokens,
+                'completion': response_usage.completion_tokens,
+                'estimated_prompt': estimated
+            }])
+    
+    def get_cached_result(self, cache_key):
+        """Cherche un résultat en mémoire puis sur disque (promu en mémoire si trouvé)"""
+        with metrics.timer('wiki_summarizer_stage_seconds', stage='cache_lookup'):
+            result = self.cache.get(cache_key)
+            if result is not None:
+                print("💾 Résultat trouvé en cache")
+                metrics.inc('wiki_summarizer_cache_lookups_total', tier='memory')
+                return result
             
-            # Essayer d'abord avec le modèle standard, puis avec le modèle plus petit
-            try:
-                response = client.chat.complete(
-                    model="mistral-large-latest", 
-                    messages=messages,
-                    temperature=0.3,
-                    max_tokens=600
-                )
-            except Exception as e:
-                if "429" in str(e) or "capacity exceeded" in str(e):
-                    print("⚠️ Rate limit atteint, utilisation du modèle small...")
-                    response = client.chat.complete(
-                        model="mistral-small-latest",
-                        messages=messages,
-                        temperature=0.3,
-                        max_tokens=600
-                    )
-                else:
-                    raise e
+            if self.disk_cache:
+                result = self.disk_cache.get(cache_key)
+                if result is not None:
+                    print("💽 Résultat trouvé en cache disque")
+                    metrics.inc('wiki_summarizer_cache_lookups_total', tier='disk')
+                    self.cache.set(cache_key, result)
+                    return result
             
-            return response.choices[0].message.content.strip()
+            metrics.inc('wiki_summarizer_cache_lookups_total', tier='miss')
+            return None
+    
+    def get_stale_result(self, cache_key):
+        """Cherche un résultat même expiré (service dégradé), en mémoire puis sur disque"""
+        result = self.cache.get_stale(cache_key)
+        if result is None and self.disk_cache:
+            result = self.disk_cache.get_stale(cache_key)
+        return result
+    
+    def store_result(self, cache_key, result, ttl=None):
+        """Enregistre un résultat dans le cache mémoire et le cache disque"""
+        self.cache.set(cache_key, result, ttl=ttl)
+        if self.disk_cache:
+            self.disk_cache.set(cache_key, result, ttl=ttl)
+    
+    def process_theme(self, theme, length_mode='moyen', language='en', mode='general', engine='mistral', track=True):
+        """Traite un thème complet avec support multilingue et mode spécifique.
         
-        return self.retry_with_different_keys(_answer)
-
-    def process_theme(self, theme, length_mode='moyen', language='en', mode='general'):
-        """Traite un thème complet avec support multilingue et mode spécifique"""
+        engine='extractive' résume l'article localement, sans appel au LLM.
+        track=False n'est pas compté dans la popularité des thèmes (préchauffage).
+        """
         print(f"\n🚀 DÉBUT DU TRAITEMENT: '{theme}' (longueur: {length_mode}, langue: {language}, mode: {mode})")
         self.stats['requests'] += 1
         start_time = time.time()
@@ -365,83 +3296,671 @@ Special focus for this explanation:
             }
         
         theme = theme.strip()
+        lang_code = self.get_wikipedia_language(language)
+        engine = engine if engine in self.ENGINES else 'mistral'
+        cache_key, cached_result = self.lookup_result(theme, length_mode, language, mode, lang_code, engine, track)
+        if cached_result is not None:
+            return cached_result
+        
+        try:
+            return self.inflight.do(
+                cache_key, self.generate_result,
+                cache_key, theme, length_mode, language, mode, lang_code, start_time, engine
+            )
+        except Exception as e:
+            print(f"❌ ERREUR GÉNÉRALE: {str(e)}")
+            return {
+                'success': False,
+                'error': f'Erreur lors du traitement: {str(e)}'
+            }
+    
+    async def process_theme_async(self, theme, length_mode='moyen', language='en', mode='general', engine='mistral'):
+        """Version asyncio de process_theme (point d'entrée ASGI) : mêmes caches, clés,
+        disjoncteur et échelle de modèles, sans bloquer un worker par requête"""
+        print(f"\n🚀 DÉBUT DU TRAITEMENT (async): '{theme}' (longueur: {length_mode}, langue: {language}, mode: {mode})")
+        self.stats['requests'] += 1
+        start_time = time.time()
+        
+        if not theme or len(theme.strip()) < 2:
+            return {
+                'success': False,
+                'error': 'Le thème doit contenir au moins 2 caractères'
+            }
         
-        # Configurer Wikipedia pour la langue demandée
-        lang_code = {'en': 'en', 'fr': 'fr', 'es': 'es'}.get(language, 'en')
-        self.setup_wikipedia_language(lang_code)
+        theme = theme.strip()
+        lang_code = self.get_wikipedia_language(language)
+        engine = engine if engine in self.ENGINES else 'mistral'
+        # Popularité et caches sur disque (SQLite) : hors de la boucle d'événements
+        cache_key, cached_result = await asyncio.to_thread(self.lookup_result, theme, length_mode, language, mode, lang_code, engine)
+        if cached_result is not None:
+            return cached_result
         
-        # Vérifier le cache
-        cache_key = self.get_cache_key(theme, length_mode, language, mode)
-        if cache_key in self.cache:
-            print("💾 Résultat trouvé en cache")
+        try:
+            return await self.async_inflight.do(
+                cache_key, self.generate_result_async,
+                cache_key, theme, length_mode, language, mode, lang_code, start_time, engine
+            )
+        except Exception as e:
+            print(f"❌ ERREUR GÉNÉRALE: {str(e)}")
+            return {
+                'success': False,
+                'error': f'Erreur lors du traitement: {str(e)}'
+            }
+    
+    def track_request(self, theme, length_mode, language, mode, engine):
+        """Compte la demande dans la popularité des thèmes, si ses paramètres sont reconnus : des
+        valeurs arbitraires rempliraient la table et seraient rejouées par le préchauffage"""
+        if (length_mode not in self.LENGTH_MODES or language not in self.LANGUAGES or mode not in self.MODES
+                or len(theme) > self.MAX_TRACKED_THEME_CHARS):
+            return
+        self.popularity.record(theme, length_mode, language, mode, engine)
+    
+    def lookup_result(self, theme, length_mode, language, mode, lang_code, engine, track=True):
+        """Étapes sans calcul de process_theme : popularité, cache (sous le titre canonique si une
+        variante du thème a déjà été résolue) et entrée expirée. Retourne (clé de cache, résultat ou None)"""
+        if track:
+            self.track_request(theme, length_mode, language, mode, engine)
+        
+        cache_key, canonical_title = self.resolve_cache_key(theme, length_mode, language, mode, engine)
+        cached_result = self.get_cached_result(cache_key)
+        if cached_result is not None:
             self.stats['cache_hits'] += 1
-            return self.cache[cache_key]
+            if canonical_title:
+                self.stats['resolution_hits'] += 1
+            return cache_key, cached_result
+        
+        return cache_key, self.serve_stale_while_revalidate(cache_key, theme, length_mode, language, mode, lang_code, engine)
+    
+    def generate_result(self, cache_key, theme, length_mode, language, mode, lang_code, start_time, engine='mistral'):
+        """Calcule le résultat complet (Wikipedia + Mistral) et le met en cache"""
+        precomputed = self.get_precomputed_result(cache_key)
+        if precomputed is not None:
+            return precomputed
+        
+        wiki_data = self.fetch_wikipedia_article(theme, lang_code)
+        usage = {}
+        
+        if wiki_data:
+            cache_key, canonical_result = self.adopt_canonical_key(theme, lang_code, wiki_data, length_mode, language, mode, engine)
+            if canonical_result is not None:
+                return canonical_result
+        
+        if engine == 'extractive':
+            return self.finish_extractive_result(cache_key, theme, wiki_data, length_mode, language, mode, start_time)
+        
+        if not wiki_data:
+            print(f"🤖 Génération directe avec Mistral pour: {theme}")
+            try:
+                mistral_response = self.answer_with_mistral_only(theme, length_mode, language, mode, usage=usage)
+            except LLMUnavailableError:
+                return {'success': False, 'error': 'Service IA temporairement indisponible, réessayez dans quelques instants'}
+            return self.finish_mistral_only_result(cache_key, theme, mistral_response, length_mode, language, mode, start_time, usage)
+        
+        print(f"📖 Résumé Wikipedia pour: {wiki_data['title']}")
+        source = 'wikipedia'
+        try:
+            summary = self.summarize_with_mistral(wiki_data['title'], wiki_data['content'], length_mode, language, mode, usage=usage)
+        except LLMUnavailableError:
+            # Disjoncteur ouvert ou échelle de modèles épuisée : résumé extractif local, mis en cache brièvement
+            print("🔌 Mistral indisponible, résumé extractif local")
+            summary = self.extractive_summary(wiki_data['content'], length_mode, mode)
+            source = 'extractive'
+        return self.finish_wikipedia_result(cache_key, wiki_data, summary, source, length_mode, language, mode, start_time, usage)
+    
+    async def generate_result_async(self, cache_key, theme, length_mode, language, mode, lang_code, start_time, engine='mistral'):
+        """Version asyncio de generate_result (accès SQLite et calculs CPU exécutés dans un thread)"""
+        precomputed = await asyncio.to_thread(self.get_precomputed_result, cache_key)
+        if precomputed is not None:
+            return precomputed
+        
+        wiki_data = await self.fetch_wikipedia_article_async(theme, lang_code)
+        usage = {}
+        
+        if wiki_data:
+            cache_key, canonical_result = await asyncio.to_thread(
+                self.adopt_canonical_key, theme, lang_code, wiki_data, length_mode, language, mode, engine
+            )
+            if canonical_result is not None:
+                return canonical_result
+        
+        if engine == 'extractive':
+            return await asyncio.to_thread(self.finish_extractive_result, cache_key, theme, wiki_data, length_mode, language, mode, start_time)
+        
+        if not wiki_data:
+            print(f"🤖 Génération directe avec Mistral pour: {theme}")
+            try:
+                mistral_response = await self.answer_with_mistral_only_async(theme, length_mode, language, mode, usage=usage)
+            except LLMUnavailableError:
+                return {'success': False, 'error': 'Service IA temporairement indisponible, réessayez dans quelques instants'}
+            return await asyncio.to_thread(
+                self.finish_mistral_only_result, cache_key, theme, mistral_response, length_mode, language, mode, start_time, usage
+            )
+        
+        print(f"📖 Résumé Wikipedia pour: {wiki_data['title']}")
+        source = 'wikipedia'
+        try:
+            summary = await self.summarize_with_mistral_async(wiki_data['title'], wiki_data['content'], length_mode, language, mode, usage=usage)
+        except LLMUnavailableError:
+            print("🔌 Mistral indisponible, résumé extractif local")
+            summary = await asyncio.to_thread(self.extractive_summary, wiki_data['content'], length_mode, mode)
+            source = 'extractive'
+        return await asyncio.to_thread(
+            self.finish_wikipedia_result, cache_key, wiki_data, summary, source, length_mode, language, mode, start_time, usage
+        )
+    
+    def adopt_canonical_key(self, theme, lang_code, wiki_data, length_mode, language, mode, engine):
+        """Enregistre la résolution thème → article et bascule sur la clé de cache canonique.
         
+        Retourne (clé canonique, résultat déjà en cache pour une autre variante du thème ou None).
+        """
+        self.record_resolution(theme, lang_code, wiki_data['title'])
+        cache_key = self.get_cache_key(wiki_data['title'], length_mode, language, mode, engine)
+        cached_result = self.get_cached_result(cache_key)
+        if cached_result is not None:
+            print(f"🔗 '{theme}' résolu en '{wiki_data['title']}', résultat partagé")
+            self.stats['resolution_hits'] += 1
+        return cache_key, cached_result
+    
+    def serve_stale_while_revalidate(self, cache_key, theme, length_mode, language, mode, lang_code, engine):
+        """Entrée expirée depuis peu : servie immédiatement, rafraîchie en arrière-plan (une fois par clé)"""
+        if not self.stale_while_revalidate:
+            return None
+        stale_result = self.cache.get_stale(cache_key, max_stale=self.stale_while_revalidate)
+        if stale_result is None and self.disk_cache:
+            stale_result = self.disk_cache.get_stale(cache_key, max_stale=self.stale_while_revalidate)
+        if stale_result is None:
+            return None
+        
+        print("♻️ Résultat expiré servi, rafraîchissement en arrière-plan")
+        self.stats['stale_served'] += 1
+        with self._revalidating_lock:
+            # Rafraîchissement en cours, ou terminé depuis la lecture de l'entrée expirée
+            if cache_key in self._revalidating or cache_key in self.cache:
+                return stale_result
+            self._revalidating.add(cache_key)
+        
+        future = self.revalidation_executor.submit(
+            self.inflight.do, cache_key, self.revalidate_result,
+            cache_key, theme, length_mode, language, mode, lang_code, engine, stale_result
+        )
+        future.add_done_callback(lambda _: self._revalidating.discard(cache_key))
+        return stale_result
+    
+    def revalidate_result(self, cache_key, theme, length_mode, language, mode, lang_code, engine, stale_result):
+        """Rafraîchit une entrée expirée : prolongée si l'article n'a pas changé, recalculée sinon"""
+        self.stats['revalidations'] += 1
         try:
-            wiki_data = self.smart_wikipedia_search(theme)
+            revid = stale_result.get('revid')
+            # Un résumé de secours est toujours recalculé, même si l'article n'a pas changé
+            if revid and self.revalidate_by_revision and not self.is_fallback_result(stale_result):
+                current_revid = self.setup_wikipedia_language(lang_code).revision(stale_result['title'])
+                if current_revid == revid:
+                    print(f"♻️ Article inchangé (révision {revid}), résumé prolongé: {stale_result['title']}")
+                    self.stats['revalidated_unchanged'] += 1
+                    self.save_result(cache_key, stale_result)
+                    return stale_result
             
-            if not wiki_data:
-                print(f"🤖 Génération directe avec Mistral pour: {theme}")
-                mistral_response = self.answer_with_mistral_only(theme, length_mode, language, mode)
-                
-                if not mistral_response:
-                    return {'success': False, 'error': 'Erreur lors de la génération de la réponse'}
-                
-                formatted_response = self.markdown_to_html(mistral_response)
-                
-                result = {
-                    'success': True,
-                    'title': f"Informations sur: {theme}",
-                    'summary': formatted_response,
-                    'url': None,
-                    'source': 'mistral_only',
-                    'method': 'direct_ai',
-                    'processing_time': round(time.time() - start_time, 2),
-                    'length_mode': length_mode,
-                    'language': language,
-                    'mode': mode
-                }
-                
-                self.stats['mistral_only'] += 1
-                
+            # Article modifié (ou révision inconnue) : ne pas résumer à nouveau la version en cache
+            for key in (theme, stale_result.get('title') or theme):
+                self.article_cache.delete(self.get_article_cache_key(key, lang_code))
+            result = self.generate_result(cache_key, theme, length_mode, language, mode, lang_code, time.time(), engine)
+            if not result.get('success'):
+                self.stats['revalidation_errors'] += 1
+            return result
+        except Exception as e:
+            print(f"⚠️ Rafraîchissement en échec pour '{theme}': {e}")
+            self.stats['revalidation_errors'] += 1
+            return stale_result
+    
+    def get_precomputed_result(self, cache_key):
+        """Résultat déjà disponible sans recalcul : cache rempli entre-temps, ou version périmée si Mistral est en panne"""
+        # Un calcul concurrent a pu se terminer entre la lecture du cache et l'entrée ici
+        if cache_key in self.cache:
+            cached_result = self.cache.get(cache_key)
+            if cached_result is not None:
+                return cached_result
+        
+        # Mistral en panne : servir immédiatement une version périmée si elle existe
+        if self.circuit_breaker.is_open():
+            stale_result = self.get_stale_result(cache_key)
+            if stale_result is not None:
+                print("🔌 Disjoncteur ouvert, résultat périmé servi depuis le cache")
+                return {**stale_result, 'stale': True}
+        
+        return None
+    
+    def finish_extractive_result(self, cache_key, theme, wiki_data, length_mode, language, mode, start_time):
+        """Résultat du moteur extractif demandé explicitement (aucun appel au LLM)"""
+        if not wiki_data:
+            return {'success': False, 'error': f"Aucun article Wikipedia trouvé pour '{theme}' (moteur extractif)"}
+        
+        summary = self.extractive_summary(wiki_data['content'], length_mode, mode)
+        return self.finish_wikipedia_result(cache_key, wiki_data, summary, 'extractive', length_mode, language, mode, start_time, engine='extractive')
+    
+    def finish_mistral_only_result(self, cache_key, theme, mistral_response, length_mode, language, mode, start_time, usage=None):
+        """Construit et met en cache le résultat d'une réponse Mistral sans article Wikipedia"""
+        if not mistral_response:
+            return {'success': False, 'error': 'Erreur lors de la génération de la réponse'}
+        
+        result = {
+            'success': True,
+            'title': f"Informations sur: {theme}",
+            'summary': self.markdown_to_html(mistral_response),
+            'url': None,
+            'source': 'mistral_only',
+            'method': 'direct_ai',
+            'processing_time': round(time.time() - start_time, 2),
+            'length_mode': length_mode,
+            'language': language,
+            'mode': mode
+        }
+        if usage:
+            result['tokens'] = usage
+        
+        self.stats['mistral_only'] += 1
+        self.save_result(cache_key, result)
+        print(f"✅ TRAITEMENT TERMINÉ en {result['processing_time']}s")
+        return result
+    
+    def finish_wikipedia_result(self, cache_key, wiki_data, summary, source, length_mode, language, mode, start_time, usage=None, engine='mistral'):
+        """Construit et met en cache le résultat d'un résumé d'article Wikipedia"""
+        if not summary:
+            return {'success': False, 'error': 'Erreur lors de la génération du résumé'}
+        
+        result = {
+            'success': True,
+            'title': wiki_data['title'],
+            'summary': self.markdown_to_html(summary),
+            'url': wiki_data['url'],
+            'source': source,
+            'method': wiki_data['method'],
+            'revid': wiki_data.get('revid'),
+            'processing_time': round(time.time() - start_time, 2),
+            'length_mode': length_mode,
+            'language': language,
+            'mode': mode
+        }
+        if usage:
+            result['tokens'] = usage
+        if engine != 'mistral':
+            result['engine'] = engine
+        
+        self.stats['wikipedia_success'] += 1
+        self.save_result(cache_key, result)
+        print(f"✅ TRAITEMENT TERMINÉ en {result['processing_time']}s")
+        return result
+    
+    @staticmethod
+    def is_fallback_result(result):
+        """Résumé extractif produit faute de LLM (et non demandé explicitement)"""
+        return result.get('source') == 'extractive' and result.get('engine') != 'extractive'
+    
+    def save_result(self, cache_key, result):
+        """Met un résultat en cache (un résumé de secours ne doit pas survivre longtemps à la panne)"""
+        ttl = self.circuit_breaker.recovery_timeout if self.is_fallback_result(result) else None
+        self.store_result(cache_key, result, ttl=ttl)
+        if self.codec and not ttl:
+            self.codec.add_sample(result)
+    
+    def stream_with_mistral(self, messages, temperature, max_tokens=600, usage=None):
+        """Ouvre un flux de complétion Mistral (clés, échelle de modèles et disjoncteur compris)
+        et produit le texte au fil des tokens"""
+        raw_prompt_tokens = self.token_counter.raw_count_messages(messages)
+        
+        def _open_stream(client, model, timeout_ms):
+            return MistralStream(client.chat.stream(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout_ms=timeout_ms
+            ))
+        
+        for event in self.retry_with_different_keys(_open_stream):
+            choices = event.data.choices
+            if choices and choices[0].delta.content:
+                yield choices[0].delta.content
+            # L'usage arrive avec le dernier fragment du flux
+            if getattr(event.data, 'usage', None) is not None:
+                self.record_usage(raw_prompt_tokens, event.data.usage, usage)
+    
+    def stream_theme(self, theme, length_mode='moyen', language='en', mode='general', engine='mistral'):
+        """Variante streaming de process_theme : produit des événements (type, données).
+        
+        meta : titre et URL dès que l'article est résolu ; token : texte brut reçu ;
+        paragraph : HTML de chaque paragraphe terminé ; done : résultat complet ; error : échec.
+        """
+        print(f"\n🚀 DÉBUT DU STREAMING: '{theme}' (longueur: {length_mode}, langue: {language}, mode: {mode})")
+        self.stats['requests'] += 1
+        start_time = time.time()
+        
+        if not theme or len(theme.strip()) < 2:
+            yield 'error', {'success': False, 'error': 'Le thème doit contenir au moins 2 caractères'}
+            return
+        
+        theme = theme.strip()
+        lang_code = self.get_wikipedia_language(language)
+        engine = engine if engine in self.ENGINES else 'mistral'
+        self.track_request(theme, length_mode, language, mode, engine)
+        cache_key, _ = self.resolve_cache_key(theme, length_mode, language, mode, engine)
+        
+        cached_result = self.get_cached_result(cache_key)
+        if cached_result is None:
+            cached_result = self.serve_stale_while_revalidate(cache_key, theme, length_mode, language, mode, lang_code, engine)
+        if cached_result is None and self.circuit_breaker.is_open():
+            stale_result = self.get_stale_result(cache_key)
+            cached_result = {**stale_result, 'stale': True} if stale_result is not None else None
+        if cached_result is not None:
+            self.stats['cache_hits'] += 1
+            yield 'meta', {key: cached_result.get(key) for key in ('title', 'url', 'source', 'method')}
+            yield 'done', cached_result
+            return
+        
+        # Même thème déjà en cours (flux ou requête classique) : attendre son résultat plutôt
+        # que de solliciter Wikipedia et Mistral une seconde fois
+        call, leader = self.inflight.claim(cache_key)
+        if not leader:
+            try:
+                result = self.inflight.wait(call)
+            except Exception as e:
+                result = {'success': False, 'error': f'Erreur lors du traitement: {str(e)}'}
+            if not result or not result.get('success'):
+                yield 'error', result or {'success': False, 'error': 'Erreur lors de la génération du résumé'}
+                return
+            yield 'meta', {key: result.get(key) for key in ('title', 'url', 'source', 'method')}
+            yield 'done', result
+            return
+        
+        completed = False
+        try:
+            for event, data in self.generate_stream(cache_key, theme, length_mode, language, mode, lang_code, start_time, engine):
+                if event in ('done', 'error'):
+                    # Publié avant d'être envoyé : les requêtes en attente n'attendent pas ce client
+                    self.inflight.complete(cache_key, call, result=data)
+                    completed = True
+                yield event, data
+        finally:
+            if not completed:
+                self.inflight.complete(cache_key, call, error=RuntimeError('Flux interrompu avant la fin du résumé'))
+    
+    def generate_stream(self, cache_key, theme, length_mode, language, mode, lang_code, start_time, engine='mistral'):
+        """Calcule le résultat en streaming (Wikipedia + flux Mistral) et le met en cache"""
+        try:
+            wiki_data = self.fetch_wikipedia_article(theme, lang_code)
+            if wiki_data:
+                cache_key, canonical_result = self.adopt_canonical_key(theme, lang_code, wiki_data, length_mode, language, mode, engine)
+                if canonical_result is not None:
+                    yield 'meta', {key: canonical_result.get(key) for key in ('title', 'url', 'source', 'method')}
+                    yield 'done', canonical_result
+                    return
+            
+            if engine == 'extractive':
+                # Moteur extractif : résultat complet immédiat, rien à streamer
+                result = self.finish_extractive_result(cache_key, theme, wiki_data, length_mode, language, mode, start_time)
+                if not result['success']:
+                    yield 'error', result
+                    return
+                yield 'meta', {key: result.get(key) for key in ('title', 'url', 'source', 'method')}
+                yield 'paragraph', {'html': result['summary']}
+                yield 'done', result
+                return
+            
+            if wiki_data:
+                meta = {'title': wiki_data['title'], 'url': wiki_data['url'], 'source': 'wikipedia', 'method': wiki_data['method']}
+                temperature = 0.2
             else:
-                print(f"📖 Résumé Wikipedia pour: {wiki_data['title']}")
-                summary = self.summarize_with_mistral(wiki_data['title'], wiki_data['content'], length_mode, language, mode)
-                
-                if not summary:
-                    return {'success': False, 'error': 'Erreur lors de la génération du résumé'}
-                
-                formatted_summary = self.markdown_to_html(summary)
-                
-                result = {
-                    'success': True,
-                    'title': wiki_data['title'],
-                    'summary': formatted_summary,
-                    'url': wiki_data['url'],
-                    'source': 'wikipedia',
-                    'method': wiki_data['method'],
-                    'processing_time': round(time.time() - start_time, 2),
-                    'length_mode': length_mode,
-                    'language': language,
-                    'mode': mode
-                }
+                meta = {'title': f"Informations sur: {theme}", 'url': None, 'source': 'mistral_only', 'method': 'direct_ai'}
+                temperature = 0.3
+            yield 'meta', meta
+            
+            text = ''
+            emitted = 0
+            usage = {}
+            max_tokens = self.get_length_budget(self.completion_token_limits, length_mode)
+            try:
+                # Article long : l'étape map a lieu avant le flux, seul le reduce est streamé
+                if wiki_data:
+                    messages = self.prepare_summary_messages(wiki_data['title'], wiki_data['content'], length_mode, language, mode, usage)
+                else:
+                    messages = self.build_answer_messages(theme, length_mode, language, mode)
                 
-                self.stats['wikipedia_success'] += 1
+                for delta in self.stream_with_mistral(messages, temperature, max_tokens, usage):
+                    text += delta
+                    yield 'token', {'text': delta}
+                    
+                    # Conversion HTML incrémentale : chaque paragraphe terminé est envoyé une seule fois
+                    boundary = text.rfind('\n\n')
+                    if boundary > emitted:
+                        html = self.markdown_to_html(text[emitted:boundary])
+                        emitted = boundary + 2
+                        if html:
+                            yield 'paragraph', {'html': html}
+            except LLMUnavailableError:
+                if not wiki_data:
+                    yield 'error', {'success': False, 'error': 'Service IA temporairement indisponible, réessayez dans quelques instants'}
+                    return
+                print("🔌 Mistral indisponible, résumé extractif local")
+                text = self.extractive_summary(wiki_data['content'], length_mode, mode)
+                emitted = 0
+                meta['source'] = 'extractive'
             
-            # Sauvegarder en cache
-            self.cache[cache_key] = result
-            print(f"✅ TRAITEMENT TERMINÉ en {result['processing_time']}s")
-            return result
+            if text[emitted:].strip():
+                yield 'paragraph', {'html': self.markdown_to_html(text[emitted:])}
             
-        except Exception as e:
-            print(f"❌ ERREUR GÉNÉRALE: {str(e)}")
-            return {
-                'success': False,
-                'error': f'Erreur lors du traitement: {str(e)}'
+            if not text.strip():
+                yield 'error', {'success': False, 'error': 'Erreur lors de la génération du résumé'}
+                return
+            
+            result = {
+                'success': True,
+                **meta,
+                'summary': self.markdown_to_html(text),
+                'processing_time': round(time.time() - start_time, 2),
+                'length_mode': length_mode,
+                'language': language,
+                'mode': mode
             }
+            if usage and meta['source'] != 'extractive':
+                result['tokens'] = usage
+            self.stats['wikipedia_success' if wiki_data else 'mistral_only'] += 1
+            self.save_result(cache_key, result)
+            print(f"✅ STREAMING TERMINÉ en {result['processing_time']}s")
+            yield 'done', result
+            
+        except Exception as e:
+            print(f"❌ ERREUR STREAMING: {str(e)}")
+            yield 'error', {'success': False, 'error': f'Erreur lors du traitement: {str(e)}'}
+    
+    def submit_job(self, theme, length_mode='moyen', language='en', mode='general', callback_url=None, engine='mistral'):
+        """Mode job de process_theme : retourne tout de suite un identifiant de job"""
+        return self.jobs.submit(
+            {'theme': theme, 'length_mode': length_mode, 'language': language, 'mode': mode, 'engine': engine},
+            callback_url=callback_url
+        )
+    
+    def run_job(self, items=None, **payload):
+        """Exécute un job de la file : un lot de thèmes (items) ou un thème unique"""
+        if items is not None:
+            return self.batch_report(items)
+        return self.process_theme(**payload)
+    
+    def iter_batch(self, items):
+        """Traite une liste de thèmes avec une concurrence bornée ; produit (index, résultat)
+        dans l'ordre de complétion. Les doublons (même clé de cache) ne sont calculés qu'une fois,
+        les éléments invalides reçoivent leur propre erreur sans interrompre le lot."""
+        groups = OrderedDict()
+        invalid = []
+        for index, item in enumerate(items):
+            theme = item.get('theme') if isinstance(item, dict) else None
+            if not isinstance(theme, str) or not theme.strip():
+                invalid.append(index)
+                continue
+            theme = theme.strip()
+            params = (
+                theme,
+                item.get('length_mode', 'moyen'),
+                item.get('language', 'en'),
+                item.get('mode', 'general'),
+                item.get('engine', 'mistral')
+            )
+            groups.setdefault(self.resolve_cache_key(*params)[0], (params, []))[1].append(index)
+        
+        futures = {
+            self.batch_executor.submit(self.process_theme, *params): indexes
+            for params, indexes in groups.values()
+        }
+        print(f"📦 LOT: {len(items)} éléments, {len(futures)} distincts, {len(invalid)} invalides")
+        
+        for index in invalid:
+            yield index, {'success': False, 'error': 'Thème requis (chaîne non vide)'}
+        
+        for future in futures_as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'success': False, 'error': f'Erreur lors du traitement: {str(e)}'}
+            for index in futures[future]:
+                yield index, result
+    
+    def process_batch(self, items):
+        """Traite un lot complet et retourne les résultats dans l'ordre des éléments"""
+        results = [None] * len(items)
+        for index, result in self.iter_batch(items):
+            results[index] = result
+        return results
+    
+    def batch_report(self, items):
+        """Réponse complète d'un lot (route synchrone ou job de la file)"""
+        start_time = time.time()
+        results = self.process_batch(items)
+        return {
+            'success': True,
+            'count': len(results),
+            'succeeded': sum(1 for result in results if result.get('success')),
+            'processing_time': round(time.time() - start_time, 2),
+            'results': [{'theme': item.get('theme'), **result} for item, result in zip(items, results)]
+        }
+    
+    def warm_cache(self, themes=None, top=50, lengths=('moyen',), languages=('en',), modes=('general',),
+                   engines=('mistral',), window=7 * 24 * 3600, background=False):
+        """Préchauffe le cache : thèmes fournis × combinaisons demandées, ou à défaut les
+        combinaisons les plus demandées par les utilisateurs du service"""
+        if themes:
+            items = self.warmer.plan(themes, lengths, languages, modes, engines)
+        else:
+            items = self.popularity.top(limit=top, window=window)
+        if background:
+            self.warmer.start_background(items)
+            return {'planned': len(items), 'background': True}
+        return self.warmer.warm(items)
+    
+    def metric_gauges(self):
+        """Jauges lues au moment du scrape /metrics"""
+        caches = {'result': self.cache, 'article': self.article_cache, 'chunk': self.chunk_cache, 'resolution': self.resolution_index}
+        samples = []
+        for name, cache in caches.items():
+            samples.append(('wiki_summarizer_cache_entries', {'cache': name}, len(cache)))
+            samples.append(('wiki_summarizer_cache_bytes', {'cache': name}, cache.get_stats()['size_bytes']))
+        samples.append(('wiki_summarizer_circuit_open', {}, int(self.circuit_breaker.is_open())))
+        return samples
+    
+    def get_stats(self):
+        """Statistiques globales, y compris celles du cache"""
+        stats = {
+            **self.stats,
+            'cache': self.cache.get_stats(),
+            'article_cache': self.article_cache.get_stats(),
+            'inflight': self.inflight.get_stats(),
+            'async_inflight': self.async_inflight.get_stats(),
+            'keys': self.key_scheduler.get_stats(),
+            'circuit_breaker': self.circuit_breaker.get_stats(),
+            'models': self.model_ladder.get_stats(),
+            'jobs': self.jobs.get_stats(),
+            'token_counter': self.token_counter.get_stats(),
+            'chunk_cache': self.chunk_cache.get_stats(),
+            'popularity': self.popularity.get_stats(),
+            'warmer': self.warmer.get_stats()
+        }
+        if self.codec:
+            stats['codec'] = self.codec.get_stats()
+        if self.disk_cache:
+            stats['disk_cache'] = self.disk_cache.get_stats()
+        return stats
 
 # Instance globale du résumeur
 summarizer = WikipediaMistralSummarizer()
+metrics.register_gauges(summarizer.metric_gauges)
+
+def install_request_metrics(flask_app, endpoints=None):
+    """Mesure la durée de chaque requête par route (jusqu'à l'envoi des en-têtes pour un flux SSE).
+    
+    Une app qui appelle les vues du résumeur via view_functions (le hub) ne passe pas par les hooks
+    de cette app : elle les installe chez elle avec endpoints = {son endpoint: endpoint du résumeur},
+    seules ces routes étant alors mesurées, sous le même libellé qu'ici.
+    """
+    def label():
+        endpoint = request.endpoint or 'unknown'
+        return endpoint if endpoints is None else endpoints.get(endpoint)
+    
+    @flask_app.before_request
+    def start_request_timer():
+        if label() is not None:
+            g.request_start = time.perf_counter()
+    
+    @flask_app.after_request
+    def record_request_metrics(response):
+        start = g.get('request_start')
+        if start is not None:
+            metrics.observe(
+                'wiki_summarizer_http_request_seconds', time.perf_counter() - start,
+                endpoint=label(), status=response.status_code
+            )
+        return response
+
+install_request_metrics(app)
+
+def split_setting(value):
+    """Liste d'une variable d'environnement ou d'une option séparée par des virgules"""
+    return tuple(item.strip() for item in value.split(',') if item.strip())
+
+def warm_settings():
+    """Combinaisons de préchauffage configurées par l'environnement"""
+    return {
+        'top': int(os.environ.get('WARM_TOP', 50)),
+        'lengths': split_setting(os.environ.get('WARM_LENGTHS', 'moyen')),
+        'languages': split_setting(os.environ.get('WARM_LANGUAGES', 'fr,en')),
+        'modes': split_setting(os.environ.get('WARM_MODES', 'general')),
+        'engines': split_setting(os.environ.get('WARM_ENGINES', 'mistral')),
+        'window': int(os.environ.get('WARM_WINDOW', 7 * 24 * 3600))
+    }
+
+def warm_on_startup():
+    """Préchauffage au démarrage, en arrière-plan (WARM_ON_STARTUP=1) : liste WARM_THEMES_FILE
+    si fournie, sinon thèmes les plus demandés.
+    
+    Sans --preload, chaque worker gunicorn importe ce module : un seul d'entre eux préchauffe
+    (réservation de WARM_LEASE secondes dans le cache disque), sinon le débit WARM_RATE_PER_MINUTE
+    serait multiplié par le nombre de workers et les mêmes thèmes calculés en parallèle.
+    Alternative : python app.py warm avant de lancer les workers, sans WARM_ON_STARTUP.
+    """
+    if summarizer.disk_cache:
+        owner = f"{socket.gethostname()}:{os.getpid()}"
+        if not summarizer.disk_cache.acquire_lease('startup-warm', owner, float(os.environ.get('WARM_LEASE', 3600))):
+            print("🔥 Préchauffage déjà pris en charge par un autre worker")
+            return None
+    try:
+        warm_themes_file = os.environ.get('WARM_THEMES_FILE')
+        return summarizer.warm_cache(
+            themes=CacheWarmer.load_themes(warm_themes_file) if warm_themes_file else None,
+            background=True,
+            **warm_settings()
+        )
+    except OSError as e:
+        print(f"⚠️ Préchauffage impossible: {e}")
+        return None
+
+if os.environ.get('WARM_ON_STARTUP', '0') == '1':
+    warm_on_startup()
 
 @app.route('/')
 def index():
@@ -1646,35 +5165,10 @@ def index():
                 updateProgress(20);
                 updateStatus(translations[currentLanguage].searching);
                 
-                const response = await fetch('/api/summarize', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                        'Accept': 'application/json'
-                    },
-                    body: JSON.stringify(requestData)
-                });
-
-                updateProgress(60);
-                updateStatus(translations[currentLanguage].generating);
-
-                if (!response.ok) {
-                    let errorMessage = `HTTP Error ${response.status}`;
-                    try {
-                        const errorData = await response.json();
-                        errorMessage = errorData.error || errorMessage;
-                    } catch (e) {
-                        const errorText = await response.text();
-                        errorMessage = errorText || errorMessage;
-                    }
-                    throw new Error(errorMessage);
-                }
-
-                const data = await response.json();
-
-                if (!data.success) {
-                    throw new Error(data.error || 'Unknown error');
-                }
+                // Streaming (SSE) si le navigateur le permet, sinon requête JSON classique
+                const data = (window.ReadableStream && window.TextDecoder)
+                    ? await streamSummary(requestData)
+                    : await fetchSummary(requestData);
 
                 updateProgress(100);
                 updateStatus(translations[currentLanguage].completed);
@@ -1699,6 +5193,93 @@ def index():
             }
         }
 
+        async function fetchSummary(requestData) {
+            const response = await fetch('/api/summarize', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Accept': 'application/json'
+                },
+                body: JSON.stringify(requestData)
+            });
+
+            updateProgress(60);
+            updateStatus(translations[currentLanguage].generating);
+
+            if (!response.ok) {
+                let errorMessage = `HTTP Error ${response.status}`;
+                try {
+                    const errorData = await response.json();
+                    errorMessage = errorData.error || errorMessage;
+                } catch (e) {
+                    const errorText = await response.text();
+                    errorMessage = errorText || errorMessage;
+                }
+                throw new Error(errorMessage);
+            }
+
+            const data = await response.json();
+
+            if (!data.success) {
+                throw new Error(data.error || 'Unknown error');
+            }
+            return data;
+        }
+
+        async function streamSummary(requestData) {
+            const response = await fetch('/api/summarize/stream', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Accept': 'text/event-stream'
+                },
+                body: JSON.stringify(requestData)
+            });
+
+            if (!response.ok || !response.body) {
+                return fetchSummary(requestData);
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            const content = document.getElementById('resultContent');
+            let buffer = '';
+
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                // Les événements SSE sont séparés par une ligne vide
+                let separator;
+                while ((separator = buffer.indexOf('\n\n')) !== -1) {
+                    const block = buffer.slice(0, separator);
+                    buffer = buffer.slice(separator + 2);
+
+                    const eventLine = block.split('\n').find(line => line.startsWith('event: '));
+                    const dataLine = block.split('\n').find(line => line.startsWith('data: '));
+                    if (!eventLine || !dataLine) continue;
+
+                    const event = eventLine.slice(7);
+                    const payload = JSON.parse(dataLine.slice(6));
+
+                    if (event === 'meta') {
+                        updateProgress(60);
+                        updateStatus(translations[currentLanguage].generating);
+                        showResult({ ...payload, summary: '', processing_time: '…', length_mode: requestData.length_mode });
+                    } else if (event === 'paragraph' && content) {
+                        updateProgress(80);
+                        content.insertAdjacentHTML('beforeend', payload.html);
+                    } else if (event === 'done') {
+                        return payload;
+                    } else if (event === 'error') {
+                        throw new Error(payload.error || 'Unknown error');
+                    }
+                }
+            }
+            throw new Error(translations[currentLanguage].processing_error);
+        }
+
         function updateProgress(percent) {
             const progressFill = document.getElementById('progressFill');
             if (progressFill) progressFill.style.width = percent + '%';
@@ -1848,13 +5429,14 @@ def summarize():
         length_mode = data.get('length_mode', 'moyen')
         language = data.get('language', 'en')
         mode = data.get('mode', 'general')
+        engine = data.get('engine', 'mistral')
         
         if not theme or not theme.strip():
             return jsonify({'success': False, 'error': 'Thème requis'}), 400
         
-        print(f"🚀 TRAITEMENT: '{theme}' ({length_mode}, {language}, {mode})")
+        print(f"🚀 TRAITEMENT: '{theme}' ({length_mode}, {language}, {mode}, {engine})")
         
-        result = summarizer.process_theme(theme, length_mode, language, mode)
+        result = summarizer.process_theme(theme, length_mode, language, mode, engine)
         
         if not result.get('success'):
             error_msg = result.get('error', 'Erreur inconnue')
@@ -1869,26 +5451,293 @@ def summarize():
         print(f"💥 ERREUR ENDPOINT: {error_msg}")
         return jsonify({'success': False, 'error': f'Erreur serveur: {error_msg}'}), 500
 
+@app.route('/api/summarize/stream', methods=['GET', 'POST'])
+def summarize_stream():
+    """API endpoint de résumé en streaming (Server-Sent Events)"""
+    # POST JSON (fetch) ou paramètres GET (EventSource)
+    data = request.get_json(silent=True) if request.is_json else request.args
+    if not data:
+        return jsonify({'success': False, 'error': 'Données requises'}), 400
+    
+    theme = data.get('theme')
+    length_mode = data.get('length_mode', 'moyen')
+    language = data.get('language', 'en')
+    mode = data.get('mode', 'general')
+    engine = data.get('engine', 'mistral')
+    
+    if not theme or not theme.strip():
+        return jsonify({'success': False, 'error': 'Thème requis'}), 400
+    
+    print(f"🚀 STREAMING: '{theme}' ({length_mode}, {language}, {mode}, {engine})")
+    
+    def generate():
+        for event, payload in summarizer.stream_theme(theme, length_mode, language, mode, engine):
+            yield f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/summarize/batch', methods=['POST'])
+def summarize_batch():
+    """API endpoint de résumé par lot (réponse JSON complète ou flux NDJSON par élément).
+    
+    Jusqu'à BATCH_SYNC_MAX_ITEMS éléments (4 par défaut, une vague de BATCH_CONCURRENCY thèmes),
+    le lot est traité dans la requête, en JSON ou en flux NDJSON (stream: true). Au-delà, il ne
+    tiendrait pas dans le délai d'un worker gunicorn synchrone (30 s, flux compris) : il est confié
+    à la file de jobs (réponse 202 avec l'identifiant du job), et stream: true est refusé (400).
+    À relever avec BATCH_CONCURRENCY ou derrière des workers asynchrones (uvicorn, gevent).
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('items'), list) or not data['items']:
+            return jsonify({'success': False, 'error': "Liste 'items' requise"}), 400
+        
+        max_items = int(os.environ.get('BATCH_MAX_ITEMS', 500))
+        if len(data['items']) > max_items:
+            return jsonify({'success': False, 'error': f'Maximum {max_items} éléments par lot'}), 400
+        
+        # Chaque élément est un thème (chaîne) ou un objet ; les valeurs du lot servent de défaut
+        defaults = {
+            'length_mode': data.get('length_mode', 'moyen'),
+            'language': data.get('language', 'en'),
+            'mode': data.get('mode', 'general'),
+            'engine': data.get('engine', 'mistral')
+        }
+        items = [
+            {**defaults, **item} if isinstance(item, dict) else {**defaults, 'theme': item}
+            for item in data['items']
+        ]
+        
+        # Un lot par vague de BATCH_CONCURRENCY thèmes reste dans le délai d'une requête
+        sync_max_items = int(os.environ.get('BATCH_SYNC_MAX_ITEMS', 4))
+        if len(items) > sync_max_items:
+            if data.get('stream'):
+                # Un flux garde le worker occupé aussi longtemps qu'une réponse complète
+                return jsonify({
+                    'success': False,
+                    'error': f'stream limité à {sync_max_items} éléments ; au-delà, omettre stream pour obtenir un job',
+                    'sync_max_items': sync_max_items
+                }), 400
+            callback_url = data.get('callback_url')
+            if callback_url is not None:
+                refusal = summarizer.jobs.check_callback_url(callback_url) if isinstance(callback_url, str) else 'callback_url invalide'
+                if refusal:
+                    return jsonify({'success': False, 'error': refusal}), 400
+            job_id = summarizer.jobs.submit({'items': items}, callback_url=callback_url)
+            print(f"📦 LOT de {len(items)} éléments confié au job {job_id}")
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'pending',
+                'count': len(items),
+                'sync_max_items': sync_max_items,
+                'poll_url': f'/api/jobs/{job_id}'
+            }), 202
+        
+        if data.get('stream'):
+            def generate():
+                for index, result in summarizer.iter_batch(items):
+                    yield json.dumps({'index': index, 'theme': items[index]['theme'], **result}, ensure_ascii=False) + '\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        return jsonify(summarizer.batch_report(items)), 200
+        
+    except Exception as e:
+        error_msg = str(e)
+        print(f"💥 ERREUR ENDPOINT: {error_msg}")
+        return jsonify({'success': False, 'error': f'Erreur serveur: {error_msg}'}), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """Soumet un résumé en tâche de fond et retourne immédiatement l'identifiant du job"""
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Données JSON requises'}), 400
+    
+    theme = data.get('theme')
+    if not isinstance(theme, str) or not theme.strip():
+        return jsonify({'success': False, 'error': 'Thème requis'}), 400
+    
+    callback_url = data.get('callback_url')
+    if callback_url is not None:
+        refusal = summarizer.jobs.check_callback_url(callback_url) if isinstance(callback_url, str) else 'callback_url invalide'
+        if refusal:
+            return jsonify({'success': False, 'error': refusal}), 400
+    
+    job_id = summarizer.submit_job(
+        theme,
+        data.get('length_mode', 'moyen'),
+        data.get('language', 'en'),
+        data.get('mode', 'general'),
+        callback_url=callback_url,
+        engine=data.get('engine', 'mistral')
+    )
+    return jsonify({'success': True, 'job_id': job_id, 'status': 'pending', 'poll_url': f'/api/jobs/{job_id}'}), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """État d'un job ; ?wait=N attend jusqu'à N secondes (max 30) qu'il se termine"""
+    wait = min(max(request.args.get('wait', 0, type=float), 0), 30)
+    job = summarizer.jobs.get(job_id, wait=wait)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job introuvable'}), 404
+    return jsonify({'success': True, **job}), 200
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """API endpoint pour les statistiques"""
     try:
-        return jsonify(summarizer.stats), 200
+        return jsonify(summarizer.get_stats()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Métriques au format texte Prometheus (latence par étape, appels Mistral, caches)"""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/health')
 def health_check():
     """Health check endpoint pour Render"""
     return jsonify({'status': 'OK', 'service': 'Wikipedia Summarizer Pro'}), 200
 
+# ===== Point d'entrée ASGI : uvicorn app:asgi_app =====
+# /api/summarize est servi en asyncio natif (des centaines de requêtes en vol par processus),
+# les autres routes passent par l'application Flask via WsgiToAsgi.
+
+wsgi_fallback = WsgiToAsgi(app)
+
+async def read_json_body(receive):
+    """Lit le corps complet d'une requête ASGI et le décode en JSON (None si vide ou invalide)"""
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return None
+
+async def send_json(send, payload, status=200):
+    """Envoie une réponse JSON sur une connexion ASGI"""
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json; charset=utf-8'),
+            (b'content-length', str(len(body)).encode())
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def summarize_async(scope, receive, send):
+    """Équivalent asyncio de /api/summarize"""
+    data = await read_json_body(receive)
+    if not data or not isinstance(data, dict):
+        await send_json(send, {'success': False, 'error': 'Données JSON requises'}, 400)
+        return
+    
+    theme = data.get('theme')
+    if not isinstance(theme, str) or not theme.strip():
+        await send_json(send, {'success': False, 'error': 'Thème requis'}, 400)
+        return
+    
+    try:
+        result = await summarizer.process_theme_async(
+            theme,
+            data.get('length_mode', 'moyen'),
+            data.get('language', 'en'),
+            data.get('mode', 'general'),
+            data.get('engine', 'mistral')
+        )
+    except Exception as e:
+        print(f"💥 ERREUR ENDPOINT: {str(e)}")
+        await send_json(send, {'success': False, 'error': f'Erreur serveur: {str(e)}'}, 500)
+        return
+    
+    if not result.get('success'):
+        await send_json(send, {'success': False, 'error': result.get('error', 'Erreur inconnue')}, 500)
+        return
+    await send_json(send, result)
+
+async def serve_summarize_async(scope, receive, send):
+    """/api/summarize en asyncio natif, durée mesurée comme celle des routes Flask
+    (point d'entrée partagé avec le hub)"""
+    with metrics.timer('wiki_summarizer_http_request_seconds', endpoint='summarize_async', status=500) as labels:
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                labels['status'] = message['status']
+            await send(message)
+        await summarize_async(scope, receive, send_with_status)
+
+async def asgi_app(scope, receive, send):
+    """Application ASGI : routes asyncio natives, repli sur Flask pour tout le reste"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await summarizer.close_async()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    if scope['type'] == 'http' and scope['path'] == '/api/summarize' and scope['method'] == 'POST':
+        await serve_summarize_async(scope, receive, send)
+        return
+    
+    await wsgi_fallback(scope, receive, send)
+
+def warm_command(argv):
+    """python app.py warm : préchauffe le cache disque partagé avant de lancer les workers"""
+    settings = warm_settings()
+    parser = argparse.ArgumentParser(prog='app.py warm', description='Préchauffe le cache des résumés')
+    parser.add_argument('--themes', help='fichier de thèmes (un par ligne) ; par défaut, les thèmes les plus demandés')
+    parser.add_argument('--top', type=int, default=settings['top'], help='nombre de combinaisons populaires à préchauffer')
+    parser.add_argument('--lengths', default=','.join(settings['lengths']), help='longueurs (court,moyen,long)')
+    parser.add_argument('--languages', default=','.join(settings['languages']), help='langues (fr,en,es)')
+    parser.add_argument('--modes', default=','.join(settings['modes']), help='modes thématiques')
+    parser.add_argument('--engines', default=','.join(settings['engines']), help='moteurs (mistral,extractive)')
+    parser.add_argument('--window', type=int, default=settings['window'], help='fenêtre de popularité en secondes')
+    parser.add_argument('--concurrency', type=int, default=summarizer.warmer.concurrency, help='calculs simultanés')
+    parser.add_argument('--rate', type=float, help='calculs démarrés par minute au plus')
+    args = parser.parse_args(argv)
+    
+    if not summarizer.disk_cache:
+        print("⚠️ Cache disque désactivé (SUMMARY_CACHE_DB) : le préchauffage ne profitera pas aux workers")
+    
+    summarizer.warmer.concurrency = max(1, args.concurrency)
+    if args.rate is not None:
+        summarizer.warmer.interval = 60.0 / args.rate if args.rate > 0 else 0
+    
+    report = summarizer.warm_cache(
+        themes=CacheWarmer.load_themes(args.themes) if args.themes else None,
+        top=args.top,
+        lengths=split_setting(args.lengths),
+        languages=split_setting(args.languages),
+        modes=split_setting(args.modes),
+        engines=split_setting(args.engines),
+        window=args.window
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0 if report['failed'] == 0 else 1
+
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'warm':
+        sys.exit(warm_command(sys.argv[2:]))
+    
     print("🌐 WIKIPEDIA SUMMARIZER PRO - VERSION ENHANCED WITH THEMATIC MODES")
     print("="*70)
     
     try:
         from mistralai import Mistral
-        import wikipedia
+        import requests
         print("✅ Dépendances OK")
         
         # Configuration pour Render
@@ -0,0 +1,33 @@
+import os
+import sys
+
+# Aucun fichier SQLite pendant les tests : caches, jobs et popularité restent en mémoire
+os.environ['SUMMARY_CACHE_DB'] = ''
+os.environ['JOBS_DB'] = ''
+os.environ.setdefault('WARM_ON_STARTUP', '0')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import types
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def make_summarizer(monkeypatch):
+    """Fabrique de résumeurs isolés : make_summarizer(complete=..., complete_async=..., stream=...)
+    branche ces fonctions à la place de client.chat pour toutes les clés ; wikipedia=False
+    fait échouer la recherche Wikipedia (réponse directe de Mistral)"""
+    def factory(wikipedia=True, **chat):
+        summarizer = app.WikipediaMistralSummarizer()
+        if not wikipedia:
+            async def fetch_wikipedia_article_async(theme, language):
+                return None
+            summarizer.fetch_wikipedia_article = lambda theme, language: None
+            summarizer.fetch_wikipedia_article_async = fetch_wikipedia_article_async
+        client = types.SimpleNamespace(chat=types.SimpleNamespace(**chat))
+        monkeypatch.setattr(app.mistral_clients, 'get', lambda key: client)
+        return summarizer
+    return factory
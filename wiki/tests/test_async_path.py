@@ -0,0 +1,53 @@
+import asyncio
+import json
+import threading
+import types
+
+import app
+
+
+async def complete_async(**kwargs):
+    message = types.SimpleNamespace(content='Résumé.')
+    usage = types.SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=usage)
+
+
+def test_blocking_work_runs_off_the_event_loop(make_summarizer):
+    summarizer = make_summarizer(wikipedia=False, complete_async=complete_async)
+    threads = {}
+    
+    def spy(name, func):
+        def wrapper(*args, **kwargs):
+            threads[name] = threading.current_thread()
+            return func(*args, **kwargs)
+        return wrapper
+    
+    summarizer.popularity.record = spy('record', summarizer.popularity.record)
+    summarizer.get_cached_result = spy('get_cached_result', summarizer.get_cached_result)
+    summarizer.store_result = spy('store_result', summarizer.store_result)
+    
+    result = asyncio.run(summarizer.process_theme_async('Napoléon'))
+    
+    assert result['success']
+    assert set(threads) == {'record', 'get_cached_result', 'store_result'}
+    assert threading.main_thread() not in threads.values()
+
+
+def call_asgi(handler, body):
+    messages = []
+    
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+    
+    async def send(message):
+        messages.append(message)
+    
+    asyncio.run(handler({'type': 'http'}, receive, send))
+    return messages[0]['status'], json.loads(messages[1]['body'])
+
+
+def test_summarize_async_rejects_malformed_bodies():
+    for body in (b'["Napol\\u00e9on"]', b'{"theme": 42}', b'{"theme": ["a", "b"]}', b'"Napoleon"'):
+        status, payload = call_asgi(app.summarize_async, body)
+        assert status == 400
+        assert not payload['success']
@@ -0,0 +1,64 @@
+import json
+
+import app
+
+
+def fake_process_theme(theme, length_mode='moyen', language='en', mode='general', engine='mistral', track=True):
+    return {'success': True, 'title': theme, 'summary': f'<p>{theme}</p>'}
+
+
+def test_invalid_items_get_their_own_error(monkeypatch):
+    monkeypatch.setattr(app.summarizer, 'process_theme', fake_process_theme)
+    monkeypatch.setenv('BATCH_SYNC_MAX_ITEMS', '10')
+    client = app.app.test_client()
+    
+    response = client.post('/api/summarize/batch', json={'items': ['Napoléon', 42, {'theme': ['x']}, None, {'theme': 'Rome'}]})
+    
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['success'] for result in results] == [True, False, False, False, True]
+    assert results[1]['theme'] == 42
+    assert response.get_json()['succeeded'] == 2
+
+
+def test_large_batch_is_handed_to_the_job_queue(monkeypatch):
+    monkeypatch.setattr(app.summarizer, 'process_theme', fake_process_theme)
+    monkeypatch.setenv('BATCH_SYNC_MAX_ITEMS', '2')
+    client = app.app.test_client()
+    
+    response = client.post('/api/summarize/batch', json={'items': ['Napoléon', 'Rome', 'Paris', 7]})
+    
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    job = client.get(f'/api/jobs/{job_id}?wait=5').get_json()
+    assert job['status'] == 'done'
+    assert job['result']['count'] == 4
+    assert job['result']['succeeded'] == 3
+
+
+def test_batch_rejects_non_object_body():
+    client = app.app.test_client()
+    assert client.post('/api/summarize/batch', json=['Napoléon']).status_code == 400
+
+
+def test_stream_is_refused_above_the_sync_limit(monkeypatch):
+    monkeypatch.setattr(app.summarizer, 'process_theme', fake_process_theme)
+    monkeypatch.setenv('BATCH_SYNC_MAX_ITEMS', '2')
+    client = app.app.test_client()
+    
+    response = client.post('/api/summarize/batch', json={'items': ['Napoléon', 'Rome', 'Paris'], 'stream': True})
+    
+    assert response.status_code == 400
+    assert response.get_json()['sync_max_items'] == 2
+
+
+def test_small_batch_still_streams(monkeypatch):
+    monkeypatch.setattr(app.summarizer, 'process_theme', fake_process_theme)
+    monkeypatch.setenv('BATCH_SYNC_MAX_ITEMS', '2')
+    client = app.app.test_client()
+    
+    response = client.post('/api/summarize/batch', json={'items': ['Napoléon', 'Rome'], 'stream': True})
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    
+    assert response.mimetype == 'application/x-ndjson'
+    assert sorted(line['index'] for line in lines) == [0, 1]
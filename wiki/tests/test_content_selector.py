@@ -0,0 +1,18 @@
+from app import ContentSelector
+
+
+def test_stems_match_only_at_word_start():
+    selector = ContentSelector()
+    unrelated = {'heading': 'Départ', 'text': 'La partie commence au départ du quartier. ' * 5}
+    related = {'heading': 'Arts', 'text': "L'art et les artistes de la ville. " * 5}
+    
+    assert selector.score(unrelated, 1, 'culture') == selector.score(unrelated, 1, 'general')
+    assert selector.score(related, 1, 'culture') > selector.score(related, 1, 'general')
+
+
+def test_heading_counts_each_stem_once():
+    selector = ContentSelector()
+    section = {'heading': 'Guerre et guerres', 'text': 'x'}
+    base = selector.score(section, 0, 'general')
+    
+    assert selector.score(section, 0, 'historique') == base + 4.0
@@ -0,0 +1,86 @@
+import time
+
+import app
+from app import DiskSummaryCache
+
+
+def test_lease_is_held_by_a_single_worker(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first, second = DiskSummaryCache(path), DiskSummaryCache(path)
+    
+    assert first.acquire_lease('startup-warm', 'host:1', 60)
+    assert not second.acquire_lease('startup-warm', 'host:2', 60)
+    # Le détenteur peut prolonger sa réservation
+    assert first.acquire_lease('startup-warm', 'host:1', 60)
+
+
+def test_expired_lease_can_be_taken_over(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first, second = DiskSummaryCache(path), DiskSummaryCache(path)
+    
+    assert first.acquire_lease('startup-warm', 'host:1', 0.05)
+    time.sleep(0.1)
+    assert second.acquire_lease('startup-warm', 'host:2', 60)
+
+
+def test_startup_warming_runs_in_one_worker(monkeypatch, tmp_path):
+    path = str(tmp_path / 'cache.db')
+    runs = []
+    monkeypatch.setattr(app.summarizer, 'disk_cache', DiskSummaryCache(path))
+    monkeypatch.setattr(app.summarizer, 'warm_cache', lambda **options: runs.append(options) or {'background': True})
+    
+    app.warm_on_startup()
+    # Autre worker (autre processus) démarrant en même temps sur la même base
+    monkeypatch.setattr(app.os, 'getpid', lambda: -1)
+    monkeypatch.setattr(app.summarizer, 'disk_cache', DiskSummaryCache(path))
+    app.warm_on_startup()
+    
+    assert len(runs) == 1
+
+
+def test_expired_entry_is_a_miss_but_stays_available_as_stale(tmp_path):
+    cache = DiskSummaryCache(str(tmp_path / 'cache.db'), ttl=60)
+    cache.set('napoleon', {'title': 'Napoléon'})
+    cache.set('rome', {'title': 'Rome'}, ttl=-1)
+    
+    assert cache.get('napoleon') == {'title': 'Napoléon'}
+    assert cache.get('rome') is None
+    assert cache.get_stale('rome') == {'title': 'Rome'}
+    assert cache.get_stale('rome', max_stale=0) is None
+    assert cache.stats['misses'] == 1
+
+
+def test_prune_keeps_entries_within_stale_grace(tmp_path):
+    cache = DiskSummaryCache(str(tmp_path / 'cache.db'), stale_grace=60)
+    cache.set('rome', {'title': 'Rome'}, ttl=-1)
+    cache.set('paris', {'title': 'Paris'}, ttl=-120)
+    cache.set('napoleon', {'title': 'Napoléon'}, ttl=0)
+    
+    cache.prune()
+    
+    assert cache.get_stale('rome') == {'title': 'Rome'}
+    assert cache.get_stale('paris') is None
+    # ttl=0 : pas d'expiration
+    assert cache.get('napoleon') == {'title': 'Napoléon'}
+
+
+def test_prune_drops_oldest_entries_beyond_max_entries(tmp_path):
+    cache = DiskSummaryCache(str(tmp_path / 'cache.db'), max_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, {'title': key})
+        time.sleep(0.01)
+    
+    cache.prune()
+    
+    assert cache.get('a') is None
+    assert cache.get('b') == {'title': 'b'}
+    assert cache.get('c') == {'title': 'c'}
+    assert cache.get_stats()['entries'] == 2
+
+
+def test_prune_runs_automatically_every_hundred_writes(tmp_path):
+    cache = DiskSummaryCache(str(tmp_path / 'cache.db'), max_entries=10)
+    for index in range(100):
+        cache.set(f'theme-{index}', {'index': index})
+    
+    assert cache.get_stats()['entries'] == 10
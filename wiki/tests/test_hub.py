@@ -0,0 +1,51 @@
+import asyncio
+import importlib.util
+import os
+
+import pytest
+
+HUB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'app.py')
+
+
+@pytest.fixture(scope='module')
+def hub():
+    """Hub chargé comme en production (module « app » distinct de celui du résumeur)"""
+    spec = importlib.util.spec_from_file_location('hub_app', HUB_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def request_count(hub, endpoint, status):
+    line = f'wiki_summarizer_http_request_seconds_count{{endpoint="{endpoint}",status="{status}"}}'
+    rendered = hub.wiki_module.metrics.render()
+    return next((float(row.split()[-1]) for row in rendered.splitlines() if row.startswith(line)), 0)
+
+
+def test_hub_loads_the_summarizer(hub):
+    assert hub.summarizer_app is not None
+    assert hub.summarize_async is not None
+    assert hub.summarizer_app.import_name != hub.app.import_name
+
+
+def test_hub_proxies_are_timed(hub):
+    before = request_count(hub, 'get_stats', 200)
+    
+    assert hub.app.test_client().get('/api/stats').status_code == 200
+    assert request_count(hub, 'get_stats', 200) == before + 1
+
+
+def test_hub_native_summarize_is_timed(hub):
+    before = request_count(hub, 'summarize_async', 400)
+    messages = []
+    
+    async def receive():
+        return {'type': 'http.request', 'body': b'{"theme": 42}', 'more_body': False}
+    
+    async def send(message):
+        messages.append(message)
+    
+    asyncio.run(hub.asgi_app({'type': 'http', 'method': 'POST', 'path': '/api/summarize'}, receive, send))
+    
+    assert messages[0]['status'] == 400
+    assert request_count(hub, 'summarize_async', 400) == before + 1
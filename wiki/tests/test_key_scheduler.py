@@ -0,0 +1,85 @@
+import types
+
+import pytest
+from mistralai.models import SDKError
+
+from app import CircuitBreaker, KeyScheduler, KeysThrottledError, LLMUnavailableError
+
+
+def ok_response(**kwargs):
+    message = types.SimpleNamespace(content='Résumé.')
+    usage = types.SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=usage)
+
+
+def test_unlimited_by_default():
+    scheduler = KeyScheduler(['a', 'b'])
+    for _ in range(500):
+        _, wait_time = scheduler.acquire()
+        assert wait_time == 0.0
+
+
+def test_release_refunds_abandoned_reservations():
+    scheduler = KeyScheduler(['a', 'b', 'c'], requests_per_minute=60, burst=5)
+    for _ in range(15):
+        scheduler.acquire()
+    
+    # Réservations abandonnées : aucune dette ne s'accumule
+    for _ in range(50):
+        index, wait_time = scheduler.acquire()
+        assert wait_time > 0
+        scheduler.release(index)
+    
+    assert all(state['tokens'] > -1 for state in scheduler.keys)
+    _, wait_time = scheduler.acquire()
+    assert wait_time < 1.5
+
+
+def test_throttled_keys_do_not_trip_breaker_or_ladder(make_summarizer):
+    summarizer = make_summarizer(complete=ok_response)
+    summarizer.key_scheduler = KeyScheduler(summarizer.api_keys, requests_per_minute=1, burst=1)
+    summarizer.retry_policy.total_budget = 0.5
+    
+    for _ in range(3):
+        summarizer.complete_with_mistral([{'role': 'user', 'content': 'x'}], 0.2, 50)
+    for _ in range(20):
+        with pytest.raises(KeysThrottledError):
+            summarizer.complete_with_mistral([{'role': 'user', 'content': 'x'}], 0.2, 50)
+    
+    assert summarizer.circuit_breaker.state == CircuitBreaker.CLOSED
+    assert summarizer.circuit_breaker.failures == 0
+    assert all(state['failures'] == 0 for state in summarizer.model_ladder.state.values())
+    assert all(state['tokens'] > -1 for state in summarizer.key_scheduler.keys)
+
+
+def test_throttled_is_an_llm_unavailable_fallback():
+    assert issubclass(KeysThrottledError, LLMUnavailableError)
+
+
+def test_half_open_probe_released_when_throttled(make_summarizer):
+    summarizer = make_summarizer(complete=ok_response)
+    summarizer.key_scheduler = KeyScheduler(summarizer.api_keys, requests_per_minute=1, burst=1)
+    for state in summarizer.key_scheduler.keys:
+        state['tokens'] = 0.0
+    summarizer.retry_policy.total_budget = 0.5
+    breaker = summarizer.circuit_breaker
+    breaker.state = CircuitBreaker.HALF_OPEN
+    
+    with pytest.raises(KeysThrottledError):
+        summarizer.complete_with_mistral([{'role': 'user', 'content': 'x'}], 0.2, 50)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.half_open_calls == 0
+
+
+def test_real_failures_still_open_breaker(make_summarizer):
+    def failing(**kwargs):
+        raise SDKError('Service unavailable', status_code=503)
+    
+    summarizer = make_summarizer(complete=failing)
+    summarizer.key_scheduler = KeyScheduler(summarizer.api_keys, cooldown=0.0)
+    summarizer.retry_policy.base_delay = 0.0
+    summarizer.retry_policy.max_delay = 0.0
+    for _ in range(summarizer.circuit_breaker.failure_threshold):
+        with pytest.raises(LLMUnavailableError):
+            summarizer.complete_with_mistral([{'role': 'user', 'content': 'x'}], 0.2, 50)
+    assert summarizer.circuit_breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,16 @@
+from app import ModelLadder
+
+
+def test_slow_last_llm_is_never_degraded():
+    ladder = ModelLadder(['large', 'small', ModelLadder.EXTRACTIVE], slow_threshold=1.0)
+    ladder.record_success('small', 5.0)
+    
+    assert ladder.get_models() == ['large', 'small', ModelLadder.EXTRACTIVE]
+    assert not ladder.get_stats()['small']['degraded']
+
+
+def test_slow_model_with_fallback_is_degraded():
+    ladder = ModelLadder(['large', 'small', ModelLadder.EXTRACTIVE], slow_threshold=1.0)
+    ladder.record_success('large', 5.0)
+    
+    assert ladder.get_models() == ['small', ModelLadder.EXTRACTIVE]
@@ -0,0 +1,44 @@
+import sqlite3
+import time
+
+import app
+from app import ThemePopularity
+
+
+def test_top_ranks_in_sqlite(tmp_path):
+    popularity = ThemePopularity(str(tmp_path / 'stats.db'), flush_interval=3600)
+    for theme, count in (('Rome', 3), ('Paris', 5), ('Lyon', 1)):
+        for _ in range(count):
+            popularity.record(theme, 'moyen', 'en', 'general')
+    
+    top = popularity.top(limit=2)
+    
+    assert [(item['theme'], item['count']) for item in top] == [('paris', 5), ('rome', 3)]
+    assert popularity.get_stats()['pending'] == 0
+
+
+def test_old_and_excess_rows_are_pruned(tmp_path):
+    db_path = str(tmp_path / 'stats.db')
+    popularity = ThemePopularity(db_path, flush_interval=3600, retention=3600, max_rows=3)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO theme_requests VALUES ('ancien', 'moyen', 'en', 'general', 'mistral', 9, ?)", (time.time() - 7200,))
+    conn.commit()
+    for index in range(5):
+        popularity.record(f'theme {index}', 'moyen', 'en', 'general')
+        time.sleep(0.01)
+    
+    popularity.flush()
+    
+    themes = [row[0] for row in conn.execute("SELECT theme FROM theme_requests ORDER BY last_seen")]
+    assert themes == ['theme 2', 'theme 3', 'theme 4']
+
+
+def test_unknown_parameters_are_not_tracked():
+    summarizer = app.WikipediaMistralSummarizer()
+    summarizer.track_request('Napoléon', 'moyen', 'fr', 'historique', 'mistral')
+    summarizer.track_request('Napoléon', 'x' * 50, 'fr', 'historique', 'mistral')
+    summarizer.track_request('Napoléon', 'moyen', 'de', 'historique', 'mistral')
+    summarizer.track_request('Napoléon', 'moyen', 'fr', 'poésie', 'mistral')
+    summarizer.track_request('N' * 500, 'moyen', 'fr', 'historique', 'mistral')
+    
+    assert [(item['theme'], item['count']) for item in summarizer.popularity.top()] == [('napoléon', 1)]
@@ -0,0 +1,30 @@
+from flask import Flask
+
+import app
+
+
+def test_proxy_app_records_under_summarizer_endpoint():
+    hub = Flask('hub')
+    
+    @hub.route('/api/stats')
+    def api_stats():
+        return app.app.view_functions['get_stats']()
+    
+    @hub.route('/health')
+    def health_check():
+        return 'ok'
+    
+    app.install_request_metrics(hub, endpoints={'api_stats': 'get_stats'})
+    before = app.metrics.render()
+    client = hub.test_client()
+    client.get('/api/stats')
+    client.get('/health')
+    rendered = app.metrics.render()
+    
+    line = 'wiki_summarizer_http_request_seconds_count{endpoint="get_stats",status="200"}'
+    
+    def count(text):
+        return next((float(row.split()[-1]) for row in text.splitlines() if row.startswith(line)), 0)
+    
+    assert count(rendered) == count(before) + 1
+    assert 'endpoint="health_check"' not in rendered
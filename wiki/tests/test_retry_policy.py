@@ -0,0 +1,75 @@
+import email.utils
+import time
+
+import httpx
+import pytest
+from mistralai.models import HTTPValidationError, SDKError
+
+from app import CircuitBreaker, LLMUnavailableError, RetryPolicy
+
+
+def sdk_error(status, headers=None):
+    response = httpx.Response(status, headers=headers or {})
+    return SDKError('Erreur API', status_code=status, raw_response=response)
+
+
+@pytest.mark.parametrize('exc, retryable', [
+    (httpx.ConnectError('connexion refusée'), True),
+    (httpx.ReadTimeout('délai dépassé'), True),
+    (httpx.RemoteProtocolError('flux coupé'), True),
+    (ConnectionError('connexion coupée'), True),
+    (sdk_error(429), True),
+    (sdk_error(503), True),
+    (sdk_error(400), False),
+    (HTTPValidationError(data=None), False),
+    (AttributeError("'NoneType' object has no attribute 'strip'"), False),
+    (KeyError('choices'), False),
+])
+def test_only_transport_and_server_errors_are_retryable(exc, retryable):
+    assert RetryPolicy().is_retryable(exc) is retryable
+
+
+def test_validation_error_has_status_422():
+    assert RetryPolicy.get_status_code(HTTPValidationError(data=None)) == 422
+    assert RetryPolicy.get_status_code(AttributeError()) is None
+
+
+def test_retry_after_in_seconds():
+    assert RetryPolicy.get_retry_after(sdk_error(429, {'Retry-After': '7'})) == 7.0
+    assert RetryPolicy.get_retry_after(sdk_error(429, {'Retry-After': '-3'})) == 0.0
+
+
+def test_retry_after_as_http_date():
+    date = email.utils.formatdate(time.time() + 30, usegmt=True)
+    
+    delay = RetryPolicy.get_retry_after(sdk_error(503, {'Retry-After': date}))
+    
+    assert 28 <= delay <= 30
+
+
+def test_retry_after_missing_or_invalid():
+    assert RetryPolicy.get_retry_after(sdk_error(429)) is None
+    assert RetryPolicy.get_retry_after(sdk_error(429, {'Retry-After': 'later'})) is None
+    assert RetryPolicy.get_retry_after(AttributeError()) is None
+
+
+@pytest.mark.parametrize('exc', [HTTPValidationError(data=None), AttributeError('bug local')])
+def test_non_retryable_errors_leave_ladder_and_breaker_alone(make_summarizer, exc):
+    calls = []
+    
+    def complete(**kwargs):
+        calls.append(kwargs['model'])
+        raise exc
+    
+    summarizer = make_summarizer(complete=complete)
+    
+    for _ in range(summarizer.circuit_breaker.failure_threshold + 2):
+        with pytest.raises(LLMUnavailableError):
+            summarizer.complete_with_mistral([{'role': 'user', 'content': 'x'}], 0.2, 50)
+    
+    # Une seule tentative par appel : ni autre clé, ni autre modèle
+    assert len(calls) == summarizer.circuit_breaker.failure_threshold + 2
+    assert summarizer.circuit_breaker.state == CircuitBreaker.CLOSED
+    assert summarizer.circuit_breaker.failures == 0
+    assert all(state['failures'] == 0 for state in summarizer.model_ladder.state.values())
+    assert all(state['failures'] == 0 for state in summarizer.key_scheduler.keys)
@@ -0,0 +1,75 @@
+import threading
+import types
+
+import app
+
+
+def cached_result(revid=101):
+    return {'success': True, 'title': 'Napoléon', 'summary': '<p>Résumé.</p>', 'source': 'wikipedia', 'revid': revid}
+
+
+def expired_summarizer():
+    summarizer = app.WikipediaMistralSummarizer()
+    summarizer.cache.set('napoleon', cached_result(), ttl=-1)
+    return summarizer
+
+
+def serve(summarizer):
+    return summarizer.serve_stale_while_revalidate('napoleon', 'Napoléon', 'moyen', 'fr', 'general', 'fr', 'mistral')
+
+
+def test_expired_entry_is_served_and_refreshed_once():
+    summarizer = expired_summarizer()
+    release = threading.Event()
+    calls = []
+    
+    def revalidate_result(cache_key, *args):
+        calls.append(cache_key)
+        release.wait(5)
+        return cached_result()
+    
+    summarizer.revalidate_result = revalidate_result
+    
+    assert summarizer.cache.get('napoleon') is None
+    results = [serve(summarizer) for _ in range(3)]
+    release.set()
+    summarizer.revalidation_executor.shutdown(wait=True)
+    
+    assert results == [cached_result()] * 3
+    assert calls == ['napoleon']
+    assert summarizer.stats['stale_served'] == 3
+
+
+def test_entry_too_old_is_not_served():
+    summarizer = expired_summarizer()
+    summarizer.stale_while_revalidate = 0
+    assert serve(summarizer) is None
+
+
+def test_unchanged_revision_only_extends_the_entry(monkeypatch):
+    summarizer = expired_summarizer()
+    wikipedia = types.SimpleNamespace(revision=lambda title: 101)
+    monkeypatch.setattr(summarizer, 'setup_wikipedia_language', lambda lang_code: wikipedia)
+    
+    def generate_result(*args):
+        raise AssertionError("l'article n'a pas changé, aucun recalcul attendu")
+    
+    monkeypatch.setattr(summarizer, 'generate_result', generate_result)
+    
+    result = summarizer.revalidate_result('napoleon', 'Napoléon', 'moyen', 'fr', 'general', 'fr', 'mistral', cached_result())
+    
+    assert result == cached_result()
+    assert summarizer.cache.get('napoleon') == cached_result()
+    assert summarizer.stats['revalidated_unchanged'] == 1
+
+
+def test_changed_revision_is_summarized_again(monkeypatch):
+    summarizer = expired_summarizer()
+    wikipedia = types.SimpleNamespace(revision=lambda title: 102)
+    monkeypatch.setattr(summarizer, 'setup_wikipedia_language', lambda lang_code: wikipedia)
+    monkeypatch.setattr(summarizer, 'generate_result', lambda *args: cached_result(revid=102))
+    
+    result = summarizer.revalidate_result('napoleon', 'Napoléon', 'moyen', 'fr', 'general', 'fr', 'mistral', cached_result())
+    
+    assert result['revid'] == 102
+    assert summarizer.stats['revalidated_unchanged'] == 0
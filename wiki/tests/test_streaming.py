@@ -0,0 +1,74 @@
+import threading
+import time
+import types
+
+
+def chunk(text):
+    delta = types.SimpleNamespace(content=text)
+    return types.SimpleNamespace(data=types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta)], usage=None))
+
+
+def test_mid_stream_failure_is_reported(make_summarizer):
+    def stream(**kwargs):
+        yield chunk('Début du résumé')
+        raise ConnectionError('connexion coupée')
+    
+    summarizer = make_summarizer(wikipedia=False, stream=stream)
+    events = list(summarizer.stream_theme('Napoléon'))
+    
+    assert events[-1][0] == 'error'
+    assert summarizer.circuit_breaker.failures == 1
+    model = summarizer.model_ladder.models[0]
+    assert summarizer.model_ladder.state[model]['failures'] == 1
+    assert any(state['failures'] for state in summarizer.key_scheduler.keys)
+
+
+def test_success_recorded_only_when_stream_completes(make_summarizer):
+    def stream(**kwargs):
+        yield chunk('Premier paragraphe.\n\n')
+        yield chunk('Second paragraphe.')
+    
+    summarizer = make_summarizer(wikipedia=False, stream=stream)
+    summarizer.circuit_breaker.failures = 2
+    events = summarizer.stream_theme('Napoléon')
+    for event, _ in events:
+        if event == 'token':
+            break
+    # Flux ouvert mais pas encore lu en entier : rien n'est compté comme un succès
+    assert summarizer.circuit_breaker.failures == 2
+    
+    remaining = list(events)
+    assert remaining[-1][0] == 'done'
+    assert summarizer.circuit_breaker.failures == 0
+
+
+def test_concurrent_streams_share_one_generation(make_summarizer):
+    calls = []
+    
+    def stream(**kwargs):
+        calls.append(kwargs['model'])
+        time.sleep(0.3)
+        yield chunk('Résumé partagé.')
+    
+    summarizer = make_summarizer(wikipedia=False, stream=stream)
+    results = {}
+    
+    def consume(name, func):
+        results[name] = func()
+    
+    threads = [
+        threading.Thread(target=consume, args=('leader', lambda: list(summarizer.stream_theme('Napoléon')))),
+        threading.Thread(target=consume, args=('stream', lambda: list(summarizer.stream_theme('Napoléon')))),
+        threading.Thread(target=consume, args=('classic', lambda: summarizer.process_theme('Napoléon'))),
+    ]
+    threads[0].start()
+    time.sleep(0.1)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert [event for event, _ in results['stream']] == ['meta', 'done']
+    assert results['stream'][-1][1]['summary'] == results['leader'][-1][1]['summary']
+    assert results['classic']['summary'] == results['leader'][-1][1]['summary']
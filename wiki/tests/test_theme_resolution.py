@@ -0,0 +1,47 @@
+import pytest
+
+import app
+
+
+@pytest.fixture
+def summarizer():
+    return app.WikipediaMistralSummarizer()
+
+
+@pytest.mark.parametrize('first, second', [
+    ('C', 'C++'),
+    ('C', 'C#'),
+    ('F', 'F#'),
+    ('NET', '.NET'),
+    ('AT&T', 'AT T'),
+])
+def test_symbols_are_significant(first, second):
+    normalize = app.WikipediaMistralSummarizer.normalize_theme
+    assert normalize(first) != normalize(second)
+    assert normalize(first, fold_accents=True) != normalize(second, fold_accents=True)
+
+
+@pytest.mark.parametrize('variant', ['napoléon  ier', 'NAPOLÉON IER', 'Napoléon-Ier', '"Napoléon Ier"'])
+def test_case_space_quotes_and_hyphens_are_folded(variant):
+    normalize = app.WikipediaMistralSummarizer.normalize_theme
+    assert normalize(variant) == normalize('Napoléon Ier')
+
+
+def test_resolution_does_not_cross_symbol_variants(summarizer):
+    summarizer.record_resolution('C++', 'en', 'C++')
+    summarizer.record_resolution('C#', 'en', 'C Sharp (programming language)')
+    
+    assert summarizer.resolve_theme('C', 'en') is None
+    assert summarizer.resolve_theme('c++', 'en') == 'C++'
+    assert summarizer.resolve_theme('c#', 'en') == 'C Sharp (programming language)'
+
+
+def test_accent_folding_stays_unambiguous(summarizer):
+    summarizer.record_resolution('Napoleon', 'fr', 'Napoléon Ier')
+    assert summarizer.resolve_theme('napoléon ier', 'fr') == 'Napoléon Ier'
+    assert summarizer.resolve_theme('Napoleon Ier', 'fr') == 'Napoléon Ier'
+    
+    summarizer.record_resolution('pâte', 'fr', 'Pâte')
+    summarizer.record_resolution('pâté', 'fr', 'Pâté')
+    assert summarizer.resolve_theme('pate', 'fr') is None
+    assert summarizer.resolve_theme('pâté', 'fr') == 'Pâté'
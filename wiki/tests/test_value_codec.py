@@ -0,0 +1,63 @@
+import pytest
+
+from app import DiskSummaryCache, ValueCodec
+
+
+def sample(title):
+    return {
+        'success': True,
+        'title': title,
+        'summary': f'<p>{title} est une figure majeure de l\'histoire de France et de l\'Europe.</p>',
+        'source': 'wikipedia'
+    }
+
+
+def trained_codec(cache):
+    codec = ValueCodec(train_samples=3, loader=cache.load_dictionary, on_train=cache.save_dictionary)
+    for title in ('Napoléon', 'Louis XIV', 'Jeanne d\'Arc'):
+        codec.add_sample(sample(title))
+    assert codec.dict_id != ValueCodec().dict_id
+    return codec
+
+
+def test_round_trip():
+    codec = ValueCodec()
+    value = sample('Napoléon')
+    
+    data = codec.encode(value)
+    
+    assert isinstance(data, bytes)
+    assert codec.decode(data) == value
+    assert codec.get_stats()['encoded'] == 1
+
+
+def test_dictionary_trained_in_one_worker_decodes_in_another(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first = DiskSummaryCache(path)
+    first.codec = trained_codec(first)
+    first.set('napoleon', sample('Napoléon'))
+    
+    # Autre worker : ne connaît que l'amorce, le dictionnaire appris est relu dans la base
+    second = DiskSummaryCache(path)
+    second.codec = ValueCodec(loader=second.load_dictionary)
+    
+    assert second.get('napoleon') == sample('Napoléon')
+    assert second.load_dictionary(first.codec.dict_id) == first.codec._dicts[first.codec.dict_id]
+    assert second.latest_dictionary() == first.codec._dicts[first.codec.dict_id]
+
+
+def test_unknown_dictionary_id(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first = DiskSummaryCache(path)
+    # Dictionnaire appris mais jamais persisté
+    first.codec = trained_codec(DiskSummaryCache(str(tmp_path / 'other.db')))
+    first.set('napoleon', sample('Napoléon'))
+    data = first.codec.encode(sample('Napoléon'))
+    
+    second = DiskSummaryCache(path, codec=ValueCodec(loader=lambda dict_id: None))
+    
+    with pytest.raises(ValueError):
+        second.codec.decode(data)
+    # Le cache disque traite l'entrée comme absente au lieu de lever
+    assert second.get('napoleon') is None
+    assert second.stats['errors'] == 1